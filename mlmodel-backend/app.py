@@ -2,47 +2,207 @@ import os
 import numpy as np
 from PIL import Image
 import cv2
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
-from tensorflow.keras.models import Model
-from tensorflow.keras.layers import Flatten, Dense, Dropout
-from tensorflow.keras.applications.vgg19 import VGG19
 from datetime import datetime
-import joblib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import contextlib
+import io
+import itertools
+import threading
+from types import SimpleNamespace
+import zipfile
+import pandas as pd
 import json
 import re
 from difflib import SequenceMatcher
+from batch_scheduler import scheduler_from_env
+from image_decode import decode_to_tensor
+from prediction_cache import PredictionCache
+from risk_cache import risk_caches_from_env
+from remedy_log import get_remedy_log
+from inference_backends import (
+    KerasBackend, backend_from_env, backend_name_from_env, bucket_sizes, load_reference_images, serves_from_file
+)
+from model_registry import (
+    STATE_LOADED, STATE_UNLOADED, ModelSpec, ModelUnavailable, preload_from_env, registry_from_env,
+    watcher_from_env
+)
+from cascade import CascadeClassifier, STAGE_FULL, STAGE_NAMES
+from tree_ensemble import load_engine_from_env
+from tabular_batch import (
+    HEART_RISK_LEVELS, PCOD_RISK_LEVELS, SPECS as TABULAR_SPECS, frames_from_csv, frames_from_json, score_frames
+)
 # Semantic search will be imported when needed
 
 # -------------------------------
-# Load VGG19 Pneumonia Model
+# Model Registry
 # -------------------------------
 
+# Models load lazily on first use (MODEL_PRELOAD=all or a comma list loads them
+# at startup); MODEL_MEMORY_BUDGET_MB unloads least recently used models
+registry = registry_from_env()
+
+
+def loaded_model(name):
+    """
+    The named model and its version, loading it if needed
+
+    Returns:
+        (model, version), or (None, None) if it cannot be served. Hold on to
+        the returned model for the whole request: a hot reload swaps in a new
+        object for later requests without touching this one.
+    """
+    try:
+        return registry.get_versioned(name)
+    except ModelUnavailable:
+        return None, None
+
+
+# -------------------------------
 # Load VGG19 Pneumonia Model
 # -------------------------------
 
-model_03 = None
-try:
-    base_model = VGG19(include_top=False, input_shape=(224, 224, 3))
-    x = base_model.output
-    flat = Flatten()(x)
-    dense1 = Dense(4608, activation='relu')(flat)
-    drop_out = Dropout(0.2)(dense1)
-    dense2 = Dense(1152, activation='relu')(drop_out)
-    output = Dense(2, activation='softmax')(dense2)
-
-    model_03 = Model(inputs=base_model.input, outputs=output)
-
-    if os.path.exists('vgg_unfrozen.h5'):
-        model_03.load_weights('vgg_unfrozen.h5')
-        print("Pneumonia model loaded successfully")
-    else:
-        print("Warning: vgg_unfrozen.h5 not found. Pneumonia detection may not work.")
+# PNEUMONIA_WEIGHTS selects a compressed variant produced by compress_model.py
+# (defaults mirror pneumonia_model.WEIGHTS_PATH / SCREENING_WEIGHTS_PATH, which import TensorFlow)
+PNEUMONIA_WEIGHTS = os.environ.get('PNEUMONIA_WEIGHTS', 'vgg_unfrozen.h5')
+
+# Cascade mode: a small screening CNN answers confident cases, the rest go to the full model
+# (PNEUMONIA_CASCADE=1, PNEUMONIA_CASCADE_THRESHOLD, PNEUMONIA_SCREENING_WEIGHTS)
+PNEUMONIA_CASCADE = os.environ.get('PNEUMONIA_CASCADE', '').lower() in ('1', 'true', 'yes')
+PNEUMONIA_SCREENING_WEIGHTS = os.environ.get('PNEUMONIA_SCREENING_WEIGHTS', 'screening_cnn.weights.h5')
+
+# Bulk scoring: parallel decode workers, forward-pass batch size and request size limits
+# (file count, and total uncompressed bytes of all files and archive members)
+BULK_DECODE_WORKERS = int(os.environ.get('PNEUMONIA_BULK_DECODE_WORKERS', os.cpu_count() or 4))
+BULK_BATCH_SIZE = int(os.environ.get('PNEUMONIA_BULK_BATCH_SIZE', 64))
+BULK_MAX_FILES = int(os.environ.get('PNEUMONIA_BULK_MAX_FILES', 500))
+BULK_MAX_BYTES = int(os.environ.get('PNEUMONIA_BULK_MAX_BYTES', 1024 * 1024 * 1024))
+# Decodes in flight per bulk request; bounds the decoded tensors held at once (~600 KB each)
+BULK_DECODE_WINDOW = int(os.environ.get('PNEUMONIA_BULK_DECODE_WINDOW', 2 * BULK_DECODE_WORKERS))
+# A partial batch is scored once no decode has finished for this long
+BULK_FLUSH_WAIT = float(os.environ.get('PNEUMONIA_BULK_FLUSH_MS', 20)) / 1000.0
+bulk_decode_pool = ThreadPoolExecutor(max_workers=BULK_DECODE_WORKERS, thread_name_prefix='pneumonia-decode')
+
+
+def predict_pneumonia_batch(service, batch):
+    """
+    Classify an (N, 224, 224, 3) batch with a loaded pneumonia service
 
-except Exception as e:
-    print(f"Warning: Could not load pneumonia model: {e}")
-    model_03 = None
+    Returns:
+        (probabilities, stages) - stages says which cascade stage answered each image
+    """
+    if service.cascade is not None:
+        return service.cascade.predict(batch)
+    return service.backend.predict(batch), np.full(len(batch), STAGE_FULL)
+
+
+def score_pneumonia_batch(batch, service):
+    """Scheduler entry point: (probabilities, stage) per image, on the service the requests were accepted for"""
+    probs, stages = predict_pneumonia_batch(service, batch)
+    return list(zip(probs, stages))
+
+
+# Concurrent requests are grouped into one forward pass
+# (tune with PNEUMONIA_MAX_BATCH_SIZE / PNEUMONIA_MAX_WAIT_MS)
+pneumonia_scheduler = scheduler_from_env(score_pneumonia_batch)
+
+
+def load_pneumonia_service(version=None):
+    """
+    Build the pneumonia serving stack: model, inference backend, optional
+    cascade and the prediction cache, warmed up for every served batch size
+
+    Args:
+        version: Weights hash computed by the registry, reused to version the cache
+    """
+    # TensorFlow is only imported once a pneumonia request needs it
+    from pneumonia_model import build_screening_model, load_pneumonia_model
+
+    # A current TFLite / ONNX conversion is served from its file alone; building
+    # the Keras model would hold a private copy of the full VGG19 weights
+    model = None
+    if not serves_from_file(backend_name_from_env(), PNEUMONIA_WEIGHTS):
+        model = load_pneumonia_model(PNEUMONIA_WEIGHTS)
+    # Keras, TFLite (dynamic / int8) or ONNX Runtime, chosen by PNEUMONIA_BACKEND
+    backend = backend_from_env(model, PNEUMONIA_WEIGHTS)
+
+    cascade = None
+    screening_backend = None
+    if PNEUMONIA_CASCADE:
+        try:
+            screening_model = build_screening_model()
+            screening_model.load_weights(PNEUMONIA_SCREENING_WEIGHTS)
+            screening_backend = KerasBackend(screening_model)
+            cascade = CascadeClassifier(
+                screening_backend.predict,
+                backend.predict,
+                threshold=float(os.environ.get('PNEUMONIA_CASCADE_THRESHOLD', 0.95))
+            )
+            print(f"✓ Pneumonia cascade enabled ({PNEUMONIA_SCREENING_WEIGHTS}, threshold {cascade.threshold})")
+        except Exception as e:
+            print(f"Warning: Could not enable pneumonia cascade: {e}")
+
+    # Trace/compile the forward pass for every batch size we will serve before taking traffic
+    if os.environ.get('PNEUMONIA_WARMUP', '1').lower() in ('1', 'true', 'yes'):
+        try:
+            warmup_sizes = bucket_sizes(max(pneumonia_scheduler.max_batch_size, BULK_BATCH_SIZE))
+            backend.warmup(warmup_sizes)
+            if screening_backend is not None:
+                screening_backend.warmup(warmup_sizes)
+            print(f"✓ Pneumonia model warmed up for batch sizes {warmup_sizes}")
+        except Exception as e:
+            print(f"Warning: Pneumonia model warmup failed: {e}")
+
+    # Results are cached by image content hash + weights version
+    # (PNEUMONIA_CACHE_SIZE=0 disables, PNEUMONIA_CACHE_DIR enables the persistent tier)
+    cache = None
+    if int(os.environ.get('PNEUMONIA_CACHE_SIZE', 1024)) > 0:
+        cache = PredictionCache(
+            PNEUMONIA_WEIGHTS,
+            tag=backend.name + (
+                f":cascade:{os.path.basename(PNEUMONIA_SCREENING_WEIGHTS)}@{cascade.threshold}" if cascade else ""
+            ),
+            max_entries=int(os.environ.get('PNEUMONIA_CACHE_SIZE', 1024)),
+            disk_dir=os.environ.get('PNEUMONIA_CACHE_DIR') or None,
+            # New weights arrive as a new service (and cache) through the registry
+            check_interval=None,
+            weights_version=version
+        )
+
+    return SimpleNamespace(model=model, backend=backend, cascade=cascade,
+                           screening_backend=screening_backend, cache=cache)
+
+
+def pneumonia_canary(service):
+    """Reload check: the new stack turns canary images into valid probabilities"""
+    canary_dir = os.environ.get('PNEUMONIA_CANARY_DIR')
+    if canary_dir:
+        images = load_reference_images(canary_dir, limit=8)
+    else:
+        images = np.stack([np.full((224, 224, 3), level, dtype=np.float32) for level in (0.0, 0.5, 1.0)])
+    probs, _ = predict_pneumonia_batch(service, images)
+    probs = np.asarray(probs)
+    if probs.shape != (len(images), 2) or not np.all(np.isfinite(probs)):
+        raise ValueError(f"unexpected output shape {probs.shape} or non-finite values")
+    if not np.allclose(probs.sum(axis=1), 1.0, atol=1e-3):
+        raise ValueError("probabilities do not sum to 1")
+
+
+registry.register(ModelSpec(
+    'pneumonia', load_pneumonia_service,
+    artifacts=[PNEUMONIA_WEIGHTS],
+    description="VGG19 chest X-ray pneumonia classifier",
+    canary=pneumonia_canary,
+    # Older versions' disk cache entries are dropped only once this version is the one served
+    on_served=lambda service: service.cache.prune_disk() if service.cache is not None else None,
+    # The registry's hash of the weights also versions the prediction cache
+    pass_version=True
+))
+
+# Uploads are decoded in memory; set PNEUMONIA_AUDIT_UPLOADS=1 to also keep them on disk
+AUDIT_UPLOADS = os.environ.get('PNEUMONIA_AUDIT_UPLOADS', '').lower() in ('1', 'true', 'yes')
 
 # -------------------------------
 # Flask App
@@ -62,84 +222,162 @@ CORS(app, resources={
 # Load Trained ML Models
 # -------------------------------
 
-heart_model = None
-heart_scaler = None
-breast_model = None
-breast_scaler = None
-pcod_model = None
-pcod_scaler = None
+# (model artifact, scaler artifact, description) per tabular model
+TABULAR_MODELS = {
+    'heart': ('models/heart_disease_model.pkl', 'models/heart_disease_scaler.pkl', "Heart disease risk (Accuracy: ~93%)"),
+    'breast': ('models/breast_cancer_model.pkl', 'models/breast_cancer_scaler.pkl', "Breast cancer malignancy (Accuracy: ~91%)"),
+    'pcod': ('models/pcod_model.pkl', 'models/pcod_scaler.pkl', "PCOD risk (Accuracy: ~99%)"),
+}
+
+# Rows every reloaded tabular model must score before it is swapped in
+TABULAR_CANARY_ROWS = {
+    'heart': [
+        {"age": 35, "gender": "female", "bloodPressure": 115, "cholesterol": 170, "diabetes": "no"},
+        {"age": 50, "gender": "male", "bloodPressure": 130, "cholesterol": 205, "diabetes": "no"},
+        {"age": 68, "gender": "male", "bloodPressure": 150, "cholesterol": 250, "diabetes": "yes"},
+    ],
+    'breast': [
+        {"features": [12.0, 17.0, 78.0, 450.0, 0.09, 0.08, 0.05, 0.03, 0.17, 0.06]},
+        {"features": [20.0, 25.0, 130.0, 1250.0, 0.11, 0.18, 0.20, 0.10, 0.20, 0.065]},
+    ],
+    'pcod': [
+        {"age": 25, "bmi": 21, "cycleLength": 28, "periodFlow": "normal"},
+        {"age": 30, "bmi": 32, "cycleLength": 40, "periodFlow": "heavy"},
+    ],
+}
+
+# Class labels the endpoints map to risk levels / malignancy
+TABULAR_CLASSES = {
+    'heart': list(range(len(HEART_RISK_LEVELS))),
+    'breast': [0, 1],
+    'pcod': list(range(len(PCOD_RISK_LEVELS))),
+}
+
+
+def tabular_canary(name):
+    """Reload check: the new engine scores the canary rows into the labels the API maps"""
+    encoder, _ = TABULAR_SPECS[name]
+
+    def check(engine):
+        classes = [int(c) for c in engine.classes_]
+        if classes != TABULAR_CLASSES[name]:
+            raise ValueError(f"classes {classes} do not match {TABULAR_CLASSES[name]}")
+        features, _ = encoder(pd.DataFrame.from_records(TABULAR_CANARY_ROWS[name]))
+        probabilities = engine.predict_proba(features)
+        if probabilities.shape != (len(features), len(engine.classes_)) or not np.all(np.isfinite(probabilities)):
+            raise ValueError(f"unexpected output shape {probabilities.shape} or non-finite values")
+        if not np.allclose(probabilities.sum(axis=1), 1.0):
+            raise ValueError("probabilities do not sum to 1")
+    return check
+
+
+def tabular_loader(model_path, scaler_path):
+    """
+    Loader for a scaler + ensemble pair; compiled tree arrays unless TABULAR_ENGINE=sklearn
 
-try:
-    if os.path.exists('models/heart_disease_model.pkl'):
-        heart_model = joblib.load('models/heart_disease_model.pkl')
-        heart_scaler = joblib.load('models/heart_disease_scaler.pkl')
-        print("✓ Heart Disease model loaded (Accuracy: ~93%)")
-    else:
-        print("Warning: Heart Disease model not found")
-except Exception as e:
-    print(f"Warning: Could not load Heart Disease model: {e}")
+    Compiled arrays are memory-mapped (MODEL_MMAP=0 to disable), so every worker
+    shares one page-cache copy of the node arrays.
+    """
+    def load():
+        return load_engine_from_env(model_path, scaler_path)
+    return load
 
-try:
-    if os.path.exists('models/breast_cancer_model.pkl'):
-        breast_model = joblib.load('models/breast_cancer_model.pkl')
-        breast_scaler = joblib.load('models/breast_cancer_scaler.pkl')
-        print("✓ Breast Cancer model loaded (Accuracy: ~91%)")
-    else:
-        print("Warning: Breast Cancer model not found")
-except Exception as e:
-    print(f"Warning: Could not load Breast Cancer model: {e}")
 
-try:
-    if os.path.exists('models/pcod_model.pkl'):
-        pcod_model = joblib.load('models/pcod_model.pkl')
-        pcod_scaler = joblib.load('models/pcod_scaler.pkl')
-        print("✓ PCOD model loaded (Accuracy: ~99%)")
-    else:
-        print("Warning: PCOD model not found")
-except Exception as e:
-    print(f"Warning: Could not load PCOD model: {e}")
+# Distilled students from distill_models.py (same pickle + scaler format), served for ?variant=student
+TABULAR_STUDENTS = {
+    'heart': 'models/heart_disease_student.pkl',
+    'breast': 'models/breast_cancer_student.pkl',
+    'pcod': 'models/pcod_student.pkl',
+}
+
+# Opt-in memoization of heart / PCOD probabilities on quantized inputs (TABULAR_CACHE_SIZE)
+risk_caches = risk_caches_from_env()
+
+
+def tabular_proba(name, engine, version, features):
+    """Probabilities for one encoded row, through the risk cache when one is enabled for the model"""
+    cache = risk_caches.get(name)
+    if cache is None:
+        return engine.predict_proba(features)[0]
+    return cache.predict_proba(features[0], version, engine.predict_proba)
+
+
+for name, (model_path, scaler_path, description) in TABULAR_MODELS.items():
+    registry.register(ModelSpec(
+        name, tabular_loader(model_path, scaler_path),
+        artifacts=[model_path, scaler_path], description=description,
+        canary=tabular_canary(name)
+    ))
+    registry.register(ModelSpec(
+        f'{name}-student', tabular_loader(TABULAR_STUDENTS[name], scaler_path),
+        artifacts=[TABULAR_STUDENTS[name], scaler_path], description=f"Distilled student of the {name} ensemble",
+        canary=tabular_canary(name)
+    ))
+
+
+def tabular_variant(name):
+    """
+    Engine for a tabular request: the distilled student when the request asks
+    for ?variant=student and one is available, the full ensemble otherwise
+
+    Returns:
+        (registry name, engine, version, variant)
+    """
+    if request.args.get('variant') == 'student':
+        engine, version = loaded_model(f'{name}-student')
+        if engine is not None:
+            return f'{name}-student', engine, version, 'student'
+    engine, version = loaded_model(name)
+    return name, engine, version, 'ensemble'
 
 # -------------------------------
 # Load Desi Remedies Dataset & Initialize Semantic Search
 # -------------------------------
 
+DESI_REMEDIES_PATH = 'desi_remedies_dataset.json'
 desi_remedies_data = []
-semantic_search = None
+# Remedies added through the API are appended here and merged into the dataset file by compaction
+remedy_log = get_remedy_log()
+# Keeps desi_remedies_data in the same order as the log and the semantic index
+remedies_lock = threading.Lock()
 
 try:
-    with open('desi_remedies_dataset.json', 'r', encoding='utf-8') as f:
+    with open(DESI_REMEDIES_PATH, 'r', encoding='utf-8') as f:
         desi_remedies_data = json.load(f)
+    remedy_log.replay(desi_remedies_data)
     print(f"✓ Desi Remedies dataset loaded ({len(desi_remedies_data)} entries)")
 except Exception as e:
     print(f"Warning: Could not load Desi Remedies dataset: {e}")
 
-# Initialize semantic search engine
-try:
+
+def load_semantic_search():
+    """Initialize the semantic search engine, reusing the saved index when its manifest matches"""
     print("Initializing semantic search engine...")
     from semantic_search import SemanticRemedySearch
+    # Loads the saved index, or encodes only the remedies it is missing
     semantic_search = SemanticRemedySearch()
-    # Try to load existing index first
-    index_loaded = semantic_search._load_index()
     
-    # Check if index needs to be rebuilt (dataset size changed)
-    if index_loaded:
-        if semantic_search.index and semantic_search.index.ntotal != len(desi_remedies_data):
-            print(f"Dataset size changed ({len(desi_remedies_data)} entries vs {semantic_search.index.ntotal} in index). Rebuilding index...")
-            semantic_search.update_dataset(desi_remedies_data)
-        else:
-            print(f"✓ Loaded existing index with {semantic_search.index.ntotal if semantic_search.index else 0} entries")
-    else:
-        # If no index exists, build it
-        print("Building semantic index (this may take a few minutes on first run)...")
-        semantic_search._build_index()
+    # Remedies added through the API since the engine read the dataset file
+    if semantic_search.remedies_data != desi_remedies_data:
+        print(f"Dataset changed ({len(desi_remedies_data)} entries vs {len(semantic_search.remedies_data)} indexed). Updating index...")
+        semantic_search.update_dataset(list(desi_remedies_data))
+        semantic_search.encoded_on_load += semantic_search.last_encoded
     
-    print(f"✓ Semantic search engine ready (Model: {semantic_search.model_name}, {len(desi_remedies_data)} remedies indexed)")
-except Exception as e:
-    print(f"Warning: Could not initialize semantic search: {e}")
-    import traceback
-    traceback.print_exc()
-    print("Falling back to keyword-based search")
-    semantic_search = None
+    print(f"✓ Semantic search engine ready (Model: {semantic_search.model_name}, {len(desi_remedies_data)} remedies indexed, "
+          f"{semantic_search.encoded_on_load} encoded)")
+    return semantic_search
+
+
+registry.register(ModelSpec(
+    'remedies', load_semantic_search,
+    description="Sentence-transformer + FAISS remedy search (keyword matching when unavailable)",
+    canary=lambda engine: isinstance(engine.search("headache", top_k=1, threshold=0.0), list)
+))
+
+
+def get_semantic_search():
+    """Semantic search engine, or None to fall back to keyword-based search"""
+    return loaded_model('remedies')[0]
 
 # Emergency keywords that require immediate medical attention
 EMERGENCY_KEYWORDS = [
@@ -181,7 +419,8 @@ def find_best_remedy(query, use_semantic=True):
     Uses semantic search if available, falls back to keyword matching
     """
     # Use semantic search if available
-    if use_semantic and semantic_search is not None:
+    semantic_search = get_semantic_search() if use_semantic else None
+    if semantic_search is not None:
         try:
             results = semantic_search.search(query, top_k=1, threshold=0.3)
             if results:
@@ -215,6 +454,14 @@ def find_best_remedy(query, use_semantic=True):
     
     return None, 0
 
+preload_from_env(registry)
+
+# Retrained artifacts are picked up without a restart (MODEL_WATCH_INTERVAL=0 disables polling)
+artifact_watcher = watcher_from_env(registry)
+
+# Admin endpoints require this token in X-Admin-Token when set
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
 print("AI/ML Backend Server Started. Visit http://127.0.0.1:5001/")
 
 
@@ -222,25 +469,47 @@ def get_class_name(class_no):
     return "Normal" if class_no == 0 else "Person acquired Pneumonia"
 
 
-def get_result(img_path):
-    if model_03 is None:
-        return None, 0.0
+def get_result(image_bytes):
+    """
+    Returns (prediction, confidence, stage, model version); stage is
+    'screening', 'full' or 'cache'
+    """
+    service, version = loaded_model('pneumonia')
+    if service is None:
+        return None, 0.0, None, None
+
+    prediction_cache = service.cache
+    cache_key = None
+    if prediction_cache is not None:
+        cache_key = PredictionCache.key_for(image_bytes)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return cached[0], cached[1], 'cache', version
+
+    input_img = decode_to_tensor(image_bytes)
+    if input_img is None:
+        return None, 0.0, None, None
+
+    # Batched only with requests for the same service, so a hot reload while
+    # this request is queued does not move it to the new version
+    result, stage = pneumonia_scheduler.predict(input_img, service)
+    prediction = int(np.argmax(result))
+    confidence = float(np.max(result) * 100)
 
-    image = cv2.imread(img_path)
-    if image is None:
-        return None, 0.0
+    if cache_key is not None:
+        prediction_cache.put(cache_key, prediction, confidence)
 
-    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    image = Image.fromarray(image)
-    image = image.resize((224, 224))
-    image = np.array(image) / 255.0
-    input_img = np.expand_dims(image, axis=0)
+    return prediction, confidence, STAGE_NAMES[int(stage)], version
 
-    result = model_03.predict(input_img, verbose=0)
-    prediction = np.argmax(result)
-    confidence = float(np.max(result) * 100)
 
-    return prediction, confidence
+def save_audit_upload(filename, image_bytes):
+    """Keep a copy of the upload in uploads/ when PNEUMONIA_AUDIT_UPLOADS is enabled"""
+    uploads_dir = os.path.join(os.path.dirname(__file__), 'uploads')
+    os.makedirs(uploads_dir, exist_ok=True)
+
+    file_path = os.path.join(uploads_dir, secure_filename(filename))
+    with open(file_path, 'wb') as out:
+        out.write(image_bytes)
 
 
 # -------------------------------
@@ -256,13 +525,11 @@ def pneumonia_predict():
         if f.filename == '':
             return jsonify({"error": "No file selected"}), 400
 
-        uploads_dir = os.path.join(os.path.dirname(__file__), 'uploads')
-        os.makedirs(uploads_dir, exist_ok=True)
+        image_bytes = f.read()
+        if AUDIT_UPLOADS:
+            save_audit_upload(f.filename, image_bytes)
 
-        file_path = os.path.join(uploads_dir, secure_filename(f.filename))
-        f.save(file_path)
-
-        result, confidence = get_result(file_path)
+        result, confidence, stage, version = get_result(image_bytes)
 
         if result is None:
             return jsonify({"error": "Invalid image or model not loaded"}), 400
@@ -271,12 +538,194 @@ def pneumonia_predict():
             "prediction": get_class_name(result),
             "isNormal": result == 0,
             "confidence": round(confidence, 2),
+            "stage": stage,
+            "modelVersion": version,
             "timestamp": datetime.now().isoformat()
         })
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+def collect_bulk_uploads():
+    """
+    Gather (filename, bytes) pairs from a bulk request
+
+    Accepts any number of 'files' parts and/or zip archives in 'archive' parts.
+    Archive members are counted and sized from the zip directory before any
+    of them is decompressed (zipfile never returns more than the size the
+    directory declares), so an oversized request is rejected up front.
+
+    Raises:
+        ValueError: More than BULK_MAX_FILES files or BULK_MAX_BYTES uncompressed bytes
+        zipfile.BadZipFile: An archive is not a valid zip file
+    """
+    files = [f for f in request.files.getlist('files') if f.filename]
+
+    with contextlib.ExitStack() as stack:
+        archives = []
+        for archive in request.files.getlist('archive'):
+            zf = stack.enter_context(zipfile.ZipFile(io.BytesIO(archive.read())))
+            members = [info for info in zf.infolist()
+                       if not (info.is_dir() or info.filename.startswith('__MACOSX/')
+                               or os.path.basename(info.filename).startswith('.'))]
+            archives.append((zf, members))
+
+        count = len(files) + sum(len(members) for _, members in archives)
+        if count > BULK_MAX_FILES:
+            raise ValueError(f"Too many files (limit is {BULK_MAX_FILES})")
+        total = sum(info.file_size for _, members in archives for info in members)
+        if total > BULK_MAX_BYTES:
+            raise ValueError(f"Archives expand to more than {BULK_MAX_BYTES} bytes")
+
+        uploads = [(f.filename, f.read()) for f in files]
+        total += sum(len(data) for _, data in uploads)
+        if total > BULK_MAX_BYTES:
+            raise ValueError(f"Uploads total more than {BULK_MAX_BYTES} bytes")
+
+        for zf, members in archives:
+            uploads.extend((info.filename, zf.read(info)) for info in members)
+
+    return uploads
+
+
+def score_bulk_uploads(service, uploads):
+    """
+    Decode uploads in parallel and score them in large batches
+
+    Yields one result dict per upload as soon as its batch finishes; decode
+    failures are yielded immediately without affecting the other images.
+    At most BULK_DECODE_WINDOW decodes are in flight, and a partial batch is
+    scored once no decode has finished for BULK_FLUSH_WAIT, so memory stays
+    bounded and slow or small uploads stream results early.
+    """
+    prediction_cache = service.cache
+
+    def result_line(index, name, prediction, confidence, stage):
+        return {
+            "index": index,
+            "filename": name,
+            "prediction": get_class_name(prediction),
+            "isNormal": prediction == 0,
+            "confidence": round(confidence, 2),
+            "stage": stage
+        }
+
+    pending = []
+
+    def flush():
+        batch = np.stack([tensor for _, _, _, tensor in pending])
+        try:
+            results, stages = predict_pneumonia_batch(service, batch)
+        except Exception as e:
+            for index, name, _, _ in pending:
+                yield {"index": index, "filename": name, "error": f"Inference failed: {e}"}
+        else:
+            for (index, name, key, _), result, stage in zip(pending, results, stages):
+                prediction = int(np.argmax(result))
+                confidence = float(np.max(result) * 100)
+                if key is not None:
+                    prediction_cache.put(key, prediction, confidence)
+                yield result_line(index, name, prediction, confidence, STAGE_NAMES[int(stage)])
+        pending.clear()
+
+    in_flight = {}
+    remaining = iter(enumerate(uploads))
+    exhausted = False
+    while True:
+        # Top up the decode window; cache hits are answered without decoding
+        while not exhausted and len(in_flight) < max(1, BULK_DECODE_WINDOW):
+            upload = next(remaining, None)
+            if upload is None:
+                exhausted = True
+                break
+            index, (name, data) = upload
+            key = PredictionCache.key_for(data) if prediction_cache is not None else None
+            cached = prediction_cache.get(key) if key is not None else None
+            if cached is not None:
+                yield result_line(index, name, *cached, 'cache')
+                continue
+            in_flight[bulk_decode_pool.submit(decode_to_tensor, data)] = (index, name, key)
+        if not in_flight:
+            break
+
+        done, _ = wait(in_flight, timeout=BULK_FLUSH_WAIT if pending else None, return_when=FIRST_COMPLETED)
+        if not done:
+            # Decoding stalled: score what is ready instead of holding it back
+            if pending:
+                yield from flush()
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            # Dropped from in_flight here, so the tensor is only referenced by pending
+            index, name, key = in_flight.pop(future)
+            try:
+                tensor = future.result()
+                error = "Invalid image"
+            except Exception as e:
+                tensor = None
+                error = f"Could not decode image: {e}"
+
+            if tensor is None:
+                yield {"index": index, "filename": name, "error": error}
+                continue
+
+            pending.append((index, name, key, tensor))
+            if len(pending) >= BULK_BATCH_SIZE:
+                yield from flush()
+
+    if pending:
+        yield from flush()
+
+
+@app.route('/pneumoniapredict/batch', methods=['POST'])
+def pneumonia_predict_batch():
+    """Score many X-rays in one request, streaming one NDJSON line per image"""
+    try:
+        service, version = loaded_model('pneumonia')
+        if service is None:
+            return jsonify({"error": "Pneumonia model not loaded"}), 500
+
+        try:
+            uploads = collect_bulk_uploads()
+        except zipfile.BadZipFile:
+            return jsonify({"error": "Archive is not a valid zip file"}), 400
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if not uploads:
+            return jsonify({"error": "No files uploaded"}), 400
+
+        if AUDIT_UPLOADS:
+            for name, data in uploads:
+                save_audit_upload(os.path.basename(name), data)
+
+        def generate():
+            for line in score_bulk_uploads(service, uploads):
+                line["modelVersion"] = version
+                line["timestamp"] = datetime.now().isoformat()
+                yield json.dumps(line) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/pneumoniapredict/stats', methods=['GET'])
+def pneumonia_stats():
+    """Get scheduler queue depth, batch-size distribution and cascade stage shares"""
+    service = registry.peek('pneumonia')
+    if service is None:
+        return jsonify({"error": "Pneumonia model not loaded"}), 500
+
+    stats = pneumonia_scheduler.get_stats()
+    stats["backend"] = service.backend.name
+    if service.cascade is not None:
+        stats["cascade"] = service.cascade.get_stats()
+    stats["timestamp"] = datetime.now().isoformat()
+    return jsonify(stats), 200
+
 # -------------------------------
 # Heart Disease Prediction
 # -------------------------------
@@ -284,7 +733,8 @@ def pneumonia_predict():
 @app.route('/heartpredict', methods=['POST'])
 def heart_predict():
     try:
-        if heart_model is None or heart_scaler is None:
+        model_name, heart_engine, version, variant = tabular_variant('heart')
+        if heart_engine is None:
             return jsonify({"error": "Heart Disease model not loaded"}), 500
 
         data = request.get_json()
@@ -299,12 +749,10 @@ def heart_predict():
         # Prepare features: [age, gender, bp, cholesterol, diabetes]
         features = np.array([[age, gender, bp, cholesterol, diabetes]])
         
-        # Scale features
-        features_scaled = heart_scaler.transform(features)
-        
-        # Predict
-        prediction = heart_model.predict(features_scaled)[0]
-        probabilities = heart_model.predict_proba(features_scaled)[0]
+        # Scale and predict in one pass (memoized on quantized inputs when enabled);
+        # the label is the most probable class
+        probabilities = tabular_proba(model_name, heart_engine, version, features)
+        prediction = heart_engine.classes_[np.argmax(probabilities)]
         confidence = float(np.max(probabilities) * 100)
 
         # Map prediction to risk level
@@ -315,6 +763,8 @@ def heart_predict():
             "prediction": risk,
             "riskScore": int(prediction),
             "confidence": round(confidence, 2),
+            "modelVersion": version,
+            "modelVariant": variant,
             "timestamp": datetime.now().isoformat()
         })
 
@@ -329,7 +779,8 @@ def heart_predict():
 @app.route('/breastpredict', methods=['POST'])
 def breast_cancer_predict():
     try:
-        if breast_model is None or breast_scaler is None:
+        _, breast_engine, version, variant = tabular_variant('breast')
+        if breast_engine is None:
             return jsonify({"error": "Breast Cancer model not loaded"}), 500
 
         data = request.get_json()
@@ -341,18 +792,17 @@ def breast_cancer_predict():
         # Prepare features array
         features_array = np.array([features])
         
-        # Scale features
-        features_scaled = breast_scaler.transform(features_array)
-        
-        # Predict
-        prediction = breast_model.predict(features_scaled)[0]
-        probabilities = breast_model.predict_proba(features_scaled)[0]
+        # Scale and predict in one pass; the label is the most probable class
+        probabilities = breast_engine.predict_proba(features_array)[0]
+        prediction = breast_engine.classes_[np.argmax(probabilities)]
         confidence = float(np.max(probabilities) * 100)
 
         return jsonify({
             "prediction": int(prediction),
             "isMalignant": bool(prediction == 1),
             "confidence": round(confidence, 2),
+            "modelVersion": version,
+            "modelVariant": variant,
             "timestamp": datetime.now().isoformat()
         })
 
@@ -367,7 +817,8 @@ def breast_cancer_predict():
 @app.route('/pcodpredict', methods=['POST'])
 def pcod_predict():
     try:
-        if pcod_model is None or pcod_scaler is None:
+        model_name, pcod_engine, version, variant = tabular_variant('pcod')
+        if pcod_engine is None:
             return jsonify({"error": "PCOD model not loaded"}), 500
 
         data = request.get_json()
@@ -384,12 +835,10 @@ def pcod_predict():
         # Prepare features: [age, bmi, cycle_length, period_flow]
         features = np.array([[age, bmi, cycle_length, period_flow]])
         
-        # Scale features
-        features_scaled = pcod_scaler.transform(features)
-        
-        # Predict
-        prediction = pcod_model.predict(features_scaled)[0]
-        probabilities = pcod_model.predict_proba(features_scaled)[0]
+        # Scale and predict in one pass (memoized on quantized inputs when enabled);
+        # the label is the most probable class
+        probabilities = tabular_proba(model_name, pcod_engine, version, features)
+        prediction = pcod_engine.classes_[np.argmax(probabilities)]
         confidence = float(np.max(probabilities) * 100)
 
         # Map prediction to risk level
@@ -400,6 +849,8 @@ def pcod_predict():
             "prediction": level,
             "riskScore": int(prediction),
             "confidence": round(confidence, 2),
+            "modelVersion": version,
+            "modelVariant": variant,
             "timestamp": datetime.now().isoformat()
         })
 
@@ -407,6 +858,89 @@ def pcod_predict():
         return jsonify({"error": str(e)}), 500
 
 
+# -------------------------------
+# Batch Risk Prediction (heart / breast / pcod)
+# -------------------------------
+
+def read_batch_frames(spec):
+    """DataFrame chunks from a CSV upload ('file' part or text/csv body) or a JSON array"""
+    if 'file' in request.files:
+        upload = request.files['file']
+        return frames_from_csv(io.TextIOWrapper(upload.stream, encoding='utf-8'))
+    if request.mimetype == 'text/csv':
+        return frames_from_csv(io.StringIO(request.get_data(as_text=True)))
+
+    payload = request.get_json(silent=True)
+    if payload is None:
+        raise ValueError("Send a JSON array of rows or a CSV file")
+    return frames_from_json(payload, spec)
+
+
+def stream_batch_predictions(name, engine, version, variant='ensemble'):
+    """Score every row with one engine call per chunk and stream NDJSON results"""
+    encoder, formatter = TABULAR_SPECS[name]
+    frames = read_batch_frames(TABULAR_SPECS[name])
+
+    # Parse the first chunk eagerly so malformed input fails with a 400
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("No rows provided")
+
+    def generate():
+        timestamp = datetime.now().isoformat()
+        try:
+            for line in score_frames(itertools.chain([first], frames), encoder, formatter, engine.predict_proba, engine.classes_):
+                line["modelVersion"] = version
+                line["modelVariant"] = variant
+                line["timestamp"] = timestamp
+                yield json.dumps(line) + "\n"
+        except (ValueError, pd.errors.ParserError) as e:
+            # A later CSV chunk failed to parse after the 200 was sent; end the stream with the error
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/heartpredict/batch', methods=['POST'])
+def heart_predict_batch():
+    try:
+        _, heart_engine, version, variant = tabular_variant('heart')
+        if heart_engine is None:
+            return jsonify({"error": "Heart Disease model not loaded"}), 500
+        return stream_batch_predictions('heart', heart_engine, version, variant)
+    except (ValueError, pd.errors.ParserError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/breastpredict/batch', methods=['POST'])
+def breast_cancer_predict_batch():
+    try:
+        _, breast_engine, version, variant = tabular_variant('breast')
+        if breast_engine is None:
+            return jsonify({"error": "Breast Cancer model not loaded"}), 500
+        return stream_batch_predictions('breast', breast_engine, version, variant)
+    except (ValueError, pd.errors.ParserError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/pcodpredict/batch', methods=['POST'])
+def pcod_predict_batch():
+    try:
+        _, pcod_engine, version, variant = tabular_variant('pcod')
+        if pcod_engine is None:
+            return jsonify({"error": "PCOD model not loaded"}), 500
+        return stream_batch_predictions('pcod', pcod_engine, version, variant)
+    except (ValueError, pd.errors.ParserError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 # -------------------------------
 # Desi Remedies Chatbot
 # -------------------------------
@@ -452,7 +986,7 @@ def desi_remedy_chatbot():
                 "category": best_match.get('category', 'general'),
                 "confidence": round(score * 100, 2),
                 "timestamp": datetime.now().isoformat(),
-                "search_method": "semantic" if (use_semantic and semantic_search) else "keyword"
+                "search_method": "semantic" if (use_semantic and registry.is_loaded('remedies')) else "keyword"
             })
         else:
             # No match found - provide general response with safety
@@ -470,7 +1004,7 @@ def desi_remedy_chatbot():
                 "category": "general",
                 "confidence": 0,
                 "timestamp": datetime.now().isoformat(),
-                "search_method": "semantic" if (use_semantic and semantic_search) else "keyword"
+                "search_method": "semantic" if (use_semantic and registry.is_loaded('remedies')) else "keyword"
             })
     
     except Exception as e:
@@ -497,18 +1031,19 @@ def add_remedy():
             "intensity": data['intensity']
         }
         
-        # Add to dataset
-        desi_remedies_data.append(new_remedy)
-        
-        # Update semantic search index if available
-        if semantic_search:
-            success = semantic_search.add_remedy(new_remedy)
-            if not success:
-                return jsonify({"error": "Failed to update semantic index"}), 500
-        
-        # Save to file
-        with open('desi_remedies_dataset.json', 'w', encoding='utf-8') as f:
-            json.dump(desi_remedies_data, f, indent=2, ensure_ascii=False)
+        # Append to the remedy log: through the semantic index if it is loaded (logging the
+        # embedding too), directly otherwise (encoded when the index next loads)
+        semantic_search = registry.peek('remedies')
+        with remedies_lock:
+            if semantic_search:
+                if not semantic_search.add_remedy(new_remedy):
+                    return jsonify({"error": "Failed to update semantic index"}), 500
+            else:
+                remedy_log.append(len(desi_remedies_data), new_remedy)
+            desi_remedies_data.append(new_remedy)
+        if not semantic_search and remedy_log.should_compact():
+            remedy_log.compact_in_background(
+                lambda: remedy_log.compact_dataset(DESI_REMEDIES_PATH, desi_remedies_data))
         
         return jsonify({
             "message": "Remedy added successfully",
@@ -525,9 +1060,11 @@ def add_remedy():
 def get_remedy_stats():
     """Get statistics about the remedy dataset and search engine"""
     try:
+        semantic_search = get_semantic_search()
         stats = {
             "total_remedies": len(desi_remedies_data),
             "semantic_search_enabled": semantic_search is not None,
+            "log": remedy_log.get_stats(),
             "timestamp": datetime.now().isoformat()
         }
         
@@ -663,20 +1200,62 @@ def analyze_lab_report():
 
 @app.route('/health', methods=['GET'])
 def health_check():
+    # Servable = loaded, or loadable on first request
+    servable = lambda name: registry.state(name) in (STATE_LOADED, STATE_UNLOADED)
+    pneumonia = registry.peek('pneumonia')
     return jsonify({
         "status": "healthy",
         "service": "AI/ML Backend",
         "models": {
-            "pneumonia": model_03 is not None,
-            "heart_disease": heart_model is not None,
-            "breast_cancer": breast_model is not None,
-            "pcod": pcod_model is not None,
+            "pneumonia": servable('pneumonia'),
+            "heart_disease": servable('heart'),
+            "breast_cancer": servable('breast'),
+            "pcod": servable('pcod'),
             "desi_remedies": len(desi_remedies_data) > 0,
-            "semantic_search": semantic_search is not None
-        }
+            "semantic_search": servable('remedies')
+        },
+        "prediction_cache": pneumonia.cache.get_stats() if pneumonia is not None and pneumonia.cache is not None else None,
+        "risk_cache": {name: cache.get_stats() for name, cache in risk_caches.items()} or None
     })
 
 
+@app.route('/models', methods=['GET'])
+def list_models():
+    """Per-model state, version, load time and resident memory"""
+    stats = registry.get_stats()
+    stats["timestamp"] = datetime.now().isoformat()
+    return jsonify(stats), 200
+
+
+@app.route('/models/<name>/reload', methods=['POST'])
+def reload_model(name):
+    """
+    Load new artifacts in the background, canary-check them and swap them in
+
+    Query params: force=1 reloads even if the artifacts are unchanged,
+    wait=1 blocks until the reload finishes and returns its outcome.
+    """
+    if ADMIN_TOKEN and request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({"error": "Unauthorized"}), 401
+    if name not in registry.names():
+        return jsonify({"error": f"Unknown model: {name}"}), 404
+
+    force = request.args.get('force', '').lower() in ('1', 'true', 'yes')
+    if request.args.get('wait', '').lower() in ('1', 'true', 'yes'):
+        result = registry.reload(name, force=force)
+        result["model"] = name
+        return jsonify(result), 200 if result["status"] in ('swapped', 'unchanged', 'not_loaded') else 422
+
+    if not registry.reload_async(name, force=force):
+        return jsonify({"error": f"A reload of {name} is already running"}), 409
+    return jsonify({
+        "model": name,
+        "status": "started",
+        "version": registry.version(name),
+        "timestamp": datetime.now().isoformat()
+    }), 202
+
+
 # -------------------------------
 # Run Server
 # -------------------------------
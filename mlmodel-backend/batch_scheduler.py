@@ -0,0 +1,166 @@
+"""
+Dynamic Micro-Batching Scheduler
+Groups concurrent single-image inference requests into one forward pass
+
+Each request may carry a context, e.g. the model object it must run on; only
+requests with the same context (by identity) share a batch, and predict_fn
+receives that context, so a request queued before a model swap still runs
+on the model it was accepted for.
+"""
+
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+
+class BatchScheduler:
+    """Queues inference requests and runs them through the model in batches"""
+
+    def __init__(self, predict_fn: Callable[[np.ndarray, Any], Any],
+                 max_batch_size: int = 16, max_wait_ms: float = 10.0,
+                 name: str = 'batch-scheduler'):
+        """
+        Initialize the scheduler and start its worker thread
+
+        Args:
+            predict_fn: Function mapping an (N, ...) input batch and the batch's
+                context to N outputs
+            max_batch_size: Largest number of requests grouped into one forward pass
+            max_wait_ms: Longest time a request waits in the queue for its batch to fill
+            name: Name of the worker thread
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Tuning statistics
+        self._batch_sizes = Counter()
+        self._total_requests = 0
+        self._total_batches = 0
+        self._max_queue_depth = 0
+
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item: np.ndarray, context: Any = None) -> Future:
+        """
+        Queue a single input (without batch dimension) for inference
+
+        Args:
+            item: Model input for one sample
+            context: Passed to predict_fn; only batched with requests carrying the same object
+
+        Returns:
+            Future resolving to the model output row for this sample
+        """
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Batch scheduler is shut down")
+            self._queue.append((item, context, future, time.monotonic()))
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+            self._cond.notify()
+        return future
+
+    def predict(self, item: np.ndarray, context: Any = None, timeout: Optional[float] = None) -> Any:
+        """Queue a single input and block until its result is ready"""
+        return self.submit(item, context).result(timeout=timeout)
+
+    def _next_batch(self):
+        """Wait for work and collect up to max_batch_size requests"""
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return []
+
+            # The deadline runs from when the oldest request was queued, so time spent
+            # waiting behind a busy forward pass counts against max_wait
+            deadline = self._queue[0][3] + self.max_wait
+            while len(self._queue) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # The oldest request's context decides the batch; others keep their place in the queue
+            context = self._queue[0][1]
+            batch, rest = [], deque()
+            while self._queue and len(batch) < self.max_batch_size:
+                entry = self._queue.popleft()
+                (batch if entry[1] is context else rest).append(entry)
+            rest.extend(self._queue)
+            self._queue = rest
+            return batch
+
+    def _run(self):
+        """Worker loop: batch, predict, and hand each row back to its caller"""
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            # Drop requests whose callers already gave up
+            batch = [entry for entry in batch if entry[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                inputs = np.stack([entry[0] for entry in batch])
+                outputs = self.predict_fn(inputs, batch[0][1])
+            except Exception as e:
+                for entry in batch:
+                    entry[2].set_exception(e)
+                continue
+            finally:
+                with self._cond:
+                    self._batch_sizes[len(batch)] += 1
+                    self._total_batches += 1
+                    self._total_requests += len(batch)
+
+            for entry, output in zip(batch, outputs):
+                entry[2].set_result(output)
+
+    def shutdown(self):
+        """Stop accepting requests; queued requests are still processed"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+
+    def get_stats(self) -> Dict:
+        """Get queue depth and batch-size distribution for tuning"""
+        with self._cond:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_queue_depth,
+                "total_requests": self._total_requests,
+                "total_batches": self._total_batches,
+                "mean_batch_size": round(self._total_requests / self._total_batches, 2) if self._total_batches else 0.0,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())}
+            }
+
+
+def scheduler_from_env(predict_fn: Callable[[np.ndarray, Any], Any], prefix: str = 'PNEUMONIA') -> BatchScheduler:
+    """
+    Create a scheduler configured from environment variables
+
+    Reads <prefix>_MAX_BATCH_SIZE (default 16) and <prefix>_MAX_WAIT_MS (default 10).
+    """
+    return BatchScheduler(
+        predict_fn,
+        max_batch_size=int(os.environ.get(f'{prefix}_MAX_BATCH_SIZE', 16)),
+        max_wait_ms=float(os.environ.get(f'{prefix}_MAX_WAIT_MS', 10)),
+        name=f'{prefix.lower()}-batch-scheduler'
+    )
@@ -0,0 +1,179 @@
+"""
+Remedy Index Recall / Latency / Memory Benchmark
+Measures recall@k against an exact float32 flat scan, per-query latency and
+memory per vector of the flat, HNSW and IVF remedy index types, each storing
+vectors as float32, float16, sq8 or pq codes, at 10k, 100k and 1M entries
+
+Corpora of that size cannot be encoded here, so vectors are drawn from a
+mixture of Gaussian clusters on the unit sphere, which is how sentence
+embeddings of topical text are distributed. Cluster centres default to random
+directions; --centres uses saved embeddings (e.g. the remedy embeddings) as
+centres instead. Queries are fresh draws from the same mixture.
+
+Each index is built once per size with remedy_index.IndexConfig, exactly as
+the server builds it, and then searched at every efSearch (HNSW) or nprobe
+(IVF) value, since those can be changed without rebuilding. Bytes per
+vector is the serialized index size divided by the row count, so it includes
+HNSW links and IVF list ids on top of the codes.
+
+Usage:
+    python benchmark_ann.py --sizes 10000 100000 1000000 --k 10
+    python benchmark_ann.py --sizes 100000 --types hnsw --ef-search 16 64 256
+    python benchmark_ann.py --sizes 1000000 --types flat ivf --codecs float32 float16 sq8 pq
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from remedy_index import CODECS, INDEX_TYPES, IndexConfig, normalize
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_EF_SEARCH = [16, 32, 64, 128, 256]
+DEFAULT_NPROBE = [1, 4, 16, 64]
+
+# Rows generated at a time, so a 1M x 384 corpus never needs a float64 copy
+GENERATION_CHUNK = 100_000
+
+
+def make_centres(n_clusters: int, dim: int, rng: np.random.Generator,
+                 centres_path: Optional[str] = None) -> np.ndarray:
+    if centres_path:
+        centres = normalize(np.load(centres_path, mmap_mode='r'))
+        return centres[rng.choice(len(centres), min(n_clusters, len(centres)), replace=False)]
+    return normalize(rng.standard_normal((n_clusters, dim)))
+
+
+def sample_vectors(centres: np.ndarray, n: int, spread: float, rng: np.random.Generator) -> np.ndarray:
+    """n unit vectors scattered around randomly chosen centres"""
+    out = np.empty((n, centres.shape[1]), dtype=np.float32)
+    for start in range(0, n, GENERATION_CHUNK):
+        rows = min(GENERATION_CHUNK, n - start)
+        noise = rng.standard_normal((rows, centres.shape[1]), dtype=np.float32) * (spread / np.sqrt(centres.shape[1]))
+        out[start:start + rows] = normalize(centres[rng.integers(0, len(centres), rows)] + noise)
+    return out
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Share of the exact top-k neighbours that the index also returned"""
+    hits = sum(len(np.intersect1d(f[f >= 0], t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def measure(index, queries: np.ndarray, k: int, truth: Optional[np.ndarray]) -> Dict:
+    """Single-query latency percentiles and recall@k over the query set"""
+    latencies = []
+    found = np.empty((len(queries), k), dtype=np.int64)
+    index.search(queries[:1], k)  # warm-up
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, ids = index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        found[i] = ids[0]
+    return {
+        "recall": round(recall_at_k(found, truth), 4) if truth is not None else 1.0,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 4),
+        "found": found
+    }
+
+
+def index_bytes(index) -> int:
+    import faiss
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def run_size(n: int, args, rng: np.random.Generator) -> List[Dict]:
+    centres = make_centres(args.clusters, args.dim, rng, args.centres)
+    corpus = sample_vectors(centres, n, args.spread, rng)
+    queries = sample_vectors(centres, args.queries, args.spread, rng)
+
+    rows = []
+    truth = None
+    # The exact float32 scan is the ground truth, so it always runs first
+    combinations = [('flat', 'float32')] + [(kind, codec) for kind in dict.fromkeys(args.types)
+                                            for codec in dict.fromkeys(args.codecs)
+                                            if (kind, codec) != ('flat', 'float32')]
+    for kind, codec in combinations:
+        config = IndexConfig(kind, hnsw_m=args.hnsw_m, ef_construction=args.ef_construction, nlist=args.nlist,
+                             codec=codec, pq_m=args.pq_m)
+        start = time.perf_counter()
+        index = config.build(corpus)
+        build_seconds = time.perf_counter() - start
+        size = index_bytes(index)
+
+        sweep = {'hnsw': ('efSearch', args.ef_search), 'ivf': ('nprobe', args.nprobe)}.get(kind, (None, [None]))
+        for value in sweep[1]:
+            if kind == 'hnsw':
+                config.ef_search = value
+            elif kind == 'ivf':
+                config.nprobe = value
+            config.configure(index)
+            result = measure(index, queries, args.k, truth)
+            if truth is None:
+                truth = result['found']
+            if (kind, codec) != ('flat', 'float32') or ('flat' in args.types and 'float32' in args.codecs):
+                rows.append({
+                    "rows": n,
+                    "type": kind,
+                    "codec": config.codec_for(n),
+                    "params": config.describe(index),
+                    "param": f"{sweep[0]}={value}" if sweep[0] else "",
+                    "recall": result['recall'],
+                    "p50_ms": result['p50_ms'],
+                    "p95_ms": result['p95_ms'],
+                    "build_seconds": round(build_seconds, 2),
+                    "index_mb": round(size / 1e6, 1),
+                    "bytes_per_vector": round(size / n, 1)
+                })
+        del index
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k, latency and memory per vector of the remedy index types")
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--types', nargs='+', default=list(INDEX_TYPES), choices=list(INDEX_TYPES))
+    parser.add_argument('--codecs', nargs='+', default=['float32'], choices=list(CODECS),
+                        help="How each index stores vectors")
+    parser.add_argument('--pq-m', type=int, default=48, help="PQ sub-vectors (bytes per vector); must divide --dim")
+    parser.add_argument('--k', type=int, default=10, help="Neighbours per query (recall@k)")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--dim', type=int, default=384, help="Embedding size (all-MiniLM-L6-v2: 384)")
+    parser.add_argument('--clusters', type=int, default=1000, help="Topics in the synthetic corpus")
+    parser.add_argument('--spread', type=float, default=0.8, help="Noise around each cluster centre")
+    parser.add_argument('--centres', help=".npy embeddings to use as cluster centres")
+    parser.add_argument('--hnsw-m', type=int, default=32)
+    parser.add_argument('--ef-construction', type=int, default=200)
+    parser.add_argument('--ef-search', nargs='+', type=int, default=DEFAULT_EF_SEARCH)
+    parser.add_argument('--nlist', type=int, default=0, help="IVF lists (0 = about 4 * sqrt(rows))")
+    parser.add_argument('--nprobe', nargs='+', type=int, default=DEFAULT_NPROBE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    report = []
+    print("=" * 106)
+    print(f"{'rows':>9}  {'type':<6}{'codec':<9}{'param':<14}{f'recall@{args.k}':>10}{'p50':>10}{'p95':>10}"
+          f"{'build':>10}{'index':>10}{'B/vector':>10}")
+    print("-" * 106)
+    for n in args.sizes:
+        for row in run_size(n, args, rng):
+            report.append(row)
+            print(f"{row['rows']:>9,}  {row['type']:<6}{row['codec']:<9}{row['param']:<14}{row['recall']:>10.4f}"
+                  f"{row['p50_ms']:>8.3f}ms{row['p95_ms']:>8.3f}ms{row['build_seconds']:>9.1f}s"
+                  f"{row['index_mb']:>8.1f}MB{row['bytes_per_vector']:>10.0f}")
+    print("=" * 106)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Inference Backend Parity and Latency Report
+Compares TFLite / ONNX Runtime backends against the Keras pneumonia model
+
+Usage:
+    python benchmark_backends.py --images uploads --backends tflite-dynamic tflite-int8 onnx
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from inference_backends import BACKEND_NAMES, KerasBackend, compare_backends, create_backend, load_reference_images
+from pneumonia_model import WEIGHTS_PATH, load_pneumonia_model
+
+
+def make_timer(repeats: int, warmup: int = 2):
+    """Build a timer returning p50/p95/mean latency in milliseconds"""
+    def timer(fn):
+        for _ in range(warmup):
+            fn()
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000.0)
+        return {
+            "p50_ms": round(float(np.percentile(samples, 50)), 2),
+            "p95_ms": round(float(np.percentile(samples, 95)), 2),
+            "mean_ms": round(float(np.mean(samples)), 2)
+        }
+    return timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pneumonia inference backends against Keras")
+    parser.add_argument('--images', default='uploads', help="Directory of reference X-ray images")
+    parser.add_argument('--limit', type=int, default=32, help="Maximum number of reference images")
+    parser.add_argument('--weights', default=WEIGHTS_PATH, help="Keras weights file")
+    parser.add_argument('--backends', nargs='+', default=BACKEND_NAMES,
+                        choices=BACKEND_NAMES, help="Backends to compare")
+    parser.add_argument('--tolerance', type=float, default=0.02,
+                        help="Maximum absolute probability difference allowed vs Keras")
+    parser.add_argument('--repeats', type=int, default=20, help="Timed runs per measurement")
+    parser.add_argument('--threads', type=int, default=None, help="CPU threads for TFLite / ONNX Runtime")
+    parser.add_argument('--output', help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    model = load_pneumonia_model(args.weights)
+    images = load_reference_images(args.images, limit=args.limit)
+    print(f"Loaded {len(images)} reference images from {args.images}")
+
+    # Model.predict is the reference; the compiled Keras path is one of the candidates
+    reference = KerasBackend(model, compiled=False)
+    candidates = {'keras-predict': reference}
+    for name in args.backends:
+        candidates[name] = create_backend(name, model, args.weights, calibration_dir=args.images,
+                                          num_threads=args.threads)
+        candidates[name].warmup([1, len(images)])
+
+    report = compare_backends(reference, candidates, images, args.tolerance, make_timer(args.repeats))
+
+    print("\n" + "=" * 86)
+    print(f"{'Backend':<16}{'max|Δp|':>10}{'agree':>8}{'ok':>5}"
+          f"{'p50 x1':>11}{'p95 x1':>11}{'p50 xN':>11}{'img/s':>10}")
+    print("-" * 86)
+    for name, row in report.items():
+        throughput = row['batch_size'] / (row['latency_batch']['p50_ms'] / 1000.0)
+        print(f"{name:<16}{row['max_abs_diff']:>10.4f}{row['label_agreement'] * 100:>7.1f}%"
+              f"{'yes' if row['within_tolerance'] else 'NO':>5}"
+              f"{row['latency_single']['p50_ms']:>9.1f}ms{row['latency_single']['p95_ms']:>9.1f}ms"
+              f"{row['latency_batch']['p50_ms']:>9.1f}ms{throughput:>10.1f}")
+    print("=" * 86)
+
+    eligible = [name for name, row in report.items() if row['within_tolerance']]
+    fastest = min(eligible, key=lambda name: report[name]['latency_single']['p50_ms'])
+    print(f"\nFastest backend within tolerance ({args.tolerance}): {fastest}")
+    if fastest == 'keras-predict':
+        print("Set PNEUMONIA_BACKEND=keras PNEUMONIA_COMPILED=0 to serve it")
+    else:
+        print(f"Set PNEUMONIA_BACKEND={fastest} to serve it")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"tolerance": args.tolerance, "backends": report, "recommended": fastest}, f, indent=2)
+        print(f"✓ Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Image Decode Benchmark
+Compares full-resolution decoding with reduced-resolution decoding across image sizes
+
+Synthetic X-ray-like JPEGs (and DICOMs, if pydicom is installed) are generated
+at each size, then decoded to a 224x224 model tensor both ways.
+
+Usage:
+    python benchmark_decode.py --sizes 512 1024 2048 3000 4096
+"""
+
+import argparse
+import io
+import time
+
+import cv2
+import numpy as np
+
+from image_decode import decode_dicom, decode_image, decode_to_tensor, to_model_input
+
+
+def synthetic_xray(size: int, dtype=np.uint8) -> np.ndarray:
+    """Smooth grayscale image with noise, so JPEG sizes are realistic"""
+    rng = np.random.default_rng(size)
+    small = rng.random((16, 16)).astype(np.float32)
+    image = cv2.resize(small, (size, size), interpolation=cv2.INTER_CUBIC)
+    image += rng.normal(0, 0.05, image.shape).astype(np.float32)
+    peak = np.iinfo(dtype).max if dtype == np.uint8 else 4095
+    return (np.clip(image, 0, 1) * peak).astype(dtype)
+
+
+def encode_dicom(pixels: np.ndarray) -> bytes:
+    from pydicom.dataset import Dataset, FileMetaDataset
+    from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+    meta = FileMetaDataset()
+    meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    meta.MediaStorageSOPClassUID = '1.2.840.10008.5.1.4.1.1.1'
+    meta.MediaStorageSOPInstanceUID = generate_uid()
+
+    ds = Dataset()
+    ds.file_meta = meta
+    ds.Rows, ds.Columns = pixels.shape
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = 'MONOCHROME2'
+    ds.BitsAllocated, ds.BitsStored, ds.HighBit = 16, 12, 11
+    ds.PixelRepresentation = 0
+    ds.WindowCenter, ds.WindowWidth = 2048, 4096
+    ds.PixelData = pixels.tobytes()
+
+    buffer = io.BytesIO()
+    ds.save_as(buffer, enforce_file_format=True)
+    return buffer.getvalue()
+
+
+def decode_dicom_full(data: bytes) -> np.ndarray:
+    """Naive path: full-resolution float conversion and windowing, then resize"""
+    import pydicom
+    ds = pydicom.dcmread(io.BytesIO(data))
+    pixels = ds.pixel_array.astype(np.float64)
+    low = float(ds.WindowCenter) - float(ds.WindowWidth) / 2.0
+    gray = np.clip((pixels - low) / float(ds.WindowWidth), 0.0, 1.0)
+    small = cv2.resize(gray.astype(np.float32), (224, 224), interpolation=cv2.INTER_AREA)
+    return np.repeat(small[:, :, np.newaxis], 3, axis=2)
+
+
+def bench(fn, repeats: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full vs reduced-resolution image decoding")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[512, 1024, 2048, 3000, 4096])
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        import pydicom  # noqa: F401
+        with_dicom = True
+    except ImportError:
+        with_dicom = False
+        print("pydicom not installed; skipping DICOM rows")
+
+    print("=" * 92)
+    print(f"{'format':<8}{'size':>7}{'file KB':>10}{'full ms':>10}{'reduced ms':>12}{'speedup':>9}"
+          f"{'full MB':>10}{'reduced MB':>12}{'max|Δ|':>10}")
+    print("-" * 92)
+    for size in args.sizes:
+        gray = synthetic_xray(size)
+        data = cv2.imencode('.jpg', cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR), [cv2.IMWRITE_JPEG_QUALITY, 92])[1].tobytes()
+
+        full_decoded = decode_image(data, size=None)
+        reduced_decoded = decode_image(data)
+        full_ms = bench(lambda: to_model_input(decode_image(data, size=None)), args.repeats)
+        reduced_ms = bench(lambda: decode_to_tensor(data), args.repeats)
+        diff = np.max(np.abs(to_model_input(full_decoded) - decode_to_tensor(data)))
+        print(f"{'jpeg':<8}{size:>7}{len(data) / 1024:>10.0f}{full_ms:>10.2f}{reduced_ms:>12.2f}"
+              f"{full_ms / reduced_ms:>8.1f}x{full_decoded.nbytes / 1e6:>10.1f}{reduced_decoded.nbytes / 1e6:>12.2f}"
+              f"{diff:>10.4f}")
+
+        if with_dicom:
+            pixels = synthetic_xray(size, dtype=np.uint16)
+            dicom = encode_dicom(pixels)
+            full_ms = bench(lambda: decode_dicom_full(dicom), args.repeats)
+            reduced_ms = bench(lambda: decode_dicom(dicom), args.repeats)
+            diff = np.max(np.abs(decode_dicom_full(dicom) - decode_dicom(dicom)))
+            print(f"{'dicom':<8}{size:>7}{len(dicom) / 1024:>10.0f}{full_ms:>10.2f}{reduced_ms:>12.2f}"
+                  f"{full_ms / reduced_ms:>8.1f}x{pixels.size * 8 / 1e6:>10.1f}{pixels.nbytes / 1e6:>12.2f}"
+                  f"{diff:>10.4f}")
+    print("=" * 92)
+    print("full/reduced MB: largest intermediate array (decoded image, or float64 DICOM vs stored pixels)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+Per-Worker Memory Benchmark for Model Artifacts
+Starts N worker processes that each load the serving artifacts and reports
+load time and RSS / PSS / USS per worker at 1, 4 and 16 workers
+
+Modes:
+    mmap     Compiled node arrays, embeddings and FAISS index memory-mapped
+    read     The same files read into private memory (MODEL_MMAP=0)
+    pickle   Ensembles unpickled and compiled in every worker (previous behaviour)
+
+RSS counts every shared page in every process, so it barely moves with mmap.
+PSS divides each shared page between the processes mapping it, so the sum of
+PSS over workers is the memory the workers actually cost the machine.
+Workers are started with 'spawn', as independent servers would be, so pages
+are never shared through fork copy-on-write.
+
+Usage:
+    python benchmark_memory.py --workers 1 4 16 --artifacts heart breast pcod remedies
+    PNEUMONIA_BACKEND=tflite-dynamic python benchmark_memory.py --artifacts pneumonia
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+
+from benchmark_tabular import MODEL_FILES, sample_rows
+
+MODES = ['mmap', 'read', 'pickle']
+ARTIFACTS = list(MODEL_FILES) + ['remedies', 'pneumonia']
+
+REMEDIES_INDEX = 'models/remedies_index.faiss'
+REMEDIES_EMBEDDINGS = 'models/remedies_embeddings.npy'
+
+# Rows scored after loading (not timed) so the pages real requests touch are resident
+TOUCH_ROWS = 2000
+
+
+def memory_snapshot() -> Dict[str, float]:
+    """RSS, PSS and USS of this process in MB (PSS/USS need /proc/self/smaps_rollup)"""
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1]) / 1024.0
+    except OSError:
+        from model_registry import current_rss
+        return {"rss_mb": current_rss() / 1e6, "pss_mb": None, "uss_mb": None}
+    return {
+        "rss_mb": fields.get('Rss', 0.0),
+        "pss_mb": fields.get('Pss', 0.0),
+        "uss_mb": fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0)
+    }
+
+
+def load_tabular(name: str, mode: str):
+    from tree_ensemble import load_engine
+
+    model_path, scaler_path = MODEL_FILES[name]
+    if mode == 'pickle':
+        import joblib
+        from tree_ensemble import compile_model
+        return compile_model(joblib.load(model_path), joblib.load(scaler_path))
+    return load_engine(model_path, scaler_path, 'compiled', 'r' if mode == 'mmap' else None)
+
+
+def touch_tabular(engine) -> None:
+    # The scaler is folded into the engine; its parameters spread the rows
+    scaler = SimpleNamespace(mean_=engine.mean, scale_=engine.scale)
+    engine.predict_proba(sample_rows(scaler, TOUCH_ROWS))
+
+
+def load_remedies(mode: str):
+    import faiss
+
+    embeddings = np.load(REMEDIES_EMBEDDINGS, mmap_mode='r' if mode == 'mmap' else None)
+    index = None
+    if mode == 'mmap' and hasattr(faiss, 'IO_FLAG_MMAP'):
+        try:
+            index = faiss.read_index(REMEDIES_INDEX, faiss.IO_FLAG_MMAP | getattr(faiss, 'IO_FLAG_READ_ONLY', 0))
+        except RuntimeError:
+            pass
+    if index is None:
+        index = faiss.read_index(REMEDIES_INDEX)
+    return index, embeddings
+
+
+def touch_remedies(loaded) -> None:
+    index, embeddings = loaded
+    index.search(np.asarray(embeddings[:8], dtype=np.float32), 5)
+    float(np.sum(embeddings))
+
+
+def load_pneumonia(mode: str):
+    from inference_backends import backend_from_env, backend_name_from_env, serves_from_file
+    from pneumonia_model import WEIGHTS_PATH, load_pneumonia_model
+
+    weights = os.environ.get('PNEUMONIA_WEIGHTS', WEIGHTS_PATH)
+    model = None
+    if mode == 'pickle' or not serves_from_file(backend_name_from_env(), weights):
+        model = load_pneumonia_model(weights)
+    return backend_from_env(model, weights)
+
+
+def touch_pneumonia(backend) -> None:
+    backend.predict(np.zeros((1, 224, 224, 3), dtype=np.float32))
+
+
+def worker(artifacts: List[str], mode: str, barrier, results) -> None:
+    """Load artifacts, serve a first request from each, wait for every worker, then measure"""
+    baseline = memory_snapshot()
+    start = time.perf_counter()
+    loaded = []
+    for name in artifacts:
+        if name in MODEL_FILES:
+            loaded.append((load_tabular(name, mode), touch_tabular))
+        elif name == 'remedies':
+            loaded.append((load_remedies(mode), touch_remedies))
+        else:
+            loaded.append((load_pneumonia(mode), touch_pneumonia))
+    load_ms = (time.perf_counter() - start) * 1000.0
+    for obj, touch in loaded:
+        touch(obj)
+
+    # PSS depends on how many processes map a page, so measure with all alive
+    barrier.wait()
+    snapshot = memory_snapshot()
+    results.put({"load_ms": load_ms, "baseline": baseline, **snapshot})
+    barrier.wait()
+
+
+def run(artifacts: List[str], mode: str, workers: int) -> Dict:
+    ctx = mp.get_context('spawn')
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(artifacts, mode, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get(timeout=600) for _ in processes]
+    for process in processes:
+        process.join()
+
+    def mean(key):
+        values = [row[key] for row in rows if row[key] is not None]
+        return round(float(np.mean(values)), 1) if values else None
+
+    pss = [row['pss_mb'] for row in rows if row['pss_mb'] is not None]
+    # Memory attributable to the artifacts: growth over the interpreter + imports baseline
+    artifact_pss = [row['pss_mb'] - row['baseline']['pss_mb'] for row in rows
+                    if row['pss_mb'] is not None and row['baseline']['pss_mb'] is not None]
+    return {
+        "workers": workers,
+        "load_ms_p50": round(float(np.percentile([row['load_ms'] for row in rows], 50)), 1),
+        "load_ms_max": round(max(row['load_ms'] for row in rows), 1),
+        "rss_mb": mean('rss_mb'),
+        "pss_mb": mean('pss_mb'),
+        "uss_mb": mean('uss_mb'),
+        "total_pss_mb": round(sum(pss), 1) if pss else None,
+        "artifact_pss_mb": round(float(np.mean(artifact_pss)), 1) if artifact_pss else None
+    }
+
+
+def prepare(artifacts: List[str]) -> List[str]:
+    """Drop artifacts whose files are missing and write compiled arrays once, before workers start"""
+    from tree_ensemble import load_engine
+
+    ready = []
+    for name in artifacts:
+        if name in MODEL_FILES:
+            model_path, scaler_path = MODEL_FILES[name]
+            if not os.path.exists(model_path):
+                print(f"Warning: {model_path} not found; run train_models.py first")
+                continue
+            load_engine(model_path, scaler_path, 'compiled', 'r')
+        elif name == 'remedies':
+            try:
+                import faiss  # noqa: F401
+            except ImportError:
+                print("Warning: faiss is not installed; skipping remedies")
+                continue
+            if not (os.path.exists(REMEDIES_INDEX) and os.path.exists(REMEDIES_EMBEDDINGS)):
+                print(f"Warning: {REMEDIES_INDEX} or {REMEDIES_EMBEDDINGS} not found; skipping remedies")
+                continue
+        ready.append(name)
+    return ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-worker memory of loaded model artifacts")
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 4, 16])
+    parser.add_argument('--artifacts', nargs='+', default=list(MODEL_FILES) + ['remedies'], choices=ARTIFACTS)
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--output', help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    artifacts = prepare(args.artifacts)
+    if not artifacts:
+        print("Warning: No artifacts to load")
+        return
+    print(f"Artifacts: {', '.join(artifacts)}")
+
+    report = {"artifacts": artifacts, "modes": {}}
+    print("\n" + "=" * 92)
+    print(f"{'mode':<8}{'workers':>8}{'load p50':>11}{'load max':>11}{'RSS/wkr':>10}"
+          f"{'PSS/wkr':>10}{'USS/wkr':>10}{'artifact PSS':>14}{'total PSS':>11}")
+    print("-" * 92)
+    for mode in args.modes:
+        report["modes"][mode] = []
+        for workers in args.workers:
+            row = run(artifacts, mode, workers)
+            report["modes"][mode].append(row)
+            fmt = lambda v: f"{v:.1f}" if v is not None else "n/a"
+            print(f"{mode:<8}{workers:>8}{row['load_ms_p50']:>9.0f}ms{row['load_ms_max']:>9.0f}ms"
+                  f"{fmt(row['rss_mb']):>8}MB{fmt(row['pss_mb']):>8}MB{fmt(row['uss_mb']):>8}MB"
+                  f"{fmt(row['artifact_pss_mb']):>12}MB{fmt(row['total_pss_mb']):>9}MB")
+    print("=" * 92)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Remedy Search Cold-Start Benchmark
+Times how long a fresh process needs to bring up SemanticRemedySearch and
+how many remedies it encodes on the way
+
+Each scenario runs in a new interpreter inside a scratch directory holding a
+copy of the dataset, so nothing under models/ is touched:
+
+    full      No saved index: every remedy is encoded (what every start cost
+              before the manifest, plus a second full encode when the app
+              found the saved index out of date)
+    fresh     Saved index whose manifest matches: nothing is encoded
+    edited    --edits remedies changed and --edits new ones appended since
+              the index was saved: only those are encoded
+
+Usage:
+    python benchmark_remedies.py --runs 3 --edits 5
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+DATASET_PATH = 'desi_remedies_dataset.json'
+SCENARIOS = ['full', 'fresh', 'edited']
+
+
+def child() -> None:
+    """Bring up the engine in this process and print its timings as the last output line"""
+    start = time.perf_counter()
+    from semantic_search import SemanticRemedySearch
+    imported = time.perf_counter()
+    engine = SemanticRemedySearch()
+    ready = time.perf_counter()
+    engine.search("headache", top_k=1, threshold=0.0)
+    print(json.dumps({
+        "import_seconds": round(imported - start, 3),
+        "init_seconds": round(ready - imported, 3),
+        "first_search_ms": round((time.perf_counter() - ready) * 1000.0, 2),
+        "encoded": engine.encoded_on_load,
+        "remedies": len(engine.remedies_data)
+    }))
+
+
+def cold_start(workdir: str) -> Dict:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.dirname(os.path.abspath(__file__)),
+                                                       os.environ.get('PYTHONPATH', '')]))
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def edit_dataset(path: str, edits: int) -> None:
+    """Change the text of the first `edits` remedies and append as many new ones"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for entry in data[:edits]:
+        entry['remedy'] = f"{entry.get('remedy', '')} (revised)"
+    for i in range(edits):
+        data.append({"category": "benchmark", "query": f"benchmark query {i}",
+                     "remedy": f"benchmark remedy {i}", "intensity": "mild"})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def run(runs: int, edits: int) -> Dict[str, List[Dict]]:
+    results = {scenario: [] for scenario in SCENARIOS}
+    for _ in range(runs):
+        workdir = tempfile.mkdtemp(prefix='remedies-cold-')
+        try:
+            shutil.copyfile(DATASET_PATH, os.path.join(workdir, DATASET_PATH))
+            results['full'].append(cold_start(workdir))
+            results['fresh'].append(cold_start(workdir))
+            edit_dataset(os.path.join(workdir, DATASET_PATH), edits)
+            results['edited'].append(cold_start(workdir))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure remedy search cold start with and without a saved index")
+    parser.add_argument('--runs', type=int, default=3, help="Cold starts per scenario")
+    parser.add_argument('--edits', type=int, default=5, help="Remedies changed and added for the 'edited' scenario")
+    parser.add_argument('--output', help="Write the report as JSON to this path")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+    if not os.path.exists(DATASET_PATH):
+        raise SystemExit(f"{DATASET_PATH} not found; run from the backend directory")
+
+    results = run(args.runs, args.edits)
+    print("\n" + "=" * 64)
+    print(f"{'scenario':<10}{'remedies':>10}{'encoded':>9}{'init p50':>11}{'import':>10}{'1st search':>12}")
+    print("-" * 64)
+    for scenario, samples in results.items():
+        init = sorted(s['init_seconds'] for s in samples)[len(samples) // 2]
+        last = samples[-1]
+        print(f"{scenario:<10}{last['remedies']:>10}{last['encoded']:>9}{init:>10.2f}s"
+              f"{last['import_seconds']:>9.2f}s{last['first_search_ms']:>10.1f}ms")
+    print("=" * 64)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Tree Ensemble Engine Parity and Latency Report
+Compares the compiled array-backed engine with the scikit-learn heart,
+breast cancer and PCOD models
+
+Parity is checked on random rows drawn around each scaler's training
+distribution: probabilities must match within --tolerance and predictions
+exactly. Latency is measured for a single row and for a batch.
+
+Usage:
+    python benchmark_tabular.py --models heart pcod --batch-size 1000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+from tree_ensemble import SklearnEnsemble, compile_model
+
+MODEL_FILES = {
+    'heart': ('models/heart_disease_model.pkl', 'models/heart_disease_scaler.pkl'),
+    'breast': ('models/breast_cancer_model.pkl', 'models/breast_cancer_scaler.pkl'),
+    'pcod': ('models/pcod_model.pkl', 'models/pcod_scaler.pkl'),
+}
+
+
+def make_timer(repeats: int, warmup: int = 2):
+    """Build a timer returning p50/p95/mean latency in milliseconds"""
+    def timer(fn):
+        for _ in range(warmup):
+            fn()
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000.0)
+        return {
+            "p50_ms": round(float(np.percentile(samples, 50)), 3),
+            "p95_ms": round(float(np.percentile(samples, 95)), 3),
+            "mean_ms": round(float(np.mean(samples)), 3)
+        }
+    return timer
+
+
+def sample_rows(scaler, n: int, seed: int = 0) -> np.ndarray:
+    """Raw feature rows spread over the scaler's training distribution"""
+    rng = np.random.default_rng(seed)
+    return scaler.mean_ + rng.normal(0, 1.5, (n, len(scaler.mean_))) * scaler.scale_
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the compiled tree engine against scikit-learn")
+    parser.add_argument('--models', nargs='+', default=list(MODEL_FILES), choices=list(MODEL_FILES))
+    parser.add_argument('--rows', type=int, default=5000, help="Rows used for the parity check")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Rows per batch latency call")
+    parser.add_argument('--tolerance', type=float, default=1e-12,
+                        help="Maximum absolute probability difference allowed")
+    parser.add_argument('--repeats', type=int, default=20, help="Timed runs per measurement")
+    parser.add_argument('--output', help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = {}
+    for name in args.models:
+        model_path, scaler_path = MODEL_FILES[name]
+        if not os.path.exists(model_path):
+            print(f"Warning: {model_path} not found; run train_models.py first")
+            continue
+        model = joblib.load(model_path)
+        scaler = joblib.load(scaler_path)
+
+        # As loaded by app.py (forest n_jobs=-1) and with workers disabled
+        reference = lambda X, m=model, s=scaler: m.predict_proba(s.transform(X))
+        single_threaded = SklearnEnsemble(joblib.load(model_path), scaler)
+        compiled = compile_model(model, scaler)
+
+        X = sample_rows(scaler, args.rows)
+        expected = reference(X)
+        got = compiled.predict_proba(X)
+        max_diff = float(np.max(np.abs(expected - got)))
+        agreement = float(np.mean(model.predict(scaler.transform(X)) == compiled.predict(X)))
+
+        timer = make_timer(args.repeats)
+        single, batch = X[:1], X[:args.batch_size]
+        row = {
+            "trees": compiled.n_trees,
+            "nodes": compiled.n_nodes,
+            "engine_bytes": compiled.nbytes,
+            "max_abs_diff": max_diff,
+            "label_agreement": agreement,
+            "within_tolerance": max_diff <= args.tolerance and agreement == 1.0,
+            "latency": {}
+        }
+        # The original endpoints call predict and predict_proba separately
+        candidates = {
+            'sklearn (2 calls)': lambda X: (model.predict(scaler.transform(X)), reference(X)),
+            'sklearn n_jobs=1': single_threaded.predict_proba,
+            'compiled': compiled.predict_proba,
+        }
+        for label, fn in candidates.items():
+            row["latency"][label] = {
+                "single": timer(lambda: fn(single)),
+                "batch": timer(lambda: fn(batch))
+            }
+        report[name] = row
+
+        print("\n" + "=" * 72)
+        print(f"{name}: {row['trees']} trees, {row['nodes']} nodes, {row['engine_bytes'] / 1e6:.1f} MB of node arrays")
+        print(f"max|Δp| = {max_diff:.2e}, label agreement = {agreement * 100:.2f}% "
+              f"-> {'OK' if row['within_tolerance'] else 'MISMATCH'}")
+        print("-" * 72)
+        print(f"{'engine':<20}{'p50 x1':>12}{'p95 x1':>12}{f'p50 x{len(batch)}':>14}{'rows/s':>12}")
+        for label, latency in row["latency"].items():
+            throughput = len(batch) / (latency['batch']['p50_ms'] / 1000.0)
+            print(f"{label:<20}{latency['single']['p50_ms']:>10.2f}ms{latency['single']['p95_ms']:>10.2f}ms"
+                  f"{latency['batch']['p50_ms']:>12.1f}ms{throughput:>12.0f}")
+        print("=" * 72)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+
+    if any(not row['within_tolerance'] for row in report.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
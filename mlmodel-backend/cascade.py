@@ -0,0 +1,65 @@
+"""
+Two-Stage Cascade Screening
+A cheap screening model answers confident cases; uncertain ones go to the full model
+"""
+
+import threading
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+STAGE_SCREENING = 1
+STAGE_FULL = 2
+
+STAGE_NAMES = {STAGE_SCREENING: 'screening', STAGE_FULL: 'full'}
+
+
+class CascadeClassifier:
+    """Routes each image through the screening model and, if needed, the full model"""
+
+    def __init__(self, screening_fn: Callable[[np.ndarray], np.ndarray],
+                 full_fn: Callable[[np.ndarray], np.ndarray], threshold: float = 0.95):
+        """
+        Initialize cascade
+
+        Args:
+            screening_fn: First-stage batch predictor returning (N, 2) probabilities
+            full_fn: Second-stage batch predictor returning (N, 2) probabilities
+            threshold: Minimum first-stage class probability to answer without stage two
+        """
+        self.screening_fn = screening_fn
+        self.full_fn = full_fn
+        self.threshold = threshold
+
+        self._lock = threading.Lock()
+        self.stage_counts = {STAGE_SCREENING: 0, STAGE_FULL: 0}
+
+    def predict(self, batch: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classify a batch
+
+        Returns:
+            (probabilities, stages) where stages[i] is the stage that answered image i
+        """
+        probs = np.array(self.screening_fn(batch), dtype=np.float32)
+        uncertain = probs.max(axis=1) < self.threshold
+        stages = np.where(uncertain, STAGE_FULL, STAGE_SCREENING)
+
+        if uncertain.any():
+            probs[uncertain] = self.full_fn(batch[uncertain])
+
+        escalated = int(uncertain.sum())
+        with self._lock:
+            self.stage_counts[STAGE_FULL] += escalated
+            self.stage_counts[STAGE_SCREENING] += len(batch) - escalated
+        return probs, stages
+
+    def get_stats(self) -> Dict:
+        """Get the share of traffic answered by each stage"""
+        with self._lock:
+            total = sum(self.stage_counts.values())
+            return {
+                "threshold": self.threshold,
+                "answered_by": {STAGE_NAMES[stage]: count for stage, count in self.stage_counts.items()},
+                "screening_fraction": round(self.stage_counts[STAGE_SCREENING] / total, 4) if total else 0.0
+            }
@@ -0,0 +1,229 @@
+"""
+Pneumonia Model Head Compression
+Shrinks the Flatten -> Dense(4608) head of the VGG19 pneumonia model
+
+Methods:
+    svd    Factor the 25088x4608 kernel into rank-r factors (no retraining needed)
+    prune  Zero the smallest-magnitude weights of the dense head
+    gap    Replace Flatten with global average pooling and fine-tune the head
+
+Fine-tuning (--finetune-epochs, required for gap) distills the original
+model's outputs on the images in --data, so no labels are needed. A
+--holdout fraction of them is then kept out of fine-tuning, and agreement and
+accuracy delta are reported on that part only; without fine-tuning every
+image is used for evaluation.
+
+Usage:
+    python compress_model.py svd --rank 256 --data uploads --output vgg_svd256.weights.h5
+    PNEUMONIA_WEIGHTS=vgg_svd256.weights.h5 python app.py
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+from sklearn.utils.extmath import randomized_svd
+
+from inference_backends import load_labelled_images
+from pneumonia_model import (
+    WEIGHTS_PATH, build_pneumonia_model, head_config_path, keras_weights_path, load_pneumonia_model, weights_stem
+)
+
+
+def dense_layers(model):
+    """The three Dense layers of the original head, in order"""
+    from tensorflow.keras.layers import Dense
+    return [layer for layer in model.layers if isinstance(layer, Dense) and layer.name != 'dense1_factor']
+
+
+def copy_backbone(source, target):
+    """Copy the VGG19 convolutional weights between models"""
+    for src_layer, dst_layer in zip(source.layers, target.layers):
+        if src_layer.name.startswith('block'):
+            dst_layer.set_weights(src_layer.get_weights())
+
+
+def compress_svd(teacher, rank: int):
+    """Replace Dense(4608) on the flattened features with a rank-r factorization"""
+    student = build_pneumonia_model('svd', rank=rank)
+    copy_backbone(teacher, student)
+
+    t_dense = dense_layers(teacher)
+    s_dense = dense_layers(student)
+    kernel, bias = t_dense[0].get_weights()
+
+    print(f"  Factorizing {kernel.shape[0]}x{kernel.shape[1]} kernel to rank {rank}...")
+    u, s, vt = randomized_svd(kernel, n_components=rank, n_iter=4, random_state=42)
+    retained = float(np.sum(s ** 2) / np.sum(kernel.astype(np.float64) ** 2))
+    print(f"  Retained {retained * 100:.2f}% of the kernel energy")
+
+    root_s = np.sqrt(s)
+    student.get_layer('dense1_factor').set_weights([(u * root_s).astype(np.float32)])
+    s_dense[0].set_weights([(root_s[:, np.newaxis] * vt).astype(np.float32), bias])
+    for src, dst in zip(t_dense[1:], s_dense[1:]):
+        dst.set_weights(src.get_weights())
+    return student, {"rank": rank, "energy_retained": retained}
+
+
+def compress_prune(teacher, sparsity: float):
+    """Zero the smallest-magnitude fraction of each dense kernel in place (on a copy)"""
+    student = build_pneumonia_model('flatten')
+    student.set_weights(teacher.get_weights())
+
+    for layer in dense_layers(student):
+        kernel, bias = layer.get_weights()
+        threshold = np.quantile(np.abs(kernel), sparsity)
+        kernel[np.abs(kernel) < threshold] = 0.0
+        layer.set_weights([kernel, bias])
+    return student, {"sparsity": sparsity}
+
+
+def compress_gap(teacher):
+    """Pool instead of flattening; the head is re-initialized and must be fine-tuned"""
+    student = build_pneumonia_model('gap')
+    copy_backbone(teacher, student)
+    t_dense = dense_layers(teacher)
+    s_dense = dense_layers(student)
+    for src, dst in zip(t_dense[1:], s_dense[1:]):
+        dst.set_weights(src.get_weights())
+    return student, {}
+
+
+def finetune_head(student, images: np.ndarray, targets: np.ndarray, epochs: int, batch_size: int = 16):
+    """Train only the dense head to match the teacher's probabilities"""
+    import tensorflow as tf
+
+    for layer in student.layers:
+        layer.trainable = not layer.name.startswith(('block', 'input'))
+    student.compile(optimizer=tf.keras.optimizers.Adam(1e-4), loss='categorical_crossentropy')
+    student.fit(images, targets, epochs=epochs, batch_size=batch_size, verbose=2)
+
+
+def count_parameters(model) -> int:
+    return int(sum(np.prod(w.shape) for w in model.get_weights()))
+
+
+def count_nonzero(model) -> int:
+    return int(sum(np.count_nonzero(w) for w in model.get_weights()))
+
+
+def time_single(model, image: np.ndarray, repeats: int = 10) -> float:
+    """p50 single-image forward-pass latency in milliseconds"""
+    batch = image[np.newaxis]
+    model(batch, training=False)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model(batch, training=False)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return float(np.percentile(samples, 50))
+
+
+def evaluate(model, images: np.ndarray, teacher_probs: np.ndarray, labels) -> dict:
+    probs = model.predict(images, verbose=0)
+    result = {
+        "agreement_with_original": float(np.mean(np.argmax(probs, axis=1) == np.argmax(teacher_probs, axis=1))),
+        "max_abs_diff": float(np.max(np.abs(probs - teacher_probs)))
+    }
+    if labels is not None:
+        result["accuracy"] = float(np.mean(np.argmax(probs, axis=1) == labels))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress the dense head of the pneumonia model")
+    parser.add_argument('method', choices=['svd', 'prune', 'gap'])
+    parser.add_argument('--weights', default=WEIGHTS_PATH, help="Trained weights to compress")
+    parser.add_argument('--data', default='uploads',
+                        help="X-ray images for fine-tuning/evaluation (optionally NORMAL/ and PNEUMONIA/ subfolders)")
+    parser.add_argument('--rank', type=int, default=256, help="Bottleneck rank for svd")
+    parser.add_argument('--sparsity', type=float, default=0.9, help="Fraction of weights zeroed for prune")
+    parser.add_argument('--finetune-epochs', type=int, default=0, help="Epochs of head distillation")
+    parser.add_argument('--holdout', type=float, default=0.2,
+                        help="Fraction of images kept out of fine-tuning for the evaluation")
+    parser.add_argument('--output', help="Output weights path, ending in .weights.h5 (default vgg_<method>.weights.h5)")
+    args = parser.parse_args()
+
+    if args.method == 'gap' and args.finetune_epochs == 0:
+        args.finetune_epochs = 5
+        print("The gap head starts untrained; fine-tuning for 5 epochs")
+
+    output = keras_weights_path(args.output or f"vgg_{args.method}{args.rank if args.method == 'svd' else ''}")
+    if args.output and output != args.output:
+        print(f"Note: Keras saves weights only as *.weights.h5; writing {output}")
+
+    print(f"Loading original model from {args.weights}...")
+    teacher = load_pneumonia_model(args.weights)
+    labels, images = load_labelled_images(args.data)
+    teacher_probs = teacher.predict(images, verbose=0)
+    print(f"✓ Loaded {len(images)} images from {args.data}")
+
+    print(f"\nCompressing head ({args.method})...")
+    if args.method == 'svd':
+        student, details = compress_svd(teacher, args.rank)
+    elif args.method == 'prune':
+        student, details = compress_prune(teacher, args.sparsity)
+    else:
+        student, details = compress_gap(teacher)
+
+    eval_idx = np.arange(len(images))
+    if args.finetune_epochs:
+        teacher_labels = np.argmax(teacher_probs, axis=1)
+        stratify = teacher_labels if np.bincount(teacher_labels).min() >= 2 else None
+        train_idx, eval_idx = train_test_split(
+            eval_idx, test_size=args.holdout, random_state=42, stratify=stratify
+        )
+        print(f"\nFine-tuning head for {args.finetune_epochs} epochs on {len(train_idx)} images "
+              f"({len(eval_idx)} held out)...")
+        finetune_head(student, images[train_idx], teacher_probs[train_idx], args.finetune_epochs)
+
+    student.save_weights(output)
+    head = {'svd': 'svd', 'prune': 'flatten', 'gap': 'gap'}[args.method]
+    config = {"head": head, "method": args.method, "source": os.path.basename(args.weights), **details}
+    with open(head_config_path(output), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+    eval_labels = labels[eval_idx] if labels is not None else None
+    original_eval = evaluate(teacher, images[eval_idx], teacher_probs[eval_idx], eval_labels)
+    student_eval = evaluate(student, images[eval_idx], teacher_probs[eval_idx], eval_labels)
+    report = {
+        "method": args.method,
+        "details": details,
+        "evaluated_on": {"images": int(len(eval_idx)), "held_out": bool(args.finetune_epochs)},
+        "parameters": {"original": count_parameters(teacher), "compressed": count_parameters(student)},
+        "nonzero_parameters": {"original": count_nonzero(teacher), "compressed": count_nonzero(student)},
+        "weights_file_mb": {
+            "original": round(os.path.getsize(args.weights) / 1e6, 1) if os.path.exists(args.weights) else None,
+            "compressed": round(os.path.getsize(output) / 1e6, 1)
+        },
+        "latency_single_p50_ms": {"original": time_single(teacher, images[0]), "compressed": time_single(student, images[0])},
+        "evaluation": {"original": original_eval, "compressed": student_eval}
+    }
+    if labels is not None:
+        report["accuracy_delta"] = student_eval["accuracy"] - original_eval["accuracy"]
+
+    print("\n" + "=" * 60)
+    print(f"Compression report ({args.method})")
+    print("=" * 60)
+    for key in ('parameters', 'nonzero_parameters', 'weights_file_mb', 'latency_single_p50_ms'):
+        print(f"  {key:<24} {report[key]['original']!s:>14} -> {report[key]['compressed']!s:>14}")
+    print(f"  {'evaluation images':<24} {len(eval_idx):>14}{' (held out)' if args.finetune_epochs else ''}")
+    print(f"  {'agreement with original':<24} {student_eval['agreement_with_original'] * 100:>13.1f}%")
+    print(f"  {'max |Δp| vs original':<24} {student_eval['max_abs_diff']:>14.4f}")
+    if labels is not None:
+        print(f"  {'accuracy delta':<24} {report['accuracy_delta'] * 100:>+13.2f}%")
+    if args.method == 'prune':
+        print("  Note: pruned kernels are stored dense; savings need a compressed or sparse format")
+
+    report_path = weights_stem(output) + '_report.json'
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Saved {output}, {head_config_path(output)} and {report_path}")
+    print(f"Serve it with PNEUMONIA_WEIGHTS={output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+Distillation of the Tabular Risk Ensembles into Compact Students
+Trains a small student on the soft-voting teacher's predict_proba over a large
+synthetic sample and reports how closely it follows the teacher
+
+Soft targets are learned by repeating every sample once per class with the
+teacher's probability as its sample weight, so the student's log-loss is the
+cross-entropy against the teacher's distribution. Students are saved like the
+production models (joblib pickle + the teacher's scaler + compiled arrays) as
+models/<model>_student.pkl; the API serves them for requests that pass
+?variant=student.
+
+Students:
+    gb     GradientBoostingClassifier, 60 depth-3 trees (compiled engine)
+    tree   Single DecisionTreeClassifier of depth 8 (compiled engine)
+    hgb    HistGradientBoostingClassifier (served through scikit-learn)
+
+Usage:
+    python distill_models.py heart pcod --student gb --rows 200000
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict
+
+import joblib
+import numpy as np
+
+from benchmark_tabular import make_timer
+from synthetic_data import generate
+from train_models import CACHE_DIR, MODELS, add_models_argument, load_split
+from tree_ensemble import export_compiled, load_engine
+
+STUDENT_PATHS = {
+    'heart': 'models/heart_disease_student.pkl',
+    'breast': 'models/breast_cancer_student.pkl',
+    'pcod': 'models/pcod_student.pkl',
+}
+
+# Held-out rows used to compare student and teacher, as a fraction of the training sample
+EVAL_FRACTION = 0.2
+
+# Bins of student confidence for the calibration error
+CALIBRATION_BINS = 10
+
+
+def build_student(kind: str):
+    from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    if kind == 'gb':
+        return GradientBoostingClassifier(n_estimators=60, max_depth=3, learning_rate=0.2, random_state=42)
+    if kind == 'tree':
+        return DecisionTreeClassifier(max_depth=8, min_samples_leaf=20, random_state=42)
+    if kind == 'hgb':
+        return HistGradientBoostingClassifier(max_iter=100, max_depth=4, learning_rate=0.1, random_state=42)
+    raise ValueError(f"Unknown student '{kind}'. Choose from: gb, tree, hgb")
+
+
+def fit_soft_targets(student, X: np.ndarray, proba: np.ndarray, classes: np.ndarray):
+    """Fit a classifier to soft targets via per-class copies weighted by probability"""
+    n, k = proba.shape
+    X_rep = np.tile(X, (k, 1))
+    y_rep = np.repeat(classes, n)
+    weights = proba.T.ravel()
+    # Copies the teacher gives (almost) no probability add nothing but fit time
+    keep = weights > 1e-6
+    student.fit(X_rep[keep], y_rep[keep], sample_weight=weights[keep])
+    if list(student.classes_) != list(classes):
+        raise ValueError(f"student learned classes {list(student.classes_)}, teacher has {list(classes)}")
+    return student
+
+
+def compare(teacher_proba: np.ndarray, student_proba: np.ndarray) -> Dict:
+    """
+    Agreement and calibration of the student against the teacher
+
+    calibration_error bins the student's confidence and compares it with the
+    teacher's probability for the student's predicted class in each bin.
+    """
+    teacher_label = np.argmax(teacher_proba, axis=1)
+    student_label = np.argmax(student_proba, axis=1)
+    confidence = student_proba[np.arange(len(student_proba)), student_label]
+    teacher_support = teacher_proba[np.arange(len(teacher_proba)), student_label]
+
+    bins = np.minimum((confidence * CALIBRATION_BINS).astype(int), CALIBRATION_BINS - 1)
+    calibration_error = 0.0
+    for b in np.unique(bins):
+        mask = bins == b
+        calibration_error += mask.mean() * abs(confidence[mask].mean() - teacher_support[mask].mean())
+
+    eps = 1e-12
+    kl = np.sum(teacher_proba * (np.log(teacher_proba + eps) - np.log(student_proba + eps)), axis=1)
+    diff = np.abs(teacher_proba - student_proba)
+    return {
+        "agreement": round(float(np.mean(teacher_label == student_label)), 5),
+        "mean_abs_diff": round(float(diff.mean()), 5),
+        "max_abs_diff": round(float(diff.max()), 5),
+        "kl_divergence": round(float(kl.mean()), 5),
+        "calibration_error": round(float(calibration_error), 5)
+    }
+
+
+def distill(name: str, kind: str, rows: int, seed: int, cache_dir: str, repeats: int) -> Dict:
+    """Distill one teacher; returns the report and the fitted student with its scaler"""
+    spec = MODELS[name]
+    teacher = load_engine(spec['model_path'], spec['scaler_path'], 'compiled', 'r')
+    scaler = joblib.load(spec['scaler_path'])
+
+    # A fresh sample from the training distribution, labelled by the teacher
+    start = time.perf_counter()
+    X, _ = generate(name, rows, seed=seed)
+    n_eval = int(rows * EVAL_FRACTION)
+    X_fit, X_eval = X[n_eval:], X[:n_eval]
+    teacher_fit = teacher.predict_proba(X_fit)
+    label_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    student = fit_soft_targets(build_student(kind), scaler.transform(X_fit), teacher_fit, teacher.classes_)
+    fit_seconds = time.perf_counter() - start
+
+    teacher_eval = teacher.predict_proba(X_eval)
+    student_eval = student.predict_proba(scaler.transform(X_eval))
+    report = {"model": name, "student": kind, "rows": rows, "eval_rows": n_eval,
+              "label_seconds": round(label_seconds, 2), "fit_seconds": round(fit_seconds, 2)}
+    report.update(compare(teacher_eval, student_eval))
+
+    # Accuracy on the labelled test split the teacher was evaluated on
+    (_, X_test, _, y_test), _ = load_split(name, spec['rows'], 42, cache_dir)
+    report["teacher_accuracy"] = round(float(np.mean(teacher.predict(X_test) == y_test)), 4)
+    report["student_accuracy"] = round(float(np.mean(student.predict(scaler.transform(X_test)) == y_test)), 4)
+
+    timer = make_timer(repeats)
+    row = X_test[:1]
+    report["teacher_p50_ms"] = timer(lambda: teacher.predict_proba(row))['p50_ms']
+    report["student_sklearn_p50_ms"] = timer(lambda: student.predict_proba(scaler.transform(row)))['p50_ms']
+    return report, student, scaler
+
+
+def export_student(name: str, student, scaler) -> str:
+    """Save the student like a production model: pickle, shared scaler and compiled arrays"""
+    path = STUDENT_PATHS[name]
+    scaler_path = MODELS[name]['scaler_path']
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    joblib.dump(student, tmp_path)
+    os.replace(tmp_path, path)
+    try:
+        export_compiled(path, scaler_path, student, scaler)
+        return "compiled"
+    except ValueError as e:
+        print(f"  Warning: {type(student).__name__} cannot be compiled ({e}); it is served through scikit-learn")
+        return "sklearn"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the risk ensembles into compact student models")
+    add_models_argument(parser, 'distill')
+    parser.add_argument('--student', default='gb', choices=['gb', 'tree', 'hgb'])
+    parser.add_argument('--rows', type=int, default=200000, help="Synthetic rows labelled by the teacher")
+    parser.add_argument('--seed', type=int, default=7, help="Sample seed (differs from the training seed)")
+    parser.add_argument('--min-agreement', type=float, default=0.98,
+                        help="Only export students that agree with the teacher at least this often")
+    parser.add_argument('--force', action='store_true', help="Export even below --min-agreement")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Split cache shared with train_models.py")
+    parser.add_argument('--repeats', type=int, default=50, help="Timed runs per latency measurement")
+    parser.add_argument('--report', help="Write the reports as JSON to this path")
+    args = parser.parse_args()
+
+    reports = []
+    for name in dict.fromkeys(args.models):
+        if not os.path.exists(MODELS[name]['model_path']):
+            print(f"Warning: {MODELS[name]['model_path']} not found; run train_models.py first")
+            continue
+        print(f"\nDistilling {MODELS[name]['title']} ({args.student} student, {args.rows:,} rows)...")
+        report, student, scaler = distill(name, args.student, args.rows, args.seed, args.cache_dir, args.repeats)
+
+        if report['agreement'] >= args.min_agreement or args.force:
+            report['engine'] = export_student(name, student, scaler)
+            served = load_engine(STUDENT_PATHS[name], MODELS[name]['scaler_path'], report['engine'], 'r')
+            row = load_split(name, MODELS[name]['rows'], 42, args.cache_dir)[0][1][:1]
+            report["student_p50_ms"] = make_timer(args.repeats)(lambda: served.predict_proba(row))['p50_ms']
+            report["exported"] = STUDENT_PATHS[name]
+        else:
+            report["exported"] = None
+        reports.append(report)
+
+        print(f"  Agreement with teacher: {report['agreement'] * 100:.2f}%  "
+              f"(mean |Δp| {report['mean_abs_diff']:.4f}, KL {report['kl_divergence']:.4f}, "
+              f"calibration error {report['calibration_error']:.4f})")
+        print(f"  Test accuracy: teacher {report['teacher_accuracy'] * 100:.2f}%, "
+              f"student {report['student_accuracy'] * 100:.2f}%")
+        if report['exported']:
+            print(f"  Single-row p50: teacher {report['teacher_p50_ms']:.2f}ms, "
+                  f"student {report['student_p50_ms']:.2f}ms ({report['engine']})")
+            print(f"  ✓ Student saved to {report['exported']}")
+        else:
+            print(f"  Warning: agreement below {args.min_agreement:.2%}; student not exported (use --force)")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n✓ Report written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+In-Memory Image Decoding for Model Inputs
+Decodes uploaded image bytes straight into normalized float32 model tensors
+
+Large JPEGs are decoded at 1/2, 1/4 or 1/8 scale in the DCT domain when the
+reduced image still covers the target size, and DICOM files are downsampled
+as integers before windowing, so neither path materializes a full-resolution
+float array.
+"""
+
+import io
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+ImageBytes = Union[bytes, bytearray, memoryview]
+
+# Input size of the VGG19 pneumonia model
+TARGET_SIZE = (224, 224)
+
+_INV_255 = np.float32(1.0 / 255.0)
+
+# libjpeg scale factors exposed by OpenCV, largest first
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# JPEG start-of-frame markers that carry the image dimensions
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_size(buffer: np.ndarray) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) from a JPEG header without decoding it
+
+    Returns:
+        Dimensions, or None if the buffer is not a parseable JPEG
+    """
+    if buffer.size < 4 or buffer[0] != 0xFF or buffer[1] != 0xD8:
+        return None
+    pos = 2
+    end = buffer.size
+    while pos + 9 < end:
+        if buffer[pos] != 0xFF:
+            return None
+        marker = int(buffer[pos + 1])
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker in _SOF_MARKERS:
+            height = (int(buffer[pos + 5]) << 8) | int(buffer[pos + 6])
+            width = (int(buffer[pos + 7]) << 8) | int(buffer[pos + 8])
+            return width, height
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        length = (int(buffer[pos + 2]) << 8) | int(buffer[pos + 3])
+        pos += 2 + length
+    return None
+
+
+def reduction_flag(width: int, height: int, size: Tuple[int, int] = TARGET_SIZE) -> int:
+    """Largest DCT-domain reduction that still leaves the image at least as large as size"""
+    for factor, flag in _REDUCED_FLAGS:
+        if width // factor >= size[0] and height // factor >= size[1]:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def is_dicom(buffer: np.ndarray) -> bool:
+    """DICOM Part 10 files have a 128-byte preamble followed by 'DICM'"""
+    return buffer.size > 132 and buffer[128:132].tobytes() == b'DICM'
+
+
+def decode_image(data: ImageBytes, size: Optional[Tuple[int, int]] = TARGET_SIZE) -> Optional[np.ndarray]:
+    """
+    Decode encoded image bytes (JPEG, PNG, WebP, ...) into a BGR uint8 array
+
+    Args:
+        data: Raw file contents; wrapped without copying
+        size: Size the caller will resize to; JPEGs much larger than this are
+            decoded at reduced scale. None decodes at full resolution.
+
+    Returns:
+        HxWx3 BGR array, or None if the bytes are not a decodable image
+    """
+    buffer = np.frombuffer(memoryview(data), dtype=np.uint8)
+    if buffer.size == 0:
+        return None
+
+    flag = cv2.IMREAD_COLOR
+    if size is not None:
+        dims = jpeg_size(buffer)
+        if dims is not None:
+            flag = reduction_flag(dims[0], dims[1], size)
+    return cv2.imdecode(buffer, flag)
+
+
+def _first_value(value) -> Optional[float]:
+    """DICOM window attributes may be multi-valued; use the first one"""
+    if value is None:
+        return None
+    try:
+        return float(value[0])
+    except TypeError:
+        return float(value)
+
+
+def decode_dicom(data: ImageBytes, size: Tuple[int, int] = TARGET_SIZE) -> Optional[np.ndarray]:
+    """
+    Decode a DICOM file into a windowed RGB float32 tensor
+
+    The stored integer pixels are strided and area-resized down to the target
+    size first; rescale slope/intercept, VOI windowing and MONOCHROME1
+    inversion are applied afterwards on the small array only.
+
+    Returns:
+        RGB float32 (H, W, 3) array in [0, 1], or None if the file is unreadable
+    """
+    try:
+        import pydicom
+    except ImportError:
+        raise RuntimeError("DICOM support requires pydicom (pip install pydicom)")
+
+    try:
+        ds = pydicom.dcmread(io.BytesIO(data))
+        pixels = ds.pixel_array
+    except Exception as e:
+        print(f"Warning: Could not read DICOM file: {e}")
+        return None
+
+    if int(getattr(ds, 'NumberOfFrames', 1) or 1) > 1:
+        pixels = pixels[0]
+    color = getattr(ds, 'SamplesPerPixel', 1) == 3
+
+    # Integer stride down to at most twice the target, then area-average to it
+    h, w = pixels.shape[:2]
+    step = max(1, min(h // (2 * size[1]), w // (2 * size[0])))
+    if step > 1:
+        pixels = pixels[::step, ::step]
+    if pixels.dtype not in (np.uint8, np.uint16, np.int16):
+        pixels = pixels.astype(np.float32)
+    small = cv2.resize(np.ascontiguousarray(pixels), size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    if color:
+        return np.multiply(small, _INV_255, dtype=np.float32)
+
+    slope = float(getattr(ds, 'RescaleSlope', 1) or 1)
+    intercept = float(getattr(ds, 'RescaleIntercept', 0) or 0)
+    small = small * slope + intercept
+
+    center = _first_value(getattr(ds, 'WindowCenter', None))
+    width = _first_value(getattr(ds, 'WindowWidth', None))
+    if center is None or not width:
+        low, high = np.percentile(small, (0.5, 99.5))
+    else:
+        low, high = center - width / 2.0, center + width / 2.0
+    gray = np.clip((small - low) / max(high - low, 1e-6), 0.0, 1.0, dtype=np.float32)
+
+    if getattr(ds, 'PhotometricInterpretation', '') == 'MONOCHROME1':
+        gray = 1.0 - gray
+    return np.repeat(gray[:, :, np.newaxis], 3, axis=2)
+
+
+def to_model_input(image: np.ndarray, size: Tuple[int, int] = TARGET_SIZE,
+                   out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Resize a BGR uint8 image and normalize it into an RGB float32 tensor
+
+    Resizing and channel swapping run on uint8 data at the target size, so the
+    only float allocation is the final (H, W, 3) output.
+
+    Args:
+        image: HxWx3 BGR uint8 array
+        size: Target (width, height)
+        out: Optional preallocated float32 (H, W, 3) array to write into
+
+    Returns:
+        RGB float32 array scaled to [0, 1]
+    """
+    h, w = image.shape[:2]
+    # INTER_AREA antialiases when shrinking, like PIL's resize did
+    interpolation = cv2.INTER_AREA if w > size[0] or h > size[1] else cv2.INTER_CUBIC
+    resized = cv2.resize(image, size, interpolation=interpolation)
+    rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+
+    if out is None:
+        out = np.empty(rgb.shape, dtype=np.float32)
+    np.multiply(rgb, _INV_255, out=out, casting='unsafe')
+    return out
+
+
+def decode_to_tensor(data: ImageBytes, size: Tuple[int, int] = TARGET_SIZE) -> Optional[np.ndarray]:
+    """
+    Decode image bytes (any OpenCV format or DICOM) into a model-ready float32
+    tensor without touching disk
+
+    Args:
+        data: Raw file contents
+        size: Target (width, height)
+
+    Returns:
+        RGB float32 (H, W, 3) array in [0, 1], or None if decoding failed
+    """
+    if is_dicom(np.frombuffer(memoryview(data), dtype=np.uint8)):
+        return decode_dicom(data, size)
+
+    image = decode_image(data, size)
+    if image is None:
+        return None
+    return to_model_input(image, size)
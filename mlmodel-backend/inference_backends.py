@@ -0,0 +1,399 @@
+"""
+Pluggable Inference Backends for the Pneumonia Model
+Runs the same VGG19 weights through Keras, TFLite (quantized) or ONNX Runtime
+"""
+
+import glob
+import os
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from image_decode import decode_to_tensor
+
+BACKEND_NAMES = ['keras', 'keras-xla', 'tflite-dynamic', 'tflite-int8', 'onnx']
+
+CONVERTED_DIR = 'models'
+
+
+def converted_path(weights_path: str, suffix: str) -> str:
+    """Location of a runtime artifact converted from the given Keras weights"""
+    stem = os.path.splitext(os.path.basename(weights_path))[0]
+    return os.path.join(CONVERTED_DIR, f'{stem}_{suffix}')
+
+
+def needs_conversion(artifact_path: str, weights_path: str) -> bool:
+    """True if the artifact is missing or older than the weights it came from"""
+    if not os.path.exists(artifact_path):
+        return True
+    return os.path.exists(weights_path) and os.path.getmtime(weights_path) > os.path.getmtime(artifact_path)
+
+
+# Backends that run from their converted file alone once it is current
+FILE_BACKENDS = {'tflite-dynamic': 'dynamic.tflite', 'tflite-int8': 'int8.tflite', 'onnx': 'model.onnx'}
+
+
+def serves_from_file(name: str, weights_path: str) -> bool:
+    """
+    True if the backend's converted artifact is current, so the Keras model
+    does not have to be built. The TFLite interpreter memory-maps its model
+    file, so workers serving it share one page-cache copy of the weights.
+    """
+    suffix = FILE_BACKENDS.get(name)
+    return suffix is not None and not needs_conversion(converted_path(weights_path, suffix), weights_path)
+
+
+def load_reference_images(image_dir: str, limit: Optional[int] = None) -> np.ndarray:
+    """
+    Decode every image in a directory into an (N, 224, 224, 3) float32 batch
+
+    Used for int8 calibration and for backend parity checks.
+    """
+    paths = sorted(
+        path for path in glob.glob(os.path.join(image_dir, '*'))
+        if os.path.isfile(path)
+    )
+    tensors = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            tensor = decode_to_tensor(f.read())
+        if tensor is not None:
+            tensors.append(tensor)
+        if limit and len(tensors) >= limit:
+            break
+    if not tensors:
+        raise ValueError(f"No decodable images found in {image_dir}")
+    return np.stack(tensors)
+
+
+def load_labelled_images(data_dir: str) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    """
+    Load an image directory, with labels if it has NORMAL/ and PNEUMONIA/ subfolders
+
+    Returns:
+        (labels or None, images)
+    """
+    normal_dir = os.path.join(data_dir, 'NORMAL')
+    pneumonia_dir = os.path.join(data_dir, 'PNEUMONIA')
+    if not (os.path.isdir(normal_dir) and os.path.isdir(pneumonia_dir)):
+        return None, load_reference_images(data_dir)
+    normal = load_reference_images(normal_dir)
+    pneumonia = load_reference_images(pneumonia_dir)
+    labels = np.concatenate([np.zeros(len(normal), dtype=int), np.ones(len(pneumonia), dtype=int)])
+    return labels, np.concatenate([normal, pneumonia])
+
+
+def bucket_sizes(max_batch_size: int) -> List[int]:
+    """Powers of two up to max_batch_size, plus max_batch_size itself"""
+    sizes = []
+    size = 1
+    while size < max_batch_size:
+        sizes.append(size)
+        size *= 2
+    sizes.append(max_batch_size)
+    return sizes
+
+
+class InferenceBackend:
+    """Common interface: map an (N, 224, 224, 3) float32 batch to (N, 2) probabilities"""
+
+    name = 'base'
+    input_shape = (224, 224, 3)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def warmup(self, batch_sizes: List[int]):
+        """Run dummy batches so the first real request does not pay setup costs"""
+        for size in batch_sizes:
+            self.predict(np.zeros((size,) + tuple(self.input_shape), dtype=np.float32))
+
+
+class KerasBackend(InferenceBackend):
+    """
+    Reference backend running the Keras model
+
+    By default the forward pass is a tf.function with a fixed input signature,
+    which skips the per-call data-adapter setup of Model.predict. With XLA
+    enabled, batches are zero-padded to power-of-two buckets so only a bounded
+    set of shapes is ever compiled.
+    """
+
+    name = 'keras'
+
+    def __init__(self, model, compiled: bool = True, xla: bool = False):
+        """
+        Args:
+            model: Keras model (the pneumonia model, or a backbone/head part of it)
+            compiled: Use a traced tf.function instead of Model.predict
+            xla: JIT-compile the traced function with XLA (implies compiled)
+        """
+        self.model = model
+        self.input_shape = tuple(model.input_shape[1:])
+        self.compiled = compiled or xla
+        self.xla = xla
+        # Replaced by the warmed sizes once warmup() runs
+        self.buckets = bucket_sizes(64)
+
+        if self.compiled:
+            import tensorflow as tf
+
+            @tf.function(
+                input_signature=[tf.TensorSpec((None,) + self.input_shape, tf.float32)],
+                jit_compile=xla,
+                reduce_retracing=True
+            )
+            def forward(x):
+                return model(x, training=False)
+
+            self._forward = forward
+            if xla:
+                self.name = 'keras-xla'
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        return self._forward(batch).numpy()
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        if not self.compiled:
+            return self.model.predict(batch, verbose=0)
+
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        if not self.xla:
+            return self._run(batch)
+
+        # Pad up to the next warmed bucket; split anything larger than the biggest one
+        largest = self.buckets[-1]
+        outputs = []
+        for start in range(0, len(batch), largest):
+            chunk = batch[start:start + largest]
+            size = next(b for b in self.buckets if b >= len(chunk))
+            if size != len(chunk):
+                padded = np.zeros((size,) + chunk.shape[1:], dtype=np.float32)
+                padded[:len(chunk)] = chunk
+                outputs.append(self._run(padded)[:len(chunk)])
+            else:
+                outputs.append(self._run(chunk))
+        return np.concatenate(outputs)
+
+    def warmup(self, batch_sizes: List[int]):
+        if self.xla:
+            self.buckets = bucket_sizes(max(batch_sizes))
+            batch_sizes = self.buckets
+        super().warmup(batch_sizes)
+
+
+class TFLiteBackend(InferenceBackend):
+    """TFLite interpreter with dynamic-range or full-integer quantized weights"""
+
+    def __init__(self, model, weights_path: str, quantization: str = 'dynamic',
+                 calibration_dir: Optional[str] = None, num_threads: Optional[int] = None):
+        """
+        Convert (or reuse a previously converted) TFLite model
+
+        Args:
+            model: Keras model to convert
+            weights_path: Weights the model was loaded from (names and versions the artifact)
+            quantization: 'dynamic' (int8 weights, float activations) or 'int8'
+                (int8 weights and activations, calibrated on calibration_dir)
+            calibration_dir: Directory of representative X-rays for int8 calibration
+            num_threads: Interpreter thread count (defaults to all cores)
+        """
+        import tensorflow as tf
+
+        if quantization not in ('dynamic', 'int8'):
+            raise ValueError(f"Unknown TFLite quantization: {quantization}")
+
+        self.name = f'tflite-{quantization}'
+        self.quantization = quantization
+        self.model_path = converted_path(weights_path, f'{quantization}.tflite')
+
+        if needs_conversion(self.model_path, weights_path):
+            self._convert(model, calibration_dir)
+
+        self.interpreter = tf.lite.Interpreter(model_path=self.model_path, num_threads=num_threads or os.cpu_count())
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self._batch_size = None
+        # The interpreter holds mutable tensor buffers and is not thread-safe
+        self._lock = threading.Lock()
+
+    def _convert(self, model, calibration_dir: Optional[str]):
+        import tensorflow as tf
+
+        print(f"Converting pneumonia model to TFLite ({self.quantization})...")
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        if self.quantization == 'int8':
+            samples = load_reference_images(calibration_dir or 'uploads', limit=100)
+
+            def representative_dataset() -> Iterator[List[np.ndarray]]:
+                for sample in samples:
+                    yield [sample[np.newaxis]]
+
+            converter.representative_dataset = representative_dataset
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+            # Keep float32 I/O so callers are unaffected
+            converter.inference_input_type = tf.float32
+            converter.inference_output_type = tf.float32
+
+        os.makedirs(CONVERTED_DIR, exist_ok=True)
+        with open(self.model_path, 'wb') as f:
+            f.write(converter.convert())
+        print(f"✓ Saved TFLite model to {self.model_path}")
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        with self._lock:
+            if self._batch_size != len(batch):
+                self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+            self.interpreter.set_tensor(self.input_index, batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_index).copy()
+
+
+class ONNXBackend(InferenceBackend):
+    """ONNX Runtime CPU session exported from the Keras model"""
+
+    name = 'onnx'
+
+    def __init__(self, model, weights_path: str, num_threads: Optional[int] = None):
+        """
+        Export (or reuse a previously exported) ONNX model and open a session
+
+        Args:
+            model: Keras model to export with tf2onnx
+            weights_path: Weights the model was loaded from (names and versions the artifact)
+            num_threads: Intra-op thread count (defaults to ONNX Runtime's choice)
+        """
+        import onnxruntime as ort
+
+        self.model_path = converted_path(weights_path, 'model.onnx')
+        if needs_conversion(self.model_path, weights_path):
+            self._export(model)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _export(self, model):
+        import tensorflow as tf
+        import tf2onnx
+
+        print("Exporting pneumonia model to ONNX...")
+        os.makedirs(CONVERTED_DIR, exist_ok=True)
+        spec = (tf.TensorSpec((None, 224, 224, 3), tf.float32, name='input'),)
+        tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=self.model_path)
+        print(f"✓ Saved ONNX model to {self.model_path}")
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+def create_backend(name: str, model, weights_path: str, calibration_dir: Optional[str] = None,
+                   num_threads: Optional[int] = None, compiled: bool = True,
+                   xla: bool = False) -> InferenceBackend:
+    """
+    Create an inference backend by name
+
+    Args:
+        name: One of BACKEND_NAMES
+        model: Loaded Keras pneumonia model (source of the weights)
+        weights_path: File the model weights were loaded from
+        calibration_dir: Representative images for int8 calibration
+        num_threads: CPU threads for TFLite / ONNX Runtime
+        compiled: Keras only - serve through a traced tf.function
+        xla: Keras only - JIT-compile the traced function with XLA
+    """
+    if name == 'keras':
+        return KerasBackend(model, compiled=compiled, xla=xla)
+    if name == 'keras-xla':
+        return KerasBackend(model, xla=True)
+    if name == 'tflite-dynamic':
+        return TFLiteBackend(model, weights_path, 'dynamic', num_threads=num_threads)
+    if name == 'tflite-int8':
+        return TFLiteBackend(model, weights_path, 'int8', calibration_dir=calibration_dir, num_threads=num_threads)
+    if name == 'onnx':
+        return ONNXBackend(model, weights_path, num_threads=num_threads)
+    raise ValueError(f"Unknown inference backend '{name}' (choose from {', '.join(BACKEND_NAMES)})")
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+
+def backend_name_from_env() -> str:
+    return os.environ.get('PNEUMONIA_BACKEND', 'keras').lower()
+
+
+def backend_from_env(model, weights_path: str) -> InferenceBackend:
+    """
+    Create the backend selected by PNEUMONIA_BACKEND (default 'keras')
+
+    PNEUMONIA_COMPILED (default on) and PNEUMONIA_XLA (default off) configure
+    the Keras backend. Falls back to Keras if the configured backend cannot
+    be created. model may be None when serves_from_file() holds; it is then
+    only loaded for the fallback.
+    """
+    name = backend_name_from_env()
+    threads = os.environ.get('PNEUMONIA_BACKEND_THREADS')
+    compiled = _env_flag('PNEUMONIA_COMPILED', '1')
+    xla = _env_flag('PNEUMONIA_XLA', '0')
+    try:
+        backend = create_backend(
+            name, model, weights_path,
+            calibration_dir=os.environ.get('PNEUMONIA_CALIBRATION_DIR'),
+            num_threads=int(threads) if threads else None,
+            compiled=compiled,
+            xla=xla
+        )
+    except Exception as e:
+        if name == 'keras':
+            raise
+        print(f"Warning: Could not create '{name}' inference backend ({e}), falling back to Keras")
+        if model is None:
+            from pneumonia_model import load_pneumonia_model
+            model = load_pneumonia_model(weights_path)
+        backend = KerasBackend(model, compiled=compiled, xla=xla)
+    print(f"✓ Pneumonia inference backend: {backend.name}")
+    return backend
+
+
+def compare_backends(reference: InferenceBackend, candidates: Dict[str, InferenceBackend],
+                     images: np.ndarray, tolerance: float,
+                     timer: Callable[[Callable[[], object]], Dict]) -> Dict[str, Dict]:
+    """
+    Check each candidate against the reference outputs and time it
+
+    Args:
+        reference: Backend whose outputs are ground truth (Keras)
+        candidates: Backends to evaluate, keyed by name
+        images: Reference image batch
+        tolerance: Maximum allowed absolute difference in class probability
+        timer: Function that runs a callable repeatedly and returns latency stats
+
+    Returns:
+        Report per backend name
+    """
+    expected = np.concatenate([reference.predict(image[np.newaxis]) for image in images])
+    report = {}
+    for name, backend in candidates.items():
+        actual = np.concatenate([backend.predict(image[np.newaxis]) for image in images])
+        max_diff = float(np.max(np.abs(actual - expected)))
+        agreement = float(np.mean(np.argmax(actual, axis=1) == np.argmax(expected, axis=1)))
+        report[name] = {
+            "max_abs_diff": max_diff,
+            "label_agreement": agreement,
+            "within_tolerance": max_diff <= tolerance and agreement == 1.0,
+            "latency_single": timer(lambda: backend.predict(images[:1])),
+            "latency_batch": timer(lambda: backend.predict(images)),
+            "batch_size": len(images)
+        }
+    return report
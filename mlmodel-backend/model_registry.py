@@ -0,0 +1,532 @@
+"""
+Model Registry
+Declares every served model once and loads it lazily on first use
+
+Each model is described by a ModelSpec (name, artifact files, loader). The
+registry loads a model the first time a request needs it, records how long
+the load took and how much resident memory it added, and versions it by the
+content hash of its artifacts. With a memory budget set, the least recently
+used models are unloaded when a new load would exceed it.
+
+Artifacts can be replaced while the server runs: reload() (triggered by the
+ArtifactWatcher or an admin request) loads the new version next to the old
+one, validates it with the spec's canary check and swaps it in with a single
+assignment. Requests that already hold the old object finish on it.
+"""
+
+import gc
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from prediction_cache import file_fingerprint
+
+STATE_UNLOADED = 'unloaded'
+STATE_LOADED = 'loaded'
+STATE_FAILED = 'failed'
+STATE_MISSING = 'missing'
+
+
+class ModelUnavailable(RuntimeError):
+    """Raised when a model cannot be served (missing artifacts or failed load)"""
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (0 if it cannot be measured)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def artifact_stats(paths: Sequence[str]) -> Tuple:
+    """Cheap change signature: (mtime_ns, size) per artifact, None for missing files"""
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def artifact_version(paths: Sequence[str]) -> Optional[str]:
+    """Content hash over a model's artifact files, or None if any is missing"""
+    digest = hashlib.sha256()
+    for path in paths:
+        fingerprint = file_fingerprint(path)
+        if fingerprint is None:
+            return None
+        digest.update(fingerprint.encode('ascii'))
+    return digest.hexdigest()[:16]
+
+
+class ModelSpec:
+    """
+    Declaration of a servable model
+
+    Args:
+        name: Registry key, e.g. 'heart'
+        loader: Zero-argument callable returning the ready-to-serve object
+        artifacts: Files the loader reads; their hashes form the model version
+        description: Human-readable summary for the /models endpoint
+        pinned: Pinned models are never unloaded to meet the memory budget
+        canary: Optional check run on a freshly loaded object before it is
+            swapped in on reload; raises (or returns False) to reject it
+        on_served: Optional callback run with the object once it is the served
+            version (after its first load and after every reload swap), e.g.
+            to clean up what earlier versions left behind
+        pass_version: Call the loader with the artifact version as its only
+            argument, so it can reuse the hash instead of reading the files again
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any], artifacts: Iterable[str] = (),
+                 description: str = '', pinned: bool = False,
+                 canary: Optional[Callable[[Any], Optional[bool]]] = None,
+                 on_served: Optional[Callable[[Any], None]] = None, pass_version: bool = False):
+        self.name = name
+        self.loader = loader
+        self.artifacts = list(artifacts)
+        self.description = description
+        self.pinned = pinned
+        self.canary = canary
+        self.on_served = on_served
+        self.pass_version = pass_version
+
+
+class _Entry:
+    """Runtime state of one registered model"""
+
+    def __init__(self, spec: ModelSpec):
+        self.spec = spec
+        # (object, version), replaced as a whole so readers never see a mix
+        self.current: Optional[Tuple[Any, Optional[str]]] = None
+        self.artifact_stats: Optional[Tuple] = None
+        self.reload_status: Optional[Dict] = None
+        self.reloading = False
+        # Serializes loads and reloads of this model only; serving never takes it
+        self.load_lock = threading.Lock()
+        self.error: Optional[str] = None
+        self.failed_at = 0.0
+        self.load_seconds: Optional[float] = None
+        self.memory_bytes = 0
+        self.loaded_at: Optional[float] = None
+        self.last_used = 0.0
+        self.loads = 0
+        self.requests = 0
+
+    @property
+    def obj(self) -> Any:
+        current = self.current
+        return None if current is None else current[0]
+
+    @property
+    def version(self) -> Optional[str]:
+        current = self.current
+        return None if current is None else current[1]
+
+    @property
+    def state(self) -> str:
+        if self.obj is not None:
+            return STATE_LOADED
+        if self.error is not None:
+            return STATE_FAILED
+        if any(not os.path.exists(path) for path in self.spec.artifacts):
+            return STATE_MISSING
+        return STATE_UNLOADED
+
+
+class ModelRegistry:
+    """Lazy-loading, memory-budgeted registry of served models"""
+
+    def __init__(self, memory_budget_bytes: Optional[int] = None, retry_seconds: float = 30.0):
+        """
+        Initialize model registry
+
+        Args:
+            memory_budget_bytes: Resident memory allowed for loaded models
+                (None = unlimited); LRU unpinned models are unloaded beyond it
+            retry_seconds: Minimum delay before retrying a model whose load failed
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self.retry_seconds = retry_seconds
+        self.evictions = 0
+
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        # Evictions are decided one at a time so two loads never unload the same headroom twice
+        self._budget_lock = threading.Lock()
+
+    def register(self, spec: ModelSpec) -> None:
+        with self._lock:
+            self._entries[spec.name] = _Entry(spec)
+
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    def _entry(self, name: str) -> _Entry:
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise KeyError(f"Unknown model '{name}'. Registered: {', '.join(self._entries)}")
+
+    def state(self, name: str) -> str:
+        return self._entry(name).state
+
+    def is_loaded(self, name: str) -> bool:
+        return self._entry(name).obj is not None
+
+    def version(self, name: str) -> Optional[str]:
+        return self._entry(name).version
+
+    def peek(self, name: str) -> Any:
+        """The loaded object, or None, without triggering a load"""
+        return self._entry(name).obj
+
+    def get(self, name: str) -> Any:
+        """
+        Return a model, loading it on first use
+
+        Raises:
+            ModelUnavailable: If artifacts are missing or the load failed
+        """
+        return self.get_versioned(name)[0]
+
+    def get_versioned(self, name: str) -> Tuple[Any, Optional[str]]:
+        """Like get(), but also returns the version of the object handed out"""
+        entry = self._entry(name)
+        current = entry.current
+        if current is None:
+            current = self._load(entry)
+        entry.last_used = time.monotonic()
+        entry.requests += 1
+        return current
+
+    def _load_artifacts(self, entry: _Entry, version: Optional[str] = None) -> Tuple[Any, Optional[str], Tuple, float, int]:
+        """
+        Run the spec's loader; returns (object, version, stats, seconds, rss delta)
+
+        Different models load concurrently, so the RSS delta of a load that
+        overlaps another one also counts part of the other's memory. A version
+        the caller already computed is reused rather than hashing the files again.
+        """
+        missing = [path for path in entry.spec.artifacts if not os.path.exists(path)]
+        if missing:
+            raise ModelUnavailable(f"{entry.spec.name} artifacts not found: {', '.join(missing)}")
+
+        stats = artifact_stats(entry.spec.artifacts)
+        if version is None:
+            version = artifact_version(entry.spec.artifacts)
+        rss_before = current_rss()
+        start = time.perf_counter()
+        obj = entry.spec.loader(version) if entry.spec.pass_version else entry.spec.loader()
+        return obj, version, stats, time.perf_counter() - start, max(0, current_rss() - rss_before)
+
+    def _install(self, entry: _Entry, obj: Any, version: Optional[str], stats: Tuple,
+                 seconds: float, memory_bytes: int) -> Tuple[Any, Optional[str]]:
+        entry.load_seconds = seconds
+        entry.memory_bytes = memory_bytes
+        entry.artifact_stats = stats
+        entry.error = None
+        entry.loaded_at = time.time()
+        entry.last_used = time.monotonic()
+        entry.loads += 1
+        # Single assignment: new requests see the new version, in-flight ones keep the old
+        current = (obj, version)
+        with self._lock:
+            entry.current = current
+        return current
+
+    def _served(self, entry: _Entry, obj: Any) -> None:
+        """Run the spec's on_served callback; a failure there never affects serving"""
+        if entry.spec.on_served is None:
+            return
+        try:
+            entry.spec.on_served(obj)
+        except Exception as e:
+            print(f"Warning: on_served callback of {entry.spec.name} failed: {e}")
+
+    def _load(self, entry: _Entry) -> Tuple[Any, Optional[str]]:
+        # Per model, so a cold load of one model never holds up first requests to the others
+        with entry.load_lock:
+            if entry.current is not None:
+                return entry.current
+            if entry.error is not None and time.monotonic() - entry.failed_at < self.retry_seconds:
+                raise ModelUnavailable(entry.error)
+
+            try:
+                loaded = self._load_artifacts(entry)
+            except ModelUnavailable:
+                raise
+            except Exception as e:
+                entry.error = f"Could not load {entry.spec.name}: {e}"
+                entry.failed_at = time.monotonic()
+                print(f"Warning: {entry.error}")
+                raise ModelUnavailable(entry.error) from e
+
+            current = self._install(entry, *loaded)
+            print(f"✓ {entry.spec.name} model loaded in {entry.load_seconds:.2f}s "
+                  f"(+{entry.memory_bytes / 1e6:.1f} MB, version {entry.version})")
+
+            self._enforce_budget(keep=entry.spec.name)
+            self._served(entry, current[0])
+            return current
+
+    def reload(self, name: str, force: bool = False) -> Dict:
+        """
+        Load the current artifacts next to the served version and swap them in
+
+        The old object keeps serving until the new one has loaded, warmed up
+        (inside the loader) and passed the canary check. Unloaded models are
+        left alone; their next request loads the new artifacts anyway. Only
+        this model's load lock is held meanwhile, so other models keep loading
+        and serving; a second reload of the same model waits for this one.
+
+        Args:
+            name: Registered model name
+            force: Reload even if the artifact hash is unchanged
+
+        Returns:
+            Status dict: status is 'swapped', 'unchanged', 'not_loaded',
+            'rejected' (canary failed) or 'failed' (load error)
+        """
+        entry = self._entry(name)
+        with entry.load_lock:
+            old_version = entry.version
+            if entry.current is None:
+                status = {"status": "not_loaded"}
+            else:
+                version = artifact_version(entry.spec.artifacts)
+                if not force and version == old_version:
+                    entry.artifact_stats = artifact_stats(entry.spec.artifacts)
+                    status = {"status": "unchanged", "version": old_version}
+                else:
+                    status = self._reload_loaded(entry, old_version, version)
+            status["at"] = time.time()
+            entry.reload_status = status
+
+        if status["status"] == 'swapped':
+            gc.collect()
+            self._enforce_budget(keep=name)
+            obj = entry.obj
+            if obj is not None:
+                self._served(entry, obj)
+        return status
+
+    def _reload_loaded(self, entry: _Entry, old_version: Optional[str], version: Optional[str]) -> Dict:
+        name = entry.spec.name
+        try:
+            obj, version, stats, seconds, memory_bytes = self._load_artifacts(entry, version)
+        except Exception as e:
+            print(f"Warning: Reload of {name} failed, still serving version {old_version}: {e}")
+            return {"status": "failed", "version": old_version, "error": str(e)}
+
+        if entry.spec.canary is not None:
+            try:
+                if entry.spec.canary(obj) is False:
+                    raise ValueError("canary check returned False")
+            except Exception as e:
+                # Remember the rejected files so the watcher does not retry them in a loop
+                entry.artifact_stats = stats
+                print(f"Warning: {name} version {version} failed its canary check, "
+                      f"still serving version {old_version}: {e}")
+                return {"status": "rejected", "version": old_version, "candidate": version, "error": str(e)}
+
+        self._install(entry, obj, version, stats, seconds, memory_bytes)
+        print(f"✓ {name} model reloaded in {seconds:.2f}s: version {old_version} -> {version}")
+        return {"status": "swapped", "version": version, "previous": old_version}
+
+    def reload_async(self, name: str, force: bool = False) -> bool:
+        """
+        Start reload() on a background thread
+
+        Returns:
+            False if a reload of this model is already running
+        """
+        entry = self._entry(name)
+        with self._lock:
+            if entry.reloading:
+                return False
+            entry.reloading = True
+
+        def run():
+            try:
+                self.reload(name, force=force)
+            finally:
+                entry.reloading = False
+
+        threading.Thread(target=run, name=f'reload-{name}', daemon=True).start()
+        return True
+
+    def changed_artifacts(self) -> List[str]:
+        """Loaded models whose artifact files changed since they were loaded"""
+        return [
+            name for name, entry in self._entries.items()
+            if entry.current is not None and entry.spec.artifacts
+            and artifact_stats(entry.spec.artifacts) != entry.artifact_stats
+        ]
+
+    def _enforce_budget(self, keep: str) -> None:
+        if self.memory_budget_bytes is None:
+            return
+        with self._budget_lock:
+            self._evict_over_budget(keep)
+
+    def _evict_over_budget(self, keep: str) -> None:
+        while self.loaded_bytes() > self.memory_budget_bytes:
+            candidates = [
+                e for e in self._entries.values()
+                if e.obj is not None and not e.spec.pinned and e.spec.name != keep
+            ]
+            if not candidates:
+                return
+            victim = min(candidates, key=lambda e: e.last_used)
+            print(f"Memory budget exceeded; unloading least recently used model {victim.spec.name}")
+            self.unload(victim.spec.name)
+            self.evictions += 1
+
+    def loaded_bytes(self) -> int:
+        return sum(e.memory_bytes for e in self._entries.values() if e.obj is not None)
+
+    def unload(self, name: str) -> bool:
+        """
+        Drop a loaded model; requests already holding it finish normally
+
+        Returns:
+            True if the model was loaded
+        """
+        entry = self._entry(name)
+        with self._lock:
+            current, entry.current = entry.current, None
+            entry.error = None
+        if current is None:
+            return False
+        del current
+        gc.collect()
+        return True
+
+    def preload(self, names: Iterable[str]) -> None:
+        """Load the given models now; failures are reported and skipped"""
+        for name in names:
+            try:
+                self.get(name)
+            except (ModelUnavailable, KeyError) as e:
+                print(f"Warning: Could not preload {name}: {e}")
+
+    def get_stats(self) -> Dict:
+        models = {}
+        for name, entry in self._entries.items():
+            models[name] = {
+                "state": entry.state,
+                "description": entry.spec.description,
+                "artifacts": entry.spec.artifacts,
+                "version": entry.version,
+                "pinned": entry.spec.pinned,
+                "load_seconds": None if entry.load_seconds is None else round(entry.load_seconds, 3),
+                "memory_mb": round(entry.memory_bytes / 1e6, 1) if entry.obj is not None else 0.0,
+                "loaded_at": entry.loaded_at,
+                "loads": entry.loads,
+                "requests": entry.requests,
+                "error": entry.error,
+                "reloading": entry.reloading,
+                "last_reload": entry.reload_status
+            }
+        return {
+            "models": models,
+            "loaded_memory_mb": round(self.loaded_bytes() / 1e6, 1),
+            "memory_budget_mb": None if self.memory_budget_bytes is None else round(self.memory_budget_bytes / 1e6, 1),
+            "process_rss_mb": round(current_rss() / 1e6, 1),
+            "evictions": self.evictions
+        }
+
+
+class ArtifactWatcher:
+    """
+    Polls the artifacts of loaded models and hot-reloads them when they change
+
+    A change is acted on only once the file signature is the same on two
+    consecutive polls, so a model that is still being written is not loaded
+    half-finished.
+    """
+
+    def __init__(self, registry: ModelRegistry, interval: float = 5.0):
+        """
+        Initialize artifact watcher
+
+        Args:
+            registry: Registry whose loaded models are watched
+            interval: Seconds between polls
+        """
+        self.registry = registry
+        self.interval = interval
+        self._pending: Dict[str, Tuple] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='artifact-watcher', daemon=True)
+
+    def start(self) -> 'ArtifactWatcher':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def poll(self) -> List[str]:
+        """One watch cycle; returns the models a reload was started for"""
+        started = []
+        changed = set(self.registry.changed_artifacts())
+        for name in list(self._pending):
+            if name not in changed:
+                del self._pending[name]
+        for name in changed:
+            stats = artifact_stats(self.registry._entry(name).spec.artifacts)
+            if self._pending.get(name) == stats:
+                del self._pending[name]
+                print(f"Artifacts of {name} changed; reloading in the background")
+                if self.registry.reload_async(name):
+                    started.append(name)
+            else:
+                self._pending[name] = stats
+        return started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Warning: Artifact watcher error: {e}")
+
+
+def registry_from_env() -> ModelRegistry:
+    """Registry configured by MODEL_MEMORY_BUDGET_MB and MODEL_RETRY_SECONDS"""
+    budget = os.environ.get('MODEL_MEMORY_BUDGET_MB')
+    return ModelRegistry(
+        memory_budget_bytes=int(float(budget) * 1e6) if budget else None,
+        retry_seconds=float(os.environ.get('MODEL_RETRY_SECONDS', 30))
+    )
+
+
+def preload_from_env(registry: ModelRegistry) -> None:
+    """Load the models listed in MODEL_PRELOAD (comma-separated, or 'all') at startup"""
+    value = os.environ.get('MODEL_PRELOAD', '').strip()
+    if not value:
+        return
+    names = registry.names() if value.lower() == 'all' else [n.strip() for n in value.split(',') if n.strip()]
+    registry.preload(names)
+
+
+def watcher_from_env(registry: ModelRegistry) -> Optional[ArtifactWatcher]:
+    """Start an ArtifactWatcher polling every MODEL_WATCH_INTERVAL seconds (0 disables)"""
+    interval = float(os.environ.get('MODEL_WATCH_INTERVAL', 5))
+    if interval <= 0:
+        return None
+    return ArtifactWatcher(registry, interval).start()
@@ -0,0 +1,255 @@
+"""
+Latency-Aware Model Selection for the Tabular Risk Models
+Trains a grid of smaller / shallower variants of each production ensemble and
+records what every configuration costs to serve, not just how accurate it is
+
+For each candidate the report records test accuracy, single-row and batch
+latency through the compiled serving engine, pickle and compiled artifact
+size, and the time a worker needs to load it. Candidates that no other
+candidate beats on accuracy, single-row latency and compiled size at once
+form the Pareto frontier. One of them can then be promoted to the production
+artifact paths, where the running server's artifact watcher picks it up.
+
+Commands:
+    search    Fit the grid (in parallel), measure every candidate (serially)
+              and write <output>/<model>/report.json
+    promote   Install a candidate from a report as the production model
+
+Usage:
+    python model_selection.py search heart pcod --estimators 25 50 100 300 --depths 4 6 10 0
+    python model_selection.py promote heart --candidate n100-d10
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import joblib
+import numpy as np
+
+from benchmark_tabular import make_timer
+from train_models import CACHE_DIR, MODELS, add_models_argument, load_split
+from tree_ensemble import compiled_path, export_compiled, load_engine
+
+OUTPUT_DIR = 'selection'
+
+# Candidate grid: caps on trees per member and on depth (0 = production depth)
+DEFAULT_ESTIMATORS = [25, 50, 100, 300]
+DEFAULT_DEPTHS = [4, 6, 10, 0]
+
+BATCH_ROWS = 1000
+
+
+def candidate_id(n_estimators: int, depth: int) -> str:
+    return f"n{n_estimators}-d{depth or 'prod'}"
+
+
+def candidate_params(model, n_estimators: int, depth: int) -> Dict:
+    """
+    Nested VotingClassifier parameters for one grid point
+
+    Both values cap the production setting of every member, so the largest
+    grid point reproduces the production ensemble.
+    """
+    params = {}
+    for member, estimator in model.estimators:
+        params[f'{member}__n_estimators'] = min(n_estimators, estimator.n_estimators)
+        if depth:
+            production = estimator.max_depth
+            params[f'{member}__max_depth'] = depth if production is None else min(depth, production)
+    return params
+
+
+def fit_candidate(name: str, n_estimators: int, depth: int, rows: int, seed: int,
+                  cache_dir: str, directory: str) -> Dict:
+    """Fit one grid point on the cached split and save it like a production model"""
+    from sklearn.metrics import accuracy_score
+    from sklearn.preprocessing import StandardScaler
+
+    (X_train, X_test, y_train, y_test), _ = load_split(name, rows, seed, cache_dir)
+    scaler = StandardScaler().fit(X_train)
+
+    model = MODELS[name]['build'](1)
+    params = candidate_params(model, n_estimators, depth)
+    model.set_params(**params)
+    start = time.perf_counter()
+    model.fit(scaler.transform(X_train), y_train)
+    fit_seconds = time.perf_counter() - start
+
+    os.makedirs(directory, exist_ok=True)
+    model_path = os.path.join(directory, 'model.pkl')
+    scaler_path = os.path.join(directory, 'scaler.pkl')
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+    engine = export_compiled(model_path, scaler_path, model, scaler)
+
+    return {
+        "id": candidate_id(n_estimators, depth),
+        "params": params,
+        "accuracy": round(float(accuracy_score(y_test, engine.predict(X_test))), 4),
+        "fit_seconds": round(fit_seconds, 2),
+        "trees": engine.n_trees,
+        "nodes": engine.n_nodes,
+        "directory": directory
+    }
+
+
+def directory_bytes(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def measure_candidate(candidate: Dict, X: np.ndarray, repeats: int) -> Dict:
+    """Serving cost of a saved candidate: load time, latency and artifact size"""
+    model_path = os.path.join(candidate['directory'], 'model.pkl')
+    scaler_path = os.path.join(candidate['directory'], 'scaler.pkl')
+
+    start = time.perf_counter()
+    engine = load_engine(model_path, scaler_path, 'compiled', 'r')
+    # A worker is ready once its first request has faulted in the pages it needs
+    engine.predict_proba(X[:1])
+    load_ms = (time.perf_counter() - start) * 1000.0
+
+    timer = make_timer(repeats)
+    single, batch = timer(lambda: engine.predict_proba(X[:1])), timer(lambda: engine.predict_proba(X))
+    return {
+        **candidate,
+        "load_ms": round(load_ms, 2),
+        "single_p50_ms": single['p50_ms'],
+        "single_p95_ms": single['p95_ms'],
+        "batch_p50_ms": batch['p50_ms'],
+        "pickle_bytes": directory_bytes(model_path),
+        "compiled_bytes": directory_bytes(compiled_path(model_path))
+    }
+
+
+def pareto_frontier(candidates: List[Dict]) -> List[str]:
+    """
+    Ids of candidates not dominated on (accuracy ↑, single-row p50 ↓, compiled size ↓)
+
+    A candidate is dominated when another is at least as good on all three
+    and strictly better on one.
+    """
+    def key(c):
+        return (-c['accuracy'], c['single_p50_ms'], c['compiled_bytes'])
+
+    frontier = []
+    for c in candidates:
+        dominated = any(
+            all(a <= b for a, b in zip(key(o), key(c))) and key(o) != key(c)
+            for o in candidates if o is not c
+        )
+        if not dominated:
+            frontier.append(c['id'])
+    return frontier
+
+
+def search(args):
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, os.cpu_count() or 1))
+    for name in dict.fromkeys(args.models):
+        rows = args.rows or MODELS[name]['rows']
+        out = os.path.join(args.output, name)
+        grid = [(n, d) for n in args.estimators for d in args.depths]
+        print(f"\n{MODELS[name]['title']}: fitting {len(grid)} candidates ({jobs} at a time)...")
+
+        # Fits run in parallel; latency is measured afterwards, one candidate at a time
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(fit_candidate, name, n, d, rows, args.seed, args.cache_dir,
+                                   os.path.join(out, candidate_id(n, d))) for n, d in grid]
+            fitted = [future.result() for future in futures]
+
+        (_, X_test, _, _), _ = load_split(name, rows, args.seed, args.cache_dir)
+        X = np.resize(X_test, (BATCH_ROWS, X_test.shape[1]))
+        candidates = [measure_candidate(c, X, args.repeats) for c in fitted]
+        frontier = pareto_frontier(candidates)
+
+        report = {
+            "model": name,
+            "rows": rows,
+            "seed": args.seed,
+            "batch_rows": BATCH_ROWS,
+            "candidates": candidates,
+            "frontier": frontier,
+            "promoted": None
+        }
+        with open(os.path.join(out, 'report.json'), 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+        print("=" * 96)
+        print(f"{'candidate':<14}{'acc':>8}{'trees':>7}{'p50 x1':>10}{'p95 x1':>10}"
+              f"{f'p50 x{BATCH_ROWS}':>12}{'load':>9}{'pickle':>10}{'compiled':>10}")
+        print("-" * 96)
+        for c in sorted(candidates, key=lambda c: c['single_p50_ms']):
+            marker = '*' if c['id'] in frontier else ' '
+            print(f"{marker}{c['id']:<13}{c['accuracy'] * 100:>7.2f}%{c['trees']:>7}{c['single_p50_ms']:>8.2f}ms"
+                  f"{c['single_p95_ms']:>8.2f}ms{c['batch_p50_ms']:>10.1f}ms{c['load_ms']:>7.1f}ms"
+                  f"{c['pickle_bytes'] / 1e6:>8.1f}MB{c['compiled_bytes'] / 1e6:>8.1f}MB")
+        print("=" * 96)
+        print(f"* Pareto frontier (accuracy / single-row latency / compiled size): {', '.join(frontier)}")
+        print(f"✓ Report written to {os.path.join(out, 'report.json')}")
+
+
+def promote(args):
+    """Copy a candidate over the production artifacts; files are replaced atomically"""
+    report_path = os.path.join(args.output, args.model, 'report.json')
+    with open(report_path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    candidates = {c['id']: c for c in report['candidates']}
+    if args.candidate not in candidates:
+        raise SystemExit(f"Unknown candidate '{args.candidate}'. Choose from: {', '.join(candidates)}")
+    candidate = candidates[args.candidate]
+    if candidate['id'] not in report['frontier'] and not args.force:
+        raise SystemExit(f"{candidate['id']} is not on the Pareto frontier ({', '.join(report['frontier'])}); "
+                         "pass --force to promote it anyway")
+
+    spec = MODELS[args.model]
+    for source, target in ((os.path.join(candidate['directory'], 'scaler.pkl'), spec['scaler_path']),
+                           (os.path.join(candidate['directory'], 'model.pkl'), spec['model_path'])):
+        tmp_path = f"{target}.tmp-{os.getpid()}"
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+    export_compiled(spec['model_path'], spec['scaler_path'])
+
+    report['promoted'] = {"id": candidate['id'], "at": time.time()}
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Promoted {args.model} candidate {candidate['id']} to {spec['model_path']} "
+          f"(accuracy {candidate['accuracy'] * 100:.2f}%, single-row p50 {candidate['single_p50_ms']:.2f}ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy / latency / size model selection")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('search', help="Fit and measure a grid of candidate configurations")
+    add_models_argument(p, 'search')
+    p.add_argument('--estimators', nargs='+', type=int, default=DEFAULT_ESTIMATORS,
+                   help="Caps on trees per ensemble member")
+    p.add_argument('--depths', nargs='+', type=int, default=DEFAULT_DEPTHS,
+                   help="Depth caps for both members (0 keeps the production depth)")
+    p.add_argument('--rows', type=int, help="Dataset size (default: the training size of each model)")
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--cache-dir', default=CACHE_DIR, help="Split cache shared with train_models.py")
+    p.add_argument('--jobs', type=int, default=0, help="Candidates fitted at once (default: core count)")
+    p.add_argument('--repeats', type=int, default=50, help="Timed runs per latency measurement")
+    p.add_argument('--output', default=OUTPUT_DIR)
+    p.set_defaults(func=search)
+
+    p = sub.add_parser('promote', help="Install a searched candidate as the production model")
+    p.add_argument('model', choices=list(MODELS))
+    p.add_argument('--candidate', required=True, help="Candidate id from the report, e.g. n100-d10")
+    p.add_argument('--force', action='store_true', help="Allow candidates off the Pareto frontier")
+    p.add_argument('--output', default=OUTPUT_DIR)
+    p.set_defaults(func=promote)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Pneumonia Model Definition
+Builds the VGG19 chest X-ray classifier and loads its trained weights
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+from tensorflow.keras.models import Model
+from tensorflow.keras.layers import (
+    AveragePooling2D, Conv2D, Dense, Dropout, Flatten, GlobalAveragePooling2D, Input, MaxPooling2D
+)
+from tensorflow.keras.applications.vgg19 import VGG19
+
+WEIGHTS_PATH = 'vgg_unfrozen.h5'
+SCREENING_WEIGHTS_PATH = 'screening_cnn.weights.h5'
+INPUT_SHAPE = (224, 224, 3)
+
+# Keras 3 save_weights refuses any other file name; load_weights still reads plain .h5 files
+WEIGHTS_SUFFIX = '.weights.h5'
+
+# Head variants: 'flatten' is the trained original, 'svd' factorizes the first
+# dense layer through a rank-r bottleneck, 'gap' pools instead of flattening
+HEAD_TYPES = ('flatten', 'svd', 'gap')
+
+
+def build_pneumonia_model(head: str = 'flatten', rank: Optional[int] = None) -> Model:
+    """
+    Build the VGG19 backbone with the 4608/1152 dense classification head
+
+    Args:
+        head: One of HEAD_TYPES
+        rank: Bottleneck width of the 'svd' head
+    """
+    if head not in HEAD_TYPES:
+        raise ValueError(f"Unknown head type '{head}' (choose from {', '.join(HEAD_TYPES)})")
+
+    base_model = VGG19(include_top=False, input_shape=INPUT_SHAPE)
+    x = base_model.output
+    if head == 'gap':
+        x = GlobalAveragePooling2D()(x)
+    else:
+        x = Flatten()(x)
+    if head == 'svd':
+        if not rank:
+            raise ValueError("The 'svd' head requires a rank")
+        x = Dense(rank, use_bias=False, name='dense1_factor')(x)
+    dense1 = Dense(4608, activation='relu')(x)
+    drop_out = Dropout(0.2)(dense1)
+    dense2 = Dense(1152, activation='relu')(drop_out)
+    output = Dense(2, activation='softmax')(dense2)
+
+    return Model(inputs=base_model.input, outputs=output)
+
+
+def build_screening_model() -> Model:
+    """
+    Build the small first-stage CNN of the cascade
+
+    Takes the same 224x224 input as the full model but immediately pools it
+    to 112x112, so callers share one preprocessing path.
+    """
+    inputs = Input(shape=INPUT_SHAPE)
+    x = AveragePooling2D(2)(inputs)
+    for filters in (16, 32, 64, 128):
+        x = Conv2D(filters, 3, padding='same', activation='relu')(x)
+        x = MaxPooling2D(2)(x)
+    x = GlobalAveragePooling2D()(x)
+    x = Dense(64, activation='relu')(x)
+    x = Dropout(0.2)(x)
+    output = Dense(2, activation='softmax')(x)
+
+    return Model(inputs=inputs, outputs=output, name='screening_cnn')
+
+
+def weights_stem(weights_path: str) -> str:
+    """Weights path without its suffix: vgg_svd256.weights.h5 -> vgg_svd256"""
+    if weights_path.endswith(WEIGHTS_SUFFIX):
+        return weights_path[:-len(WEIGHTS_SUFFIX)]
+    return os.path.splitext(weights_path)[0]
+
+
+def keras_weights_path(path: str) -> str:
+    """Name save_weights accepts on every Keras version: vgg_svd256.h5 -> vgg_svd256.weights.h5"""
+    return path if path.endswith(WEIGHTS_SUFFIX) else weights_stem(path) + WEIGHTS_SUFFIX
+
+
+def head_config_path(weights_path: str) -> str:
+    """Sidecar JSON describing the head architecture of a weights file"""
+    return weights_stem(weights_path) + '.json'
+
+
+def read_head_config(weights_path: str) -> Dict:
+    """Head config stored next to the weights; the original flatten head if absent"""
+    config_path = head_config_path(weights_path)
+    if os.path.exists(config_path):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {"head": "flatten"}
+
+
+def load_pneumonia_model(weights_path: str = WEIGHTS_PATH) -> Model:
+    """
+    Build the model and load trained weights if they exist
+
+    Compressed variants written by compress_model.py carry a sidecar JSON
+    with their head architecture, so any of them can be loaded here.
+
+    Args:
+        weights_path: Path to the Keras weights file
+    """
+    config = read_head_config(weights_path)
+    model = build_pneumonia_model(config.get('head', 'flatten'), config.get('rank'))
+
+    if os.path.exists(weights_path):
+        model.load_weights(weights_path)
+        print(f"Pneumonia model loaded successfully ({os.path.basename(weights_path)}, {config.get('head', 'flatten')} head)")
+    else:
+        print(f"Warning: {weights_path} not found. Pneumonia detection may not work.")
+
+    return model
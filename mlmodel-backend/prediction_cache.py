@@ -0,0 +1,182 @@
+"""
+Content-Addressed Prediction Cache
+Caches image classification results keyed on image bytes and model weight version
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from lru import LRUCache
+
+
+def file_fingerprint(path: str, chunk_size: int = 1 << 20) -> Optional[str]:
+    """SHA-256 of a file's contents, or None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """Two-tier (memory LRU + optional disk) cache of (prediction, confidence) results"""
+
+    def __init__(self, weights_path: str, max_entries: int = 1024,
+                 disk_dir: Optional[str] = None, check_interval: Optional[float] = 1.0, tag: str = '',
+                 weights_version: Optional[str] = None):
+        """
+        Initialize prediction cache
+
+        Args:
+            weights_path: Model weights file; its content hash versions every entry
+            max_entries: Size bound of the in-memory LRU tier
+            disk_dir: Directory for the persistent tier (disabled when None)
+            check_interval: Minimum seconds between checks of the weights file;
+                None pins the version to the weights present at construction
+            tag: Extra version component, e.g. the inference backend serving the weights
+            weights_version: Content hash of the weights the caller already
+                computed (e.g. the registry's artifact version); skips reading
+                the weights file again
+        """
+        self.weights_path = weights_path
+        self.tag = tag
+        self.disk_dir = disk_dir
+        self.check_interval = check_interval
+        self.memory = LRUCache(max_entries)
+
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.invalidations = 0
+
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._weights_stat = self._stat_weights()
+        self.model_version = self._compute_version(weights_version)
+
+    def _stat_weights(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.weights_path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _compute_version(self, weights_version: Optional[str] = None) -> str:
+        version = weights_version or file_fingerprint(self.weights_path) or 'unversioned'
+        if self.tag:
+            version = hashlib.sha256(f"{version}:{self.tag}".encode()).hexdigest()
+        return version
+
+    def _check_version(self):
+        """Invalidate all entries if the weights file changed since the last check"""
+        if self.check_interval is None:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            self._last_check = now
+            current = self._stat_weights()
+            if current == self._weights_stat:
+                return
+            self._weights_stat = current
+            version = self._compute_version()
+            if version == self.model_version:
+                return
+            print(f"Model weights changed ({self.model_version[:12]} -> {version[:12]}), invalidating prediction cache")
+            self.model_version = version
+            self.memory.clear()
+            self.invalidations += 1
+            self.prune_disk()
+
+    def _version_dir(self) -> str:
+        return os.path.join(self.disk_dir, self.model_version[:16])
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self._version_dir(), key[:2], f"{key}.json")
+
+    def prune_disk(self):
+        """
+        Remove disk entries written for other weight versions
+
+        Not done on construction: a cache built for a candidate version must
+        leave the disk tier of the version still being served alone. The owner
+        calls this once the new version is served (the registry's on_served
+        hook); a self-versioning cache calls it when its weights change.
+        """
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return
+        current = self.model_version[:16]
+        for name in os.listdir(self.disk_dir):
+            if name != current:
+                shutil.rmtree(os.path.join(self.disk_dir, name), ignore_errors=True)
+
+    @staticmethod
+    def key_for(image_bytes: bytes) -> str:
+        """Content hash used as the cache key"""
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[int, float]]:
+        """
+        Look up a cached result
+
+        Args:
+            key: Value from key_for()
+
+        Returns:
+            (prediction, confidence) tuple, or None on a miss
+        """
+        self._check_version()
+        version = self.model_version
+
+        result = self.memory.get((version, key))
+        if result is not None or not self.disk_dir:
+            return result
+
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.disk_misses += 1
+            return None
+
+        self.disk_hits += 1
+        result = (int(entry['prediction']), float(entry['confidence']))
+        self.memory.put((version, key), result)
+        return result
+
+    def put(self, key: str, prediction: int, confidence: float):
+        """Store a result in both tiers"""
+        version = self.model_version
+        result = (int(prediction), float(confidence))
+        self.memory.put((version, key), result)
+
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"prediction": result[0], "confidence": result[1]}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not write prediction cache entry: {e}")
+
+    def get_stats(self) -> Dict:
+        """Get hit/miss statistics for both tiers"""
+        stats = self.memory.get_stats()
+        stats.update({
+            "model_version": self.model_version[:12],
+            "disk_enabled": bool(self.disk_dir),
+            "disk_hits": self.disk_hits,
+            "disk_misses": self.disk_misses,
+            "invalidations": self.invalidations
+        })
+        return stats
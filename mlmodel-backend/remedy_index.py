@@ -0,0 +1,212 @@
+"""
+Vector Index Construction for Remedy Search
+Builds the FAISS index behind SemanticRemedySearch as an exact flat scan, an
+HNSW graph or an IVF index with a trained coarse quantizer, storing vectors as
+float32, float16, 8-bit scalar-quantized or product-quantized codes
+
+Every index searches unit-normalized vectors by inner product, so scores are
+cosine similarities. Build-time settings (HNSW M / efConstruction, IVF nlist)
+are recorded in the index manifest and changing them rebuilds the index from
+the saved embeddings; search-time settings (efSearch, nprobe) apply to
+whatever index is loaded.
+
+Bytes per 384-dimensional vector in the index (graph links / list ids extra):
+    float32   1536    exact
+    float16    768    SQfp16, recall practically unchanged
+    sq8        384    per-dimension 8-bit scalar quantizer
+    pq         REMEDY_PQ_M (48)    product quantizer, 8 bits per sub-vector
+
+Configuration (environment):
+    REMEDY_INDEX                   flat (default), hnsw or ivf
+    REMEDY_HNSW_M                  Graph neighbours per node (32)
+    REMEDY_HNSW_EF_CONSTRUCTION    Candidate list while building (200)
+    REMEDY_HNSW_EF_SEARCH          Candidate list while searching (64)
+    REMEDY_IVF_NLIST               Inverted lists, 0 = about 4 * sqrt(rows) (0)
+    REMEDY_IVF_NPROBE              Lists scanned per query (16)
+    REMEDY_INDEX_CODEC             float32 (default), float16, sq8 or pq
+    REMEDY_PQ_M                    PQ sub-vectors; must divide the dimension (48)
+    REMEDY_EMBEDDINGS_DTYPE        Saved raw embedding matrix: float32 (default) or float16
+"""
+
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+INDEX_TYPES = ('flat', 'hnsw', 'ivf')
+CODECS = ('float32', 'float16', 'sq8', 'pq')
+EMBEDDING_DTYPES = ('float32', 'float16')
+
+# Below this many vectors an IVF index has too little data to train; a flat scan is used instead
+MIN_IVF_ROWS = 1000
+# FAISS k-means wants at least 39 training points per centroid; more than 256 adds nothing
+MIN_POINTS_PER_LIST = 39
+TRAIN_POINTS_PER_LIST = 256
+# PQ trains 256 centroids per sub-vector; below 39 points each it falls back to sq8
+MIN_PQ_ROWS = 256 * MIN_POINTS_PER_LIST
+# Training sample for quantizers that are not tied to IVF lists
+TRAIN_ROWS = 65536
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Unit-length float32 rows, so inner product equals cosine similarity"""
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class IndexConfig:
+    """Index type with its build-time and search-time parameters"""
+
+    def __init__(self, kind: str = 'flat', hnsw_m: int = 32, ef_construction: int = 200,
+                 ef_search: int = 64, nlist: int = 0, nprobe: int = 16, codec: str = 'float32',
+                 pq_m: int = 48, embeddings_dtype: str = 'float32'):
+        """
+        Initialize configuration
+
+        Args:
+            kind: 'flat', 'hnsw' or 'ivf'
+            hnsw_m: HNSW neighbours per node
+            ef_construction: HNSW candidate list size while building
+            ef_search: HNSW candidate list size while searching
+            nlist: IVF inverted lists (0 = chosen from the number of vectors)
+            nprobe: IVF lists scanned per query
+            codec: How the index stores vectors: float32, float16, sq8 or pq
+            pq_m: Sub-vectors (bytes per vector) of the pq codec
+            embeddings_dtype: dtype of the raw matrix saved for rebuilds
+        """
+        if kind not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{kind}'. Choose from: {', '.join(INDEX_TYPES)}")
+        if codec not in CODECS:
+            raise ValueError(f"Unknown index codec '{codec}'. Choose from: {', '.join(CODECS)}")
+        if embeddings_dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Unknown embeddings dtype '{embeddings_dtype}'. Choose from: {', '.join(EMBEDDING_DTYPES)}")
+        self.kind = kind
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.codec = codec
+        self.pq_m = pq_m
+        self.embeddings_dtype = embeddings_dtype
+
+    def settings(self) -> Dict:
+        """Build-time settings; an index saved with different ones is rebuilt"""
+        if self.kind == 'hnsw':
+            settings = {"type": "hnsw", "M": self.hnsw_m, "efConstruction": self.ef_construction}
+        elif self.kind == 'ivf':
+            settings = {"type": "ivf", "nlist": self.nlist}
+        else:
+            settings = {"type": "flat"}
+        settings.update({"codec": self.codec, "embeddings_dtype": self.embeddings_dtype})
+        if self.codec == 'pq':
+            settings["pq_m"] = self.pq_m
+        return settings
+
+    def lists_for(self, n: int) -> int:
+        """IVF list count for n vectors, capped so every centroid gets enough training points"""
+        nlist = self.nlist or int(4 * np.sqrt(n))
+        return int(max(1, min(nlist, n // MIN_POINTS_PER_LIST)))
+
+    def codec_for(self, n: int) -> str:
+        """Codec used for n vectors: pq needs enough of them to train its codebooks"""
+        return 'sq8' if self.codec == 'pq' and n < MIN_PQ_ROWS else self.codec
+
+    def factory_string(self, n: int, dim: int = 384) -> str:
+        """faiss.index_factory description of the index built for n vectors of size dim"""
+        codec = self.codec_for(n)
+        if codec == 'pq' and dim % self.pq_m:
+            raise ValueError(f"REMEDY_PQ_M={self.pq_m} does not divide the embedding dimension {dim}")
+        storage = {'float32': "Flat", 'float16': "SQfp16", 'sq8': "SQ8", 'pq': f"PQ{self.pq_m}"}[codec]
+        if self.kind == 'hnsw':
+            return f"HNSW{self.hnsw_m},{storage}"
+        if self.kind == 'ivf' and n >= MIN_IVF_ROWS:
+            return f"IVF{self.lists_for(n)},{storage}"
+        return storage
+
+    def build(self, vectors: np.ndarray, seed: int = 0):
+        """
+        Build and fill an index over normalized vectors
+
+        Args:
+            vectors: (n, d) unit-length float32 vectors
+            seed: Seed of the IVF training sample
+
+        Returns:
+            FAISS index searching by inner product, with search parameters applied
+        """
+        import faiss
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n, dim = vectors.shape
+        description = self.factory_string(n, dim)
+        if self.kind == 'ivf' and not description.startswith("IVF"):
+            print(f"Note: {n} vectors are too few to train an IVF index; using a flat index")
+        if self.codec_for(n) != self.codec:
+            print(f"Note: {n} vectors are too few to train PQ codebooks; storing them as sq8")
+        index = faiss.index_factory(dim, description, faiss.METRIC_INNER_PRODUCT)
+
+        hnsw = getattr(index, 'hnsw', None)
+        if hnsw is not None:
+            hnsw.efConstruction = self.ef_construction
+        if not index.is_trained:
+            rows = min(n, max(TRAIN_ROWS, self.lists_for(n) * TRAIN_POINTS_PER_LIST if self.kind == 'ivf' else 0))
+            sample = vectors[np.sort(np.random.default_rng(seed).choice(n, rows, replace=False))]
+            index.train(sample)
+        if n:
+            index.add(vectors)
+        return self.configure(index)
+
+    def configure(self, index):
+        """Apply the search-time parameters the index type understands"""
+        import faiss
+
+        params = faiss.ParameterSpace()
+        if getattr(index, 'hnsw', None) is not None:
+            params.set_index_parameter(index, 'efSearch', self.ef_search)
+        elif hasattr(index, 'nprobe'):
+            params.set_index_parameter(index, 'nprobe', self.nprobe)
+        return index
+
+    def describe(self, index=None) -> Dict:
+        """Settings for stats and reports, with the parameters in effect on index"""
+        info = {"type": self.kind, "codec": self.codec, "embeddings_dtype": self.embeddings_dtype}
+        if self.codec == 'pq':
+            info["pq_m"] = self.pq_m
+        if index is not None:
+            info["code_bytes_per_vector"] = code_bytes(index)
+        if self.kind == 'hnsw':
+            info.update({"M": self.hnsw_m, "efConstruction": self.ef_construction, "efSearch": self.ef_search})
+        elif self.kind == 'ivf':
+            info.update({"nlist": getattr(index, 'nlist', None) if index is not None else self.nlist,
+                         "nprobe": self.nprobe})
+        return info
+
+
+def code_bytes(index) -> Optional[int]:
+    """Bytes of vector code stored per vector (HNSW links and IVF list ids are extra)"""
+    import faiss
+
+    for candidate in (index, getattr(index, 'storage', None)):
+        if candidate is None:
+            continue
+        size = getattr(faiss.downcast_index(candidate), 'code_size', None)
+        if size is not None:
+            return int(size)
+    return None
+
+
+def index_config_from_env() -> IndexConfig:
+    """Index configuration from the REMEDY_INDEX* environment variables"""
+    return IndexConfig(
+        kind=os.environ.get('REMEDY_INDEX', 'flat').lower(),
+        hnsw_m=int(os.environ.get('REMEDY_HNSW_M', 32)),
+        ef_construction=int(os.environ.get('REMEDY_HNSW_EF_CONSTRUCTION', 200)),
+        ef_search=int(os.environ.get('REMEDY_HNSW_EF_SEARCH', 64)),
+        nlist=int(os.environ.get('REMEDY_IVF_NLIST', 0)),
+        nprobe=int(os.environ.get('REMEDY_IVF_NPROBE', 16)),
+        codec=os.environ.get('REMEDY_INDEX_CODEC', 'float32').lower(),
+        pq_m=int(os.environ.get('REMEDY_PQ_M', 48)),
+        embeddings_dtype=os.environ.get('REMEDY_EMBEDDINGS_DTYPE', 'float32').lower()
+    )
@@ -0,0 +1,217 @@
+"""
+Append-Only Log of Added Remedies
+Durable write path for /desiremedy/add: each new remedy (and its embedding,
+when the search engine is loaded) is appended as one JSON line instead of
+rewriting the dataset, index and embeddings files
+
+The snapshot (desi_remedies_dataset.json plus the saved index) is the state
+at the last compaction; the log holds everything added since. Every record
+carries the dataset position it was appended at, so replaying a log over a
+snapshot that already contains some of its records skips them, which keeps
+a compaction interrupted between writing the snapshot and truncating the log
+harmless. Compaction runs on a background thread once COMPACT_EVERY records
+are pending.
+"""
+
+import base64
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+LOG_PATH = 'models/remedies_log.jsonl'
+
+# Records pending before a background compaction merges them into the snapshot
+COMPACT_EVERY = int(os.environ.get('REMEDY_LOG_COMPACT_EVERY', 256))
+
+# fsync every append so an acknowledged add survives a crash; REMEDY_LOG_FSYNC=0 trades that for speed
+FSYNC = os.environ.get('REMEDY_LOG_FSYNC', '1').lower() not in ('0', 'false', 'no')
+
+
+def encode_vector(vector: np.ndarray) -> str:
+    """Exact, compact text form of a float32 vector"""
+    return base64.b64encode(np.ascontiguousarray(vector, dtype=np.float32).tobytes()).decode('ascii')
+
+
+def decode_vector(text: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(text), dtype=np.float32)
+
+
+def save_dataset(path: str, remedies: List[Dict]) -> None:
+    """Write the dataset JSON via a temporary file so readers never see half of it"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(remedies, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class RemedyLog:
+    """Append-only JSON-lines log of remedies added since the last snapshot"""
+
+    def __init__(self, path: str = LOG_PATH, compact_every: int = COMPACT_EVERY):
+        """
+        Initialize log
+
+        Args:
+            path: Log file
+            compact_every: Pending records that trigger a background compaction (0 = never)
+        """
+        self.path = path
+        self.compact_every = max(0, compact_every)
+        self.pending = self._count_records()
+        self.compactions = 0
+        self.last_compaction_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._compacting = False
+
+    def _count_records(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return sum(1 for line in f if line.strip())
+
+    def append(self, position: int, remedy: Dict, embedding: Optional[np.ndarray] = None,
+               encoder: Optional[str] = None) -> None:
+        """
+        Durably record one added remedy
+
+        Args:
+            position: Index of the remedy in the dataset list
+            remedy: Remedy entry
+            embedding: Its embedding, if one was computed
+            encoder: Model and version that produced the embedding
+        """
+        record = {"position": position, "remedy": remedy}
+        if embedding is not None:
+            record["encoder"] = encoder
+            record["embedding"] = encode_vector(embedding)
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                if FSYNC:
+                    os.fsync(f.fileno())
+            self.pending += 1
+
+    def records(self) -> List[Dict]:
+        """Records in append order; a torn last line from a crash mid-append is ignored"""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    print(f"Warning: Skipping unreadable record in {self.path}")
+        return records
+
+    def replay(self, remedies: List[Dict], encoder: Optional[str] = None) -> List[Tuple[int, Optional[np.ndarray]]]:
+        """
+        Append the logged remedies that the snapshot does not contain yet
+
+        Args:
+            remedies: Snapshot dataset, extended in place
+            encoder: Current embedding model; logged embeddings from another one are dropped
+
+        Returns:
+            (position, embedding or None) for every remedy appended
+        """
+        replayed = []
+        for record in self.records():
+            position = record.get('position')
+            if position is None or position < len(remedies):
+                # Already merged by a compaction
+                continue
+            if position > len(remedies):
+                print(f"Warning: {self.path} skips from position {len(remedies)} to {position}; "
+                      f"ignoring the remaining records")
+                break
+            remedies.append(record['remedy'])
+            embedding = None
+            if 'embedding' in record and encoder is not None and record.get('encoder') == encoder:
+                embedding = decode_vector(record['embedding'])
+            replayed.append((position, embedding))
+        if replayed:
+            print(f"✓ Replayed {len(replayed)} remedies from {self.path}")
+        return replayed
+
+    def truncate(self, upto: int) -> None:
+        """Drop records at positions below upto, which a snapshot now contains"""
+        with self._lock:
+            kept = [record for record in self.records() if record.get('position', 0) >= upto]
+            tmp_path = f"{self.path}.tmp-{os.getpid()}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in kept:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.pending = len(kept)
+
+    def should_compact(self) -> bool:
+        return self.compact_every > 0 and self.pending >= self.compact_every and not self._compacting
+
+    def compact_in_background(self, compact: Callable[[], None]) -> bool:
+        """
+        Run compact on a daemon thread unless a compaction is already running
+
+        Returns:
+            True if a compaction was started
+        """
+        with self._lock:
+            if self._compacting:
+                return False
+            self._compacting = True
+
+        def run():
+            try:
+                compact()
+                self.compactions += 1
+                self.last_compaction_error = None
+            except Exception as e:
+                self.last_compaction_error = str(e)
+                print(f"Warning: Remedy log compaction failed: {e}")
+            finally:
+                self._compacting = False
+
+        threading.Thread(target=run, name='remedy-log-compaction', daemon=True).start()
+        return True
+
+    def compact_dataset(self, dataset_path: str, remedies: List[Dict]) -> None:
+        """Compaction without a search engine: merge the log into the dataset JSON only"""
+        upto = len(remedies)
+        save_dataset(dataset_path, list(remedies[:upto]))
+        self.truncate(upto)
+        print(f"✓ Compacted remedy log into {dataset_path} ({upto} remedies)")
+
+    def get_stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "pending": self.pending,
+            "compact_every": self.compact_every,
+            "compacting": self._compacting,
+            "compactions": self.compactions,
+            "last_compaction_error": self.last_compaction_error
+        }
+
+
+# Global instance
+_remedy_log = None
+
+def get_remedy_log() -> RemedyLog:
+    """Get or create the global remedy log shared by the API and the search engine"""
+    global _remedy_log
+    if _remedy_log is None:
+        _remedy_log = RemedyLog()
+    return _remedy_log
@@ -0,0 +1,343 @@
+"""
+Offline Bulk Re-Scoring of Archived X-ray Studies
+Runs the VGG19 backbone once per image into a memory-mapped feature store,
+then evaluates any classification head against the store
+
+Commands:
+    extract   Stream images from a directory, .zip or .tar archive, decode them
+              in parallel and store backbone features (float16) in
+              <store>/features.npy with ids in <store>/ids.txt; an interrupted
+              run resumes, skipping the rows already stored
+    score     Apply a head (any weights file from compress_model.py or the
+              original vgg_unfrozen.h5) to the stored features and write a
+              columnar results file; refuses weights whose backbone differs
+              from the one that produced the store
+
+Usage:
+    python rescore_archive.py extract --source /archive/xrays.tar --store features/ --features flatten
+    python rescore_archive.py score --store features/ --weights vgg_unfrozen.h5 --output results.parquet
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Container, Iterator, List, Tuple
+
+import numpy as np
+
+from image_decode import decode_to_tensor
+from inference_backends import KerasBackend
+from pneumonia_model import WEIGHTS_PATH, load_pneumonia_model, read_head_config
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff', '.dcm')
+
+# Backbone output is 7x7x512; 'flatten' keeps all of it, 'gap' averages over space
+FEATURE_DIMS = {'flatten': 7 * 7 * 512, 'gap': 512}
+
+
+def list_entries(source: str) -> List[str]:
+    """Image ids (relative paths / member names) in a directory or archive, sorted"""
+    if os.path.isdir(source):
+        entries = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    entries.append(os.path.relpath(os.path.join(root, name), source))
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            entries = [n for n in zf.namelist() if n.lower().endswith(IMAGE_EXTENSIONS)]
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as tf:
+            entries = [m.name for m in tf.getmembers() if m.isfile() and m.name.lower().endswith(IMAGE_EXTENSIONS)]
+    else:
+        raise ValueError(f"{source} is not a directory, zip or tar archive")
+    return sorted(entries)
+
+
+def read_entries(source: str, entries: List[str], skip: Container[int] = ()) -> Iterator[Tuple[int, bytes]]:
+    """Yield (row, bytes) for each entry not in skip; reads are sequential, decoding is not"""
+    if os.path.isdir(source):
+        for row, name in enumerate(entries):
+            if row not in skip:
+                with open(os.path.join(source, name), 'rb') as f:
+                    yield row, f.read()
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            for row, name in enumerate(entries):
+                if row not in skip:
+                    yield row, zf.read(name)
+    else:
+        rows = {name: row for row, name in enumerate(entries) if row not in skip}
+        # Stream members in archive order, which avoids seeking in compressed tars
+        with tarfile.open(source, mode='r|*') as tf:
+            for member in tf:
+                if member.name in rows:
+                    yield rows[member.name], tf.extractfile(member).read()
+
+
+def build_backbone(model, feature_kind: str):
+    """VGG19 convolutional part of the pneumonia model, producing pooled features"""
+    from tensorflow.keras.layers import Flatten, GlobalAveragePooling2D
+    from tensorflow.keras.models import Model
+
+    conv_out = model.get_layer('block5_pool').output
+    pooled = Flatten()(conv_out) if feature_kind == 'flatten' else GlobalAveragePooling2D()(conv_out)
+    return Model(inputs=model.input, outputs=pooled)
+
+
+def backbone_fingerprint(model) -> str:
+    """
+    SHA-256 over the VGG19 layer weights up to block5_pool
+
+    Heads written by compress_model.py copy and freeze the backbone, so they
+    share this fingerprint with the weights the features were extracted with
+    even though the files differ.
+    """
+    digest = hashlib.sha256()
+    for layer in model.layers:
+        for weights in layer.get_weights():
+            digest.update(np.ascontiguousarray(weights).tobytes())
+        if layer.name == 'block5_pool':
+            break
+    return digest.hexdigest()
+
+
+def build_head(model):
+    """Layers after the pooling step of a pneumonia model, as a standalone model on features"""
+    from tensorflow.keras.layers import Flatten, GlobalAveragePooling2D, Input
+    from tensorflow.keras.models import Model
+
+    layers = model.layers
+    start = next(i for i, layer in enumerate(layers) if isinstance(layer, (Flatten, GlobalAveragePooling2D)))
+    inputs = Input(shape=(int(layers[start].output.shape[-1]),))
+    x = inputs
+    for layer in layers[start + 1:]:
+        x = layer(x)
+    return Model(inputs=inputs, outputs=x)
+
+
+def _save_valid(store: str, valid: np.ndarray):
+    """Write valid.npy atomically, so an interrupted run never leaves a torn file"""
+    tmp_path = os.path.join(store, 'valid.tmp.npy')
+    np.save(tmp_path, valid)
+    os.replace(tmp_path, os.path.join(store, 'valid.npy'))
+
+
+def _resumable(store: str, entries: List[str], meta: dict) -> bool:
+    """Whether the store holds a (partial) run over the same images, features and backbone"""
+    try:
+        with open(os.path.join(store, 'meta.json'), 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        with open(os.path.join(store, 'ids.txt'), 'r', encoding='utf-8') as f:
+            ids = f.read().splitlines()
+    except (OSError, ValueError):
+        return False
+    same = all(previous.get(key) == meta[key] for key in ('features', 'dim', 'count', 'backbone_fingerprint'))
+    return same and ids == entries and all(os.path.exists(os.path.join(store, name))
+                                           for name in ('features.npy', 'valid.npy'))
+
+
+def extract(args):
+    entries = list_entries(args.source)
+    if not entries:
+        raise SystemExit(f"No images found in {args.source}")
+    os.makedirs(args.store, exist_ok=True)
+    dim = FEATURE_DIMS[args.features]
+
+    print(f"Loading backbone from {args.weights}...")
+    model = load_pneumonia_model(args.weights)
+    meta = {
+        "source": os.path.abspath(args.source),
+        "features": args.features,
+        "dim": dim,
+        "count": len(entries),
+        "backbone_weights": os.path.basename(args.weights),
+        "backbone_fingerprint": backbone_fingerprint(model),
+        "complete": False
+    }
+
+    features_path = os.path.join(args.store, 'features.npy')
+    # 1 = features stored, 0 = not yet extracted or decode failed
+    if not args.restart and _resumable(args.store, entries, meta):
+        features = np.load(features_path, mmap_mode='r+')
+        valid = np.load(os.path.join(args.store, 'valid.npy'))
+        print(f"Resuming: {int(valid.sum())}/{len(entries)} images already stored")
+    else:
+        features = np.lib.format.open_memmap(features_path, mode='w+', dtype=np.float16, shape=(len(entries), dim))
+        valid = np.zeros(len(entries), dtype=np.uint8)
+        with open(os.path.join(args.store, 'ids.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(entries) + '\n')
+        _save_valid(args.store, valid)
+    with open(os.path.join(args.store, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    stored = set(np.flatnonzero(valid).tolist())
+    remaining = len(entries) - len(stored)
+    backbone = KerasBackend(build_backbone(model, args.features))
+    backbone.warmup([args.batch_size])
+
+    print(f"Extracting {args.features} features ({dim} dims) for {remaining} images...")
+    start = time.perf_counter()
+    last_checkpoint = start
+    pending_rows, pending_tensors = [], []
+    done = failed = 0
+
+    def flush():
+        nonlocal done, last_checkpoint
+        batch = np.stack(pending_tensors)
+        features[pending_rows] = backbone.predict(batch).astype(np.float16)
+        valid[pending_rows] = 1
+        done += len(pending_rows)
+        pending_rows.clear()
+        pending_tensors.clear()
+        if time.perf_counter() - last_checkpoint >= args.checkpoint_seconds:
+            # Features reach the file before the rows are marked valid there
+            features.flush()
+            _save_valid(args.store, valid)
+            last_checkpoint = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        # Bounded window of in-flight decodes = prefetch depth
+        in_flight = deque()
+        reader = read_entries(args.source, entries, skip=stored)
+        window = args.workers * args.prefetch
+
+        def drain_one():
+            nonlocal failed
+            row, future = in_flight.popleft()
+            try:
+                tensor = future.result()
+            except Exception as e:
+                print(f"  Warning: {entries[row]}: {e}")
+                tensor = None
+            if tensor is None:
+                failed += 1
+                return
+            pending_rows.append(row)
+            pending_tensors.append(tensor)
+            if len(pending_rows) >= args.batch_size:
+                flush()
+                elapsed = time.perf_counter() - start
+                print(f"  {done}/{remaining} images ({done / elapsed:.1f} img/s)", end='\r')
+
+        for row, data in reader:
+            in_flight.append((row, pool.submit(decode_to_tensor, data)))
+            if len(in_flight) >= window:
+                drain_one()
+        while in_flight:
+            drain_one()
+        if pending_rows:
+            flush()
+
+    features.flush()
+    _save_valid(args.store, valid)
+    elapsed = time.perf_counter() - start
+    meta.update({
+        "stored": int(valid.sum()),
+        "failed": failed,
+        "complete": True,
+        "seconds": round(elapsed, 1)
+    })
+    with open(os.path.join(args.store, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    print(f"\n✓ Stored features for {done} images ({failed} failed) in {elapsed:.1f}s -> {args.store}")
+
+
+def score(args):
+    with open(os.path.join(args.store, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    head_kind = read_head_config(args.weights).get('head', 'flatten')
+    expected = 'gap' if head_kind == 'gap' else 'flatten'
+    if meta['features'] != expected:
+        raise SystemExit(f"{args.weights} has a '{head_kind}' head but the store holds '{meta['features']}' features")
+
+    features = np.load(os.path.join(args.store, 'features.npy'), mmap_mode='r')
+    valid = np.load(os.path.join(args.store, 'valid.npy')).astype(bool)
+    with open(os.path.join(args.store, 'ids.txt'), 'r', encoding='utf-8') as f:
+        ids = f.read().splitlines()
+
+    print(f"Loading head from {args.weights}...")
+    model = load_pneumonia_model(args.weights)
+    if backbone_fingerprint(model) != meta.get('backbone_fingerprint'):
+        message = (f"The backbone in {args.weights} differs from the one the store was extracted with "
+                   f"({meta.get('backbone_weights')}); its head would score features it was not trained on")
+        if not args.allow_backbone_mismatch:
+            raise SystemExit(f"{message}. Re-extract, or pass --allow-backbone-mismatch")
+        print(f"Warning: {message}")
+    if not meta.get('complete', True):
+        print("Warning: Feature extraction did not finish; rows it had not reached are scored as invalid")
+    head = KerasBackend(build_head(model))
+
+    start = time.perf_counter()
+    probs = np.full((len(ids), 2), np.nan, dtype=np.float32)
+    rows = np.flatnonzero(valid)
+    for i in range(0, len(rows), args.chunk_size):
+        chunk = rows[i:i + args.chunk_size]
+        probs[chunk] = head.predict(np.asarray(features[chunk], dtype=np.float32))
+    elapsed = time.perf_counter() - start
+    print(f"✓ Scored {len(rows)} images in {elapsed:.2f}s ({len(rows) / max(elapsed, 1e-9):.0f} img/s)")
+
+    import pandas as pd
+    filled = np.nan_to_num(probs)
+    prediction = np.where(valid, np.argmax(filled, axis=1), -1)
+    results = pd.DataFrame({
+        "id": ids,
+        "valid": valid,
+        "prediction": prediction.astype(np.int8),
+        "label": np.where(valid, np.where(prediction == 0, "Normal", "Pneumonia"), None),
+        "p_normal": probs[:, 0],
+        "p_pneumonia": probs[:, 1],
+        "confidence": np.where(valid, np.max(filled, axis=1) * 100.0, np.nan),
+    })
+
+    output = args.output
+    if output.endswith('.parquet'):
+        try:
+            results.to_parquet(output, index=False)
+        except ImportError:
+            output = output[:-len('.parquet')] + '.csv'
+            print("Warning: pyarrow not installed; writing CSV instead of Parquet")
+            results.to_csv(output, index=False)
+    else:
+        results.to_csv(output, index=False)
+    print(f"✓ Results written to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline bulk re-scoring with cached backbone features")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    ext = sub.add_parser('extract', help="Run the backbone over an archive into a feature store")
+    ext.add_argument('--source', required=True, help="Directory, .zip or .tar archive of images")
+    ext.add_argument('--store', required=True, help="Feature store directory")
+    ext.add_argument('--weights', default=WEIGHTS_PATH, help="Weights providing the VGG19 backbone")
+    ext.add_argument('--features', choices=sorted(FEATURE_DIMS), default='flatten')
+    ext.add_argument('--batch-size', type=int, default=64)
+    ext.add_argument('--workers', type=int, default=os.cpu_count() or 4, help="Parallel decode threads")
+    ext.add_argument('--prefetch', type=int, default=4, help="Decodes in flight per worker")
+    ext.add_argument('--checkpoint-seconds', type=float, default=60.0,
+                     help="How often progress is saved so an interrupted run can resume")
+    ext.add_argument('--restart', action='store_true', help="Extract every image again instead of resuming")
+    ext.set_defaults(func=extract)
+
+    sc = sub.add_parser('score', help="Evaluate a head over a feature store")
+    sc.add_argument('--store', required=True, help="Feature store directory")
+    sc.add_argument('--weights', default=WEIGHTS_PATH, help="Weights providing the head")
+    sc.add_argument('--output', default='rescore_results.parquet', help=".parquet or .csv results file")
+    sc.add_argument('--chunk-size', type=int, default=8192, help="Feature rows per head call")
+    sc.add_argument('--allow-backbone-mismatch', action='store_true',
+                    help="Only warn when the weights' backbone differs from the store's")
+    sc.set_defaults(func=score)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
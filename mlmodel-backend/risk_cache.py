@@ -0,0 +1,97 @@
+"""
+Quantized Memoization Cache for Tabular Risk Predictions
+Caches heart and PCOD class probabilities keyed on feature rows rounded to
+clinically meaningful precision and the model version that produced them
+
+Rows are snapped to the quantization grid before they are scored, hit or
+miss, so a response never depends on what happened to be cached.
+"""
+
+import os
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+from lru import LRUCache
+
+# Grid step per encoded feature, in encoder order
+QUANTIZATION_STEPS = {
+    # age (years), gender, blood pressure (mmHg), cholesterol (mg/dL), diabetes
+    'heart': (1.0, 1.0, 1.0, 1.0, 1.0),
+    # age (years), BMI (0.1 kg/m²), cycle length (days), period flow category
+    'pcod': (1.0, 0.1, 1.0, 1.0),
+}
+
+
+class QuantizedPredictionCache:
+    """LRU cache of probability vectors keyed on quantized feature rows"""
+
+    def __init__(self, steps: Sequence[float], max_entries: int = 4096):
+        """
+        Initialize cache
+
+        Args:
+            steps: Quantization step per feature
+            max_entries: Maximum number of cached rows
+        """
+        self.steps = np.asarray(steps, dtype=np.float64)
+        self.memory = LRUCache(max_entries)
+        self.model_version: Optional[str] = None
+
+    def quantize(self, features: np.ndarray) -> np.ndarray:
+        """Grid indices of a (n_features,) row; exact integers keep keys stable"""
+        return np.round(np.asarray(features, dtype=np.float64) / self.steps).astype(np.int64)
+
+    def predict_proba(self, features: np.ndarray, version: Optional[str],
+                      predict_proba: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        Class probabilities for one feature row, from the cache when possible
+
+        Args:
+            features: (n_features,) raw feature row
+            version: Version of the model behind predict_proba
+            predict_proba: Engine call used on a miss
+
+        Returns:
+            (n_classes,) probabilities of the quantized row
+        """
+        self.model_version = version
+        grid = self.quantize(features)
+        # The version is part of the key, so a reload needs no flush: the old model's
+        # entries stop being hit and age out of the LRU, and requests still in flight
+        # on one version never read or store results of another
+        key = (version, tuple(grid.tolist()))
+        probabilities = self.memory.get(key)
+        if probabilities is None:
+            probabilities = predict_proba((grid * self.steps)[np.newaxis])[0]
+            probabilities.setflags(write=False)
+            self.memory.put(key, probabilities)
+        return probabilities
+
+    def get_stats(self) -> Dict:
+        """Get size and hit-rate statistics"""
+        stats = self.memory.get_stats()
+        stats.update({
+            "model_version": self.model_version,
+            "steps": self.steps.tolist()
+        })
+        return stats
+
+
+def risk_caches_from_env() -> Dict[str, QuantizedPredictionCache]:
+    """
+    Caches enabled by TABULAR_CACHE_SIZE (entries per model, 0 = disabled,
+    the default) for the models listed in TABULAR_CACHE_MODELS (default heart,pcod)
+    """
+    size = int(os.environ.get('TABULAR_CACHE_SIZE', 0))
+    if size <= 0:
+        return {}
+    names = [name.strip() for name in os.environ.get('TABULAR_CACHE_MODELS', 'heart,pcod').split(',') if name.strip()]
+    unknown = [name for name in names if name not in QUANTIZATION_STEPS]
+    if unknown:
+        print(f"Warning: No quantization defined for {', '.join(unknown)}; not caching them")
+    caches = {name: QuantizedPredictionCache(QUANTIZATION_STEPS[name], size)
+              for name in names if name in QUANTIZATION_STEPS}
+    if caches:
+        print(f"✓ Risk prediction cache enabled for {', '.join(caches)} ({size} entries each)")
+    return caches
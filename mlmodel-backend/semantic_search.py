@@ -4,46 +4,126 @@ Uses sentence transformers for semantic embeddings and FAISS for vector search
 """
 
 import numpy as np
+import hashlib
 import json
 import os
+import threading
 from sentence_transformers import SentenceTransformer
 import faiss
 from typing import List, Dict, Tuple, Optional
-import pickle
 from datetime import datetime
 
+from lru import LRUCache
+from remedy_index import IndexConfig, index_config_from_env, normalize
+from remedy_log import get_remedy_log, save_dataset
+
+INDEX_PATH = 'models/remedies_index.faiss'
+EMBEDDINGS_PATH = 'models/remedies_embeddings.npy'
+# Written by older versions; removed the next time the index is saved
+LEGACY_EMBEDDINGS_PATH = 'models/remedies_embeddings.pkl'
+# What the saved index was built from; written after the index and embeddings
+MANIFEST_PATH = 'models/remedies_index.json'
+
+# Text encoded for each remedy; part of the manifest, so changing it re-encodes everything
+TEXT_TEMPLATE = "{query} {category} {remedy}"
+
+# Map the saved index and embeddings read-only so worker processes share the
+# page cache; MODEL_MMAP=0 reads them into private memory instead
+USE_MMAP = os.environ.get('MODEL_MMAP', '1').lower() not in ('0', 'false', 'no')
+
+# Query embeddings kept per engine (REMEDY_QUERY_CACHE_SIZE=0 disables the cache)
+QUERY_CACHE_SIZE = int(os.environ.get('REMEDY_QUERY_CACHE_SIZE', 1024))
+
+# Sentence punctuation and quotes stripped where they open or close a query (। and ॥ are Devanagari stops)
+EDGE_PUNCTUATION = '.,;:!?¡¿…।॥"\'“”‘’«»'
+
+
+def remedy_text(entry: Dict) -> str:
+    """Searchable text of a remedy: query, category and remedy text combined for better semantic matching"""
+    return TEXT_TEMPLATE.format(
+        query=entry.get('query', ''),
+        category=entry.get('category', ''),
+        remedy=entry.get('remedy', '')
+    )
+
+
+def normalize_query(query: str, lowercase: bool = False) -> str:
+    """
+    Form of a query that is both cached and encoded: whitespace collapsed and
+    sentence punctuation stripped from the ends, so ' Cold and cough! ' -> 'Cold and cough'
+    
+    Everything inside the query is kept ("Don't take 2.5g", '102°F'), so its
+    meaning is unchanged. lowercase also folds case, which is only safe for
+    models whose tokenizer lowercases anyway.
+    """
+    text = ' '.join(query.split())
+    text = text.strip(EDGE_PUNCTUATION + ' ') or text
+    return text.lower() if lowercase else text
+
+
+def text_hash(text: str) -> str:
+    """Short content hash identifying the embedding of one searchable text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def embedding_model_version() -> str:
+    """Version of the library that produced the embeddings"""
+    try:
+        import sentence_transformers
+        return f"sentence-transformers {sentence_transformers.__version__}"
+    except (ImportError, AttributeError):
+        return "unknown"
+
 
 class SemanticRemedySearch:
     """Semantic search engine for remedies using embeddings"""
     
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', dataset_path: str = 'desi_remedies_dataset.json'):
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', dataset_path: str = 'desi_remedies_dataset.json',
+                 index_config: Optional[IndexConfig] = None):
         """
         Initialize semantic search engine
         
         Args:
             model_name: Name of the sentence transformer model
             dataset_path: Path to the remedies dataset JSON file
+            index_config: Index type and parameters (default: from REMEDY_INDEX* variables)
         """
         self.model_name = model_name
         self.dataset_path = dataset_path
+        self.index_config = index_config or index_config_from_env()
         self.model = None
         self.embeddings = None
         self.index = None
         self.remedies_data = []
         self.embedding_dim = 384  # Dimension for all-MiniLM-L6-v2
+        self.index_mapped = False  # Index pages are shared with other processes
+        self.last_encoded = 0  # Remedies encoded by the most recent index build
+        self.encoded_on_load = 0  # Remedies encoded while building the index at startup
+        self.log = get_remedy_log()  # Remedies added since the last snapshot
+        self._added = None  # Vectors added since the snapshot in self.embeddings, with spare capacity
+        self._added_count = 0
+        self._lock = threading.RLock()
+        self.query_cache = LRUCache(QUERY_CACHE_SIZE)  # Normalized query -> embedding
+        self.lowercase_queries = False  # The model's tokenizer ignores case
         
         # Initialize model
         self._load_model()
         
-        # Load and index dataset
+        # Load the dataset and reuse the saved index when its manifest still matches
         self._load_dataset()
-        self._build_index()
+        if not self._load_index():
+            self._build_index()
+            self.encoded_on_load = self.last_encoded
+        self._replay_log()
     
     def _load_model(self):
         """Load sentence transformer model"""
         try:
             print(f"Loading sentence transformer model: {self.model_name}...")
             self.model = SentenceTransformer(self.model_name)
+            self.lowercase_queries = bool(getattr(getattr(self.model, 'tokenizer', None), 'do_lower_case', False))
+            # Cached query embeddings came from the previous model
+            self.query_cache.clear()
             print(f"✓ Model loaded successfully")
         except Exception as e:
             print(f"Error loading model: {e}")
@@ -64,71 +144,228 @@ class SemanticRemedySearch:
             self.remedies_data = []
     
     def _build_index(self):
-        """Build FAISS index from dataset embeddings"""
+        """
+        Build FAISS index from dataset embeddings
+        
+        Embeddings saved by an index built with the same model and text
+        template are reused for every remedy whose text is unchanged, so only
+        new or edited remedies are encoded.
+        """
+        self.last_encoded = 0
         if not self.remedies_data:
             print("No data to index")
             return
         
         try:
-            # Create searchable text for each remedy
-            searchable_texts = []
-            for entry in self.remedies_data:
-                # Combine query, category, and remedy text for better semantic matching
-                text = f"{entry.get('query', '')} {entry.get('category', '')} {entry.get('remedy', '')}"
-                searchable_texts.append(text)
+            searchable_texts = [remedy_text(entry) for entry in self.remedies_data]
+            hashes = [text_hash(text) for text in searchable_texts]
+            previous, previous_rows = self._reusable_embeddings()
+            missing = [i for i, h in enumerate(hashes) if h not in previous_rows]
+            reused = [i for i, h in enumerate(hashes) if h in previous_rows]
             
             # Generate embeddings
-            print("Generating embeddings for remedies...")
-            self.embeddings = self.model.encode(
-                searchable_texts,
-                show_progress_bar=True,
-                convert_to_numpy=True
-            )
+            encoded = None
+            if missing:
+                print(f"Generating embeddings for {len(missing)} of {len(hashes)} remedies...")
+                encoded = normalize(self.model.encode(
+                    [searchable_texts[i] for i in missing],
+                    show_progress_bar=len(missing) > 100,
+                    convert_to_numpy=True
+                ))
+            
+            dim = encoded.shape[1] if encoded is not None else previous.shape[1]
+            embeddings = np.empty((len(hashes), dim), dtype=np.float32)
+            if missing:
+                embeddings[missing] = encoded
+            if reused:
+                # Embeddings saved before cosine scoring are not unit length yet
+                embeddings[reused] = normalize(previous[[previous_rows[hashes[i]] for i in reused]])
+            self.embeddings = embeddings
+            self._added_count = 0
+            self.last_encoded = len(missing)
             
             # Build FAISS index
             self.embedding_dim = self.embeddings.shape[1]
-            self.index = faiss.IndexFlatL2(self.embedding_dim)
-            self.index.add(self.embeddings.astype('float32'))
+            self.index = self.index_config.build(self.embeddings)
+            self.index_mapped = False
             
-            print(f"✓ Built FAISS index with {self.index.ntotal} vectors")
+            print(f"✓ Built {self.index_config.kind} FAISS index ({self.index_config.codec}) with "
+                  f"{self.index.ntotal} vectors ({len(reused)} embeddings reused)")
             
             # Save index for faster loading
-            self._save_index()
+            if self._save_index():
+                self._map_saved_embeddings()
             
         except Exception as e:
             print(f"Error building index: {e}")
             raise
     
-    def _save_index(self):
-        """Save FAISS index and embeddings to disk"""
+    def _manifest(self, remedies: Optional[List[Dict]] = None) -> Dict:
+        """
+        Description of what the current index is built from
+        
+        dataset_hash covers the searchable text of every remedy in order, so
+        edits to fields that are not encoded (e.g. intensity) keep the index.
+        """
+        remedies = self.remedies_data if remedies is None else remedies
+        hashes = [text_hash(remedy_text(entry)) for entry in remedies]
+        return {
+            "model_name": self.model_name,
+            "model_version": embedding_model_version(),
+            "text_template": TEXT_TEMPLATE,
+            "dataset_hash": hashlib.sha256('\n'.join(hashes).encode('utf-8')).hexdigest(),
+            "count": len(hashes),
+            "embedding_dim": int(self.embedding_dim),
+            "index": self.index_config.settings(),
+            "text_hashes": hashes
+        }
+    
+    def _read_manifest(self) -> Optional[Dict]:
+        try:
+            with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _same_encoder(self, manifest: Dict) -> bool:
+        """Whether saved embeddings came from the model and text template in use now"""
+        return (manifest.get('model_name') == self.model_name
+                and manifest.get('model_version') == embedding_model_version()
+                and manifest.get('text_template') == TEXT_TEMPLATE)
+    
+    def _reusable_embeddings(self) -> Tuple[Optional[np.ndarray], Dict[str, int]]:
+        """Saved embeddings and their row per text hash, if the current encoder produced them"""
+        manifest = self._read_manifest()
+        if manifest is None or not self._same_encoder(manifest) or not os.path.exists(EMBEDDINGS_PATH):
+            return None, {}
+        try:
+            embeddings = np.load(EMBEDDINGS_PATH, mmap_mode='r')
+        except Exception as e:
+            print(f"Warning: Could not read saved embeddings: {e}")
+            return None, {}
+        hashes = manifest.get('text_hashes', [])
+        if len(embeddings) != len(hashes):
+            return None, {}
+        return embeddings, {h: row for row, h in enumerate(hashes)}
+    
+    def _save_index(self, remedies: Optional[List[Dict]] = None, embeddings: Optional[np.ndarray] = None,
+                    index=None, with_dataset: bool = False):
+        """
+        Save FAISS index, embeddings and manifest to disk
+        
+        Args:
+            remedies, embeddings, index: Snapshot to save (default: the live ones)
+            with_dataset: Also write the remedies as the dataset JSON, before the manifest
+        
+        Returns:
+            True if everything was written
+        """
+        remedies = self.remedies_data if remedies is None else remedies
+        embeddings = self._all_embeddings() if embeddings is None else embeddings
+        index = self.index if index is None else index
+        manifest = self._manifest(remedies)
+        embeddings = np.ascontiguousarray(embeddings, dtype=self.index_config.embeddings_dtype)
+        
+        def write_embeddings(path):
+            # np.save appends .npy to names without it, so write through a file object
+            with open(path, 'wb') as f:
+                np.save(f, embeddings)
+        
+        def write_json(data, indent=None):
+            def write(path):
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=indent, ensure_ascii=False)
+            return write
+        
+        files = [(INDEX_PATH, lambda path: faiss.write_index(index, path)),
+                 (EMBEDDINGS_PATH, write_embeddings)]
+        if with_dataset:
+            files.append((self.dataset_path, write_json(remedies, indent=2)))
+        files.append((MANIFEST_PATH, write_json(manifest)))
+        
+        staged = []
         try:
-            index_path = 'models/remedies_index.faiss'
-            embeddings_path = 'models/remedies_embeddings.pkl'
-            
             os.makedirs('models', exist_ok=True)
+            # The slow part: every file is written under a temporary name first
+            for path, write in files:
+                tmp_path = f"{path}.tmp-{os.getpid()}"
+                staged.append((tmp_path, path))
+                write(tmp_path)
             
-            faiss.write_index(self.index, index_path)
-            with open(embeddings_path, 'wb') as f:
-                pickle.dump(self.embeddings, f)
+            # Then swapped in by renames, manifest last. Files without a manifest are never
+            # trusted, so a reader between the renames rebuilds rather than mixing snapshots
+            if os.path.exists(MANIFEST_PATH):
+                os.remove(MANIFEST_PATH)
+            for tmp_path, path in staged:
+                os.replace(tmp_path, path)
             
-            print(f"✓ Saved index and embeddings to disk")
+            if os.path.exists(LEGACY_EMBEDDINGS_PATH):
+                os.remove(LEGACY_EMBEDDINGS_PATH)
+            
+            print(f"✓ Saved index, embeddings and manifest to disk")
+            return True
         except Exception as e:
             print(f"Warning: Could not save index: {e}")
+            return False
+        finally:
+            for tmp_path, _ in staged:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+    
+    def _read_faiss_index(self):
+        """
+        Read the FAISS index, memory-mapped when the index type supports it
+
+        IVF indexes are always read into private memory: their mapped lists
+        are OnDiskInvertedLists, which faiss.clone_index cannot copy, so the
+        first add after a restart would fail.
+        """
+        self.index_mapped = False
+        mmap_flag = getattr(faiss, 'IO_FLAG_MMAP', None)
+        if USE_MMAP and mmap_flag is not None and self.index_config.kind != 'ivf':
+            try:
+                index = faiss.read_index(INDEX_PATH, mmap_flag | getattr(faiss, 'IO_FLAG_READ_ONLY', 0))
+                self.index_mapped = True
+                return index
+            except RuntimeError:
+                # Older FAISS builds can only map inverted lists, not flat indexes
+                pass
+        return faiss.read_index(INDEX_PATH)
     
     def _load_index(self) -> bool:
-        """Load FAISS index and embeddings from disk"""
+        """
+        Load FAISS index and embeddings from disk
+        
+        Returns:
+            True if the saved index matches the dataset, model and text template
+            in its manifest; nothing is encoded in that case
+        """
         try:
-            index_path = 'models/remedies_index.faiss'
-            embeddings_path = 'models/remedies_embeddings.pkl'
+            if not os.path.exists(INDEX_PATH) or not os.path.exists(EMBEDDINGS_PATH):
+                return False
+            manifest = self._read_manifest()
+            current = self._manifest()
+            if manifest is None or not self._same_encoder(manifest) \
+                    or manifest.get('dataset_hash') != current['dataset_hash']:
+                print("Saved index does not match the dataset or embedding model")
+                return False
+            if manifest.get('index') != current['index']:
+                # Rebuilt from the saved embeddings; nothing is encoded
+                print(f"Saved index was built as {manifest.get('index')}, {current['index']} requested")
+                return False
             
-            if os.path.exists(index_path) and os.path.exists(embeddings_path):
-                self.index = faiss.read_index(index_path)
-                with open(embeddings_path, 'rb') as f:
-                    self.embeddings = pickle.load(f)
-                self.embedding_dim = self.embeddings.shape[1]
-                print(f"✓ Loaded index with {self.index.ntotal} vectors from disk")
-                return True
-            return False
+            embeddings = np.load(EMBEDDINGS_PATH, mmap_mode='r' if USE_MMAP else None)
+            index = self.index_config.configure(self._read_faiss_index())
+            if index.ntotal != current['count'] or len(embeddings) != current['count']:
+                print(f"Warning: Saved index has {index.ntotal} vectors for {current['count']} remedies")
+                return False
+            
+            self.embeddings = embeddings
+            self._added_count = 0
+            self.index = index
+            self.embedding_dim = self.embeddings.shape[1]
+            print(f"✓ Loaded index with {self.index.ntotal} vectors from disk")
+            return True
         except Exception as e:
             print(f"Warning: Could not load index: {e}")
             return False
@@ -140,7 +377,7 @@ class SemanticRemedySearch:
         Args:
             query: User query string
             top_k: Number of top results to return
-            threshold: Minimum similarity threshold (0-1)
+            threshold: Minimum cosine similarity
         
         Returns:
             List of tuples (remedy_dict, similarity_score)
@@ -149,23 +386,16 @@ class SemanticRemedySearch:
             return []
         
         try:
-            # Encode query
-            query_embedding = self.model.encode([query], convert_to_numpy=True).astype('float32')
+            query_embedding = self._query_embedding(query)
             
-            # Search in FAISS index
-            distances, indices = self.index.search(query_embedding, min(top_k, len(self.remedies_data)))
+            # Inner product of unit vectors: the scores are cosine similarities
+            scores, indices = self.index.search(query_embedding, min(top_k, len(self.remedies_data)))
             
-            # Convert distances to similarity scores (L2 distance -> cosine similarity approximation)
-            # For normalized vectors, similarity ≈ 1 - (distance^2 / 2)
             results = []
-            for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-                if idx < len(self.remedies_data):
-                    # Convert L2 distance to similarity (higher is better)
-                    # Using a simple conversion: similarity = 1 / (1 + distance)
-                    similarity = 1 / (1 + distance)
-                    
-                    if similarity >= threshold:
-                        results.append((self.remedies_data[idx], float(similarity)))
+            for score, idx in zip(scores[0], indices[0]):
+                # Approximate indexes pad with -1 when they find fewer than top_k neighbours
+                if 0 <= idx < len(self.remedies_data) and score >= threshold:
+                    results.append((self.remedies_data[idx], float(score)))
             
             return results
             
@@ -173,69 +403,190 @@ class SemanticRemedySearch:
             print(f"Error during search: {e}")
             return []
     
+    def _query_embedding(self, query: str) -> np.ndarray:
+        """
+        Unit-length (1, d) embedding of a query, from the query cache when possible
+        
+        The normalized text is encoded whether or not it is cached, so a
+        result never depends on what happened to be cached.
+        """
+        text = normalize_query(query, self.lowercase_queries)
+        # The encoder is part of the key, so a model change can never serve stale vectors
+        key = (self._encoder(), text)
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = normalize(self.model.encode([text], convert_to_numpy=True))
+            embedding.setflags(write=False)
+            self.query_cache.put(key, embedding)
+        return embedding
+    
+    def _encoder(self) -> str:
+        """Identifies the embeddings this engine produces, for records in the remedy log"""
+        return f"{self.model_name} ({embedding_model_version()})"
+    
+    def _map_saved_embeddings(self):
+        """
+        Replace the in-memory snapshot matrix with the saved file, mapped
+        
+        Searches only read the index, so the raw matrix is paged in only when
+        a rebuild or compaction reads it, and its pages are shared between workers.
+        """
+        if USE_MMAP and os.path.exists(EMBEDDINGS_PATH):
+            self.embeddings = np.load(EMBEDDINGS_PATH, mmap_mode='r')
+    
+    def _all_embeddings(self) -> Optional[np.ndarray]:
+        """Snapshot and added vectors as one float32 matrix, in dataset order"""
+        parts = []
+        if self.embeddings is not None:
+            parts.append(np.asarray(self.embeddings, dtype=np.float32))
+        if self._added_count:
+            parts.append(self._added[:self._added_count])
+        return np.concatenate(parts) if parts else None
+    
+    def _writable_index(self):
+        """The live index, first swapped for a private copy if it is mapped read-only"""
+        if self.index is not None and self.index_mapped:
+            self.index = faiss.clone_index(self.index)
+            self.index_mapped = False
+        return self.index
+    
+    def _append_vectors(self, vectors: np.ndarray):
+        """
+        Add vectors to the added-vector buffer and the index in amortized constant time per vector
+        
+        Index rows must line up with dataset positions, so if the index cannot
+        take the vectors it is rebuilt from the buffer; if that fails too the
+        index is dropped and searches return nothing until the next add rebuilds it.
+        """
+        vectors = normalize(vectors)
+        needed = self._added_count + len(vectors)
+        if self._added is None or needed > len(self._added):
+            # Grow geometrically so each vector is copied a constant number of times on average
+            buffer = np.empty((max(needed, 2 * self._added_count, 64), vectors.shape[1]), dtype=np.float32)
+            if self._added_count:
+                buffer[:self._added_count] = self._added[:self._added_count]
+            self._added = buffer
+        self._added[self._added_count:needed] = vectors
+        self._added_count = needed
+        
+        if self.index is not None:
+            try:
+                self._writable_index().add(vectors)
+                return
+            except Exception as e:
+                print(f"Warning: Could not add vectors to the index ({e}); rebuilding it")
+        self.index = None
+        self.index_mapped = False
+        self.embedding_dim = vectors.shape[1]
+        self.index = self.index_config.build(self._all_embeddings())
+    
+    def _replay_log(self):
+        """Add the remedies logged since the snapshot, encoding only those logged without a usable embedding"""
+        replayed = self.log.replay(self.remedies_data, self._encoder())
+        if not replayed:
+            return
+        first = replayed[0][0]
+        missing = [position for position, embedding in replayed if embedding is None]
+        encoded = {}
+        if missing:
+            vectors = self.model.encode([remedy_text(self.remedies_data[i]) for i in missing], convert_to_numpy=True)
+            encoded = dict(zip(missing, vectors))
+            self.encoded_on_load += len(missing)
+        vectors = np.stack([embedding if embedding is not None else encoded[position]
+                            for position, embedding in replayed])
+        with self._lock:
+            self._append_vectors(vectors)
+        print(f"✓ Index holds {self.index.ntotal} vectors after replaying positions {first}-{replayed[-1][0]}")
+        self._maybe_compact()
+    
+    def _maybe_compact(self):
+        if self.log.should_compact():
+            self.log.compact_in_background(self.compact)
+    
     def add_remedy(self, remedy: Dict):
         """
         Add a new remedy to the dataset and update index in real-time
         
+        The remedy and its embedding are appended to the remedy log; the
+        dataset, index and embeddings files are only rewritten by compaction,
+        so the cost of an add does not grow with the dataset.
+        
         Args:
             remedy: Dictionary containing remedy data (query, category, remedy, intensity)
+        
+        Returns:
+            True once the remedy is in the log; False if nothing was changed
         """
         try:
-            # Add to dataset
-            self.remedies_data.append(remedy)
-            
-            # Create searchable text
-            text = f"{remedy.get('query', '')} {remedy.get('category', '')} {remedy.get('remedy', '')}"
-            
             # Generate embedding
-            embedding = self.model.encode([text], convert_to_numpy=True).astype('float32')
-            
-            # Add to index
-            if self.index is None:
-                self.embedding_dim = embedding.shape[1]
-                self.index = faiss.IndexFlatL2(self.embedding_dim)
-                if self.embeddings is not None:
-                    self.index.add(self.embeddings.astype('float32'))
-            
-            self.index.add(embedding)
-            
-            # Update embeddings array
-            if self.embeddings is None:
-                self.embeddings = embedding
-            else:
-                self.embeddings = np.vstack([self.embeddings, embedding])
-            
-            # Save updated dataset
-            self._save_dataset()
-            
-            # Save updated index
-            self._save_index()
-            
-            print(f"✓ Added new remedy: {remedy.get('query', 'unknown')}")
-            return True
+            embedding = normalize(self.model.encode([remedy_text(remedy)], convert_to_numpy=True))
             
+            with self._lock:
+                # Everything that can fail before the log write leaves the engine untouched
+                self._writable_index()
+                self.log.append(len(self.remedies_data), remedy, embedding[0], self._encoder())
+                # Durable from here on: a restart replays it, so it is added whatever happens to the index
+                self.remedies_data.append(remedy)
+                try:
+                    self._append_vectors(embedding)
+                except Exception as e:
+                    print(f"Warning: Remedy logged but not indexed yet: {e}")
         except Exception as e:
             print(f"Error adding remedy: {e}")
             return False
+        
+        self._maybe_compact()
+        print(f"✓ Added new remedy: {remedy.get('query', 'unknown')}")
+        return True
+    
+    def compact(self):
+        """Merge the remedy log into the snapshot: dataset JSON, index, embeddings and manifest"""
+        with self._lock:
+            remedies = list(self.remedies_data)
+            merged = self._added_count
+            embeddings = self._all_embeddings()
+        # Written from copies, so adds carry on while the files are written; IVF centroids are retrained
+        index = self.index_config.build(embeddings)
+        if not self._save_index(remedies, embeddings, index, with_dataset=True):
+            raise RuntimeError("snapshot could not be written; keeping the remedy log")
+        self.log.truncate(len(remedies))
+        
+        with self._lock:
+            # Vectors added while compacting stay in the buffer, on top of the new snapshot
+            later = self._added[merged:self._added_count].copy() if self._added_count > merged else None
+            if later is not None:
+                index.add(later)
+            self.embeddings = embeddings
+            self._added_count = 0
+            if later is not None:
+                self._added[:len(later)] = later
+                self._added_count = len(later)
+            self.index = index
+            self.index_mapped = False
+            self._map_saved_embeddings()
+        print(f"✓ Compacted remedy log into the snapshot ({len(remedies)} remedies)")
     
     def _save_dataset(self):
         """Save updated dataset to JSON file"""
         try:
-            with open(self.dataset_path, 'w', encoding='utf-8') as f:
-                json.dump(self.remedies_data, f, indent=2, ensure_ascii=False)
+            save_dataset(self.dataset_path, self.remedies_data)
         except Exception as e:
             print(f"Warning: Could not save dataset: {e}")
     
     def update_dataset(self, new_data: List[Dict]):
         """
-        Update entire dataset and rebuild index
+        Update entire dataset and rebuild index, encoding only new or changed remedies
+        
+        The new dataset becomes the snapshot, so the remedy log is emptied.
         
         Args:
             new_data: List of remedy dictionaries
         """
-        self.remedies_data = new_data
-        self._build_index()
-        self._save_dataset()
+        with self._lock:
+            self.remedies_data = new_data
+            self._build_index()
+            self._save_dataset()
+            self.log.truncate(len(new_data))
     
     def get_stats(self) -> Dict:
         """Get statistics about the search engine"""
@@ -243,7 +594,17 @@ class SemanticRemedySearch:
             "total_remedies": len(self.remedies_data),
             "index_size": self.index.ntotal if self.index else 0,
             "embedding_dim": self.embedding_dim,
-            "model_name": self.model_name
+            "model_name": self.model_name,
+            "index": self.index_config.describe(self.index) if self.index is not None else self.index_config.settings(),
+            "embeddings": {
+                "rows": 0 if self.embeddings is None else len(self.embeddings),
+                "added_since_snapshot": self._added_count,
+                "bytes_per_vector": self.embedding_dim * np.dtype(self.index_config.embeddings_dtype).itemsize,
+                "mapped": isinstance(self.embeddings, np.memmap)
+            },
+            "encoded_on_load": self.encoded_on_load,
+            "query_cache": self.query_cache.get_stats(),
+            "log": self.log.get_stats()
         }
 
 
@@ -0,0 +1,207 @@
+"""
+Vectorized Batch Scoring for Tabular Risk Models
+Encodes many patient rows at once for the heart, breast cancer and PCOD models
+"""
+
+import io
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 5000
+
+HEART_RISK_LEVELS = ["Low Risk", "Medium Risk", "High Risk"]
+PCOD_RISK_LEVELS = ["Low Risk of PCOD", "Medium Risk of PCOD", "High Risk of PCOD"]
+PERIOD_FLOW_MAP = {'light': 0, 'normal': 1, 'heavy': 2}
+
+BREAST_FEATURE_COUNT = 10
+
+# Column carrying the error of a JSON row that could not be read as a record; never passed to the encoders
+ROW_ERROR_COLUMN = '_row_error'
+
+
+def new_errors(n: int) -> np.ndarray:
+    """Per-row error messages; '' means the row is valid"""
+    return np.full(n, '', dtype=object)
+
+
+def _numeric(df: pd.DataFrame, column: str, default: float, errors: np.ndarray) -> np.ndarray:
+    """
+    Coerce a column to float; missing values take the default like the single-row
+    endpoints, unparseable values mark the row as an error
+    """
+    if column not in df:
+        return np.full(len(df), default, dtype=np.float64)
+    raw = df[column]
+    values = pd.to_numeric(raw, errors='coerce')
+    invalid = (values.isna() & raw.notna()).to_numpy()
+    errors[invalid & (errors == '')] = f"Invalid value for {column}"
+    return values.fillna(default).to_numpy(dtype=np.float64)
+
+
+def _lower_strings(df: pd.DataFrame, column: str, default: str) -> pd.Series:
+    if column not in df:
+        return pd.Series([default] * len(df), index=df.index)
+    return df[column].fillna(default).astype(str).str.strip().str.lower()
+
+
+def encode_heart(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encode heart rows into [age, gender, bp, cholesterol, diabetes]
+
+    Returns:
+        (features, errors) where errors[i] is '' for valid rows
+    """
+    errors = new_errors(len(df))
+    features = np.column_stack([
+        _numeric(df, 'age', 0, errors),
+        (_lower_strings(df, 'gender', '') == 'male').to_numpy(dtype=np.float64),
+        _numeric(df, 'bloodPressure', 0, errors),
+        _numeric(df, 'cholesterol', 0, errors),
+        (_lower_strings(df, 'diabetes', '') == 'yes').to_numpy(dtype=np.float64),
+    ])
+    return features, errors
+
+
+def encode_pcod(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode PCOD rows into [age, bmi, cycle_length, period_flow]"""
+    errors = new_errors(len(df))
+    period_flow = _lower_strings(df, 'periodFlow', 'normal').map(PERIOD_FLOW_MAP).fillna(1)
+    features = np.column_stack([
+        _numeric(df, 'age', 0, errors),
+        _numeric(df, 'bmi', 0, errors),
+        _numeric(df, 'cycleLength', 0, errors),
+        period_flow.to_numpy(dtype=np.float64),
+    ])
+    return features, errors
+
+
+def encode_breast(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encode breast cancer rows into their 10 measurements
+
+    JSON rows carry a 'features' list; CSV rows carry 10 numeric columns
+    (an optional 'id' column is ignored).
+    """
+    errors = new_errors(len(df))
+    if 'features' in df:
+        lengths = df['features'].map(lambda v: len(v) if isinstance(v, (list, tuple)) else -1).to_numpy()
+        errors[lengths != BREAST_FEATURE_COUNT] = f"Exactly {BREAST_FEATURE_COUNT} features required"
+        padded = [list(v) if n == BREAST_FEATURE_COUNT else [0] * BREAST_FEATURE_COUNT
+                  for v, n in zip(df['features'], lengths)]
+        values = pd.DataFrame(padded, index=df.index)
+    else:
+        values = df.drop(columns=['id'], errors='ignore')
+        if values.shape[1] != BREAST_FEATURE_COUNT:
+            errors[:] = f"Exactly {BREAST_FEATURE_COUNT} features required"
+            return np.zeros((len(df), BREAST_FEATURE_COUNT)), errors
+
+    numeric = values.apply(pd.to_numeric, errors='coerce')
+    invalid = numeric.isna().any(axis=1).to_numpy() & (errors == '')
+    errors[invalid] = "Invalid feature value"
+    return numeric.fillna(0).to_numpy(dtype=np.float64), errors
+
+
+def format_heart(prediction: int, confidence: float) -> Dict:
+    return {"prediction": HEART_RISK_LEVELS[prediction], "riskScore": int(prediction), "confidence": confidence}
+
+
+def format_breast(prediction: int, confidence: float) -> Dict:
+    return {"prediction": int(prediction), "isMalignant": bool(prediction == 1), "confidence": confidence}
+
+
+def format_pcod(prediction: int, confidence: float) -> Dict:
+    return {"prediction": PCOD_RISK_LEVELS[prediction], "riskScore": int(prediction), "confidence": confidence}
+
+
+# name -> (encoder, formatter)
+SPECS = {
+    'heart': (encode_heart, format_heart),
+    'breast': (encode_breast, format_breast),
+    'pcod': (encode_pcod, format_pcod),
+}
+
+
+def frames_from_json(payload, spec: Tuple[Callable, Callable], chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Split a JSON payload into DataFrame chunks
+
+    Accepts a list of row objects, or {"rows": [...]}. For the breast cancer
+    spec a bare list is read as that row's 'features'; any other non-object row
+    is reported as an error for that row only.
+
+    Args:
+        payload: Parsed JSON body
+        spec: The endpoint's (encoder, formatter) entry from SPECS
+        chunk_size: Rows per DataFrame
+    """
+    rows = payload.get('rows') if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of rows or an object with a 'rows' array")
+    list_rows = spec[0] is encode_breast
+    for start in range(0, len(rows), chunk_size):
+        chunk = []
+        for row in rows[start:start + chunk_size]:
+            if isinstance(row, list) and list_rows:
+                row = {"features": row}
+            elif not isinstance(row, dict):
+                row = {ROW_ERROR_COLUMN: "Row must be a JSON object"}
+            chunk.append(row)
+        df = pd.DataFrame.from_records(chunk, index=range(start, start + len(chunk)))
+        if 'id' in df:
+            # Object column, so integer ids are echoed back as given rather than as floats when some rows lack one
+            df['id'] = pd.Series([row.get('id') for row in chunk], index=df.index, dtype=object)
+        yield df
+
+
+def frames_from_csv(stream: io.IOBase, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Read a CSV upload in chunks without loading the whole file"""
+    start = 0
+    for chunk in pd.read_csv(stream, chunksize=chunk_size, dtype=str, skipinitialspace=True):
+        chunk.index = range(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+
+def score_frames(frames: Iterable[pd.DataFrame], encoder: Callable, formatter: Callable,
+                 predict_proba: Callable[[np.ndarray], np.ndarray], classes: np.ndarray) -> Iterator[Dict]:
+    """
+    Encode, scale and score each chunk with a single model call
+
+    Args:
+        frames: DataFrame chunks indexed by global row number
+        encoder: Row encoder from SPECS
+        formatter: Result formatter from SPECS
+        predict_proba: Scaled-feature probability function (scaler included)
+        classes: Class labels matching the probability columns
+
+    Yields:
+        One result dict per input row, in input order
+    """
+    for df in frames:
+        ids = df['id'].tolist() if 'id' in df else [None] * len(df)
+        row_errors = df[ROW_ERROR_COLUMN].to_numpy() if ROW_ERROR_COLUMN in df else None
+        features, errors = encoder(df.drop(columns=[ROW_ERROR_COLUMN], errors='ignore'))
+        if row_errors is not None:
+            unreadable = pd.notna(row_errors)
+            errors[unreadable] = row_errors[unreadable]
+        valid = np.flatnonzero(errors == '')
+
+        results: List = [None] * len(df)
+        if len(valid):
+            probabilities = predict_proba(features[valid])
+            predictions = classes[np.argmax(probabilities, axis=1)]
+            confidences = np.round(np.max(probabilities, axis=1) * 100, 2)
+            for i, prediction, confidence in zip(valid, predictions, confidences):
+                results[i] = formatter(int(prediction), float(confidence))
+
+        for i, (row, row_id) in enumerate(zip(df.index, ids)):
+            line = {"row": int(row)}
+            if row_id is not None and not (isinstance(row_id, float) and np.isnan(row_id)):
+                line["id"] = row_id
+            if results[i] is None:
+                line["error"] = errors[i]
+            else:
+                line.update(results[i])
+            yield line
@@ -0,0 +1,9 @@
+"""
+Test Configuration
+Puts the backend modules on the import path, so the tests run from any directory
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
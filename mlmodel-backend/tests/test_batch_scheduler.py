@@ -0,0 +1,56 @@
+"""
+Batch Scheduler Tests
+Requests only share a batch with requests for the same model
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from batch_scheduler import BatchScheduler
+
+
+def test_requests_run_on_their_own_context():
+    seen = []
+
+    def predict(inputs, context):
+        seen.append((context, len(inputs)))
+        return [(context, float(row[0])) for row in inputs]
+
+    old, new = object(), object()
+    scheduler = BatchScheduler(predict, max_batch_size=8, max_wait_ms=50)
+    try:
+        futures = [scheduler.submit(np.array([i], dtype=np.float32), old if i % 2 else new) for i in range(10)]
+        results = [future.result(timeout=5) for future in futures]
+    finally:
+        scheduler.shutdown()
+
+    assert results == [(old if i % 2 else new, float(i)) for i in range(10)]
+    assert sum(size for _, size in seen) == 10
+
+
+def test_wait_counts_from_enqueue():
+    release = threading.Event()
+    sizes = []
+
+    def predict(inputs, context):
+        sizes.append(len(inputs))
+        release.wait(5)
+        return list(inputs)
+
+    scheduler = BatchScheduler(predict, max_batch_size=8, max_wait_ms=500)
+    try:
+        first = scheduler.submit(np.zeros(1))
+        time.sleep(0.2)  # first batch (of one) is now running
+        queued = scheduler.submit(np.zeros(1))
+        time.sleep(0.7)  # queued has waited longer than max_wait behind the busy worker
+        release.set()
+        first.result(timeout=5)
+        start = time.monotonic()
+        queued.result(timeout=5)
+        # Dispatched at once instead of waiting another max_wait for company
+        assert time.monotonic() - start < 0.3
+    finally:
+        release.set()
+        scheduler.shutdown()
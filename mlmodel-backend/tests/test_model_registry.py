@@ -0,0 +1,65 @@
+"""
+Model Registry Tests
+Loads and reloads of one model never hold up the others
+"""
+
+import threading
+import time
+
+from model_registry import ModelRegistry, ModelSpec
+
+
+def test_reload_does_not_block_other_models(tmp_path):
+    weights = tmp_path / 'slow.bin'
+    weights.write_bytes(b'v1')
+    other = tmp_path / 'other.bin'
+    other.write_bytes(b'v1')
+    started, release = threading.Event(), threading.Event()
+
+    def slow_loader():
+        if started.is_set():
+            release.wait(5)
+        return 'slow'
+
+    registry = ModelRegistry()
+    registry.register(ModelSpec('slow', slow_loader, artifacts=[str(weights)],
+                                canary=lambda obj: started.set()))
+    registry.register(ModelSpec('other', lambda: 'other', artifacts=[str(other)]))
+    registry.get('slow')
+
+    weights.write_bytes(b'v2')
+    reload = threading.Thread(target=registry.reload, args=('slow',))
+    started.set()
+    reload.start()
+    try:
+        start = time.monotonic()
+        assert registry.get('other') == 'other'
+        assert registry.get('slow') == 'slow'
+        assert time.monotonic() - start < 1.0
+    finally:
+        release.set()
+        reload.join()
+    assert registry.get_stats()['models']['slow']['last_reload']['status'] == 'swapped'
+
+
+def test_second_reload_waits_for_the_first(tmp_path):
+    weights = tmp_path / 'model.bin'
+    weights.write_bytes(b'v1')
+    active, overlaps = [], []
+
+    def loader():
+        active.append(1)
+        overlaps.append(len(active))
+        time.sleep(0.05)
+        active.pop()
+        return object()
+
+    registry = ModelRegistry()
+    registry.register(ModelSpec('model', loader, artifacts=[str(weights)]))
+    registry.get('model')
+    threads = [threading.Thread(target=registry.reload, args=('model', True)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(overlaps) == 1
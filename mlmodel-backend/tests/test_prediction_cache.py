@@ -0,0 +1,71 @@
+"""
+Prediction Cache Tests
+The disk tier of the served weights survives until a new version is served,
+and the weights are hashed once per load
+"""
+
+import os
+from types import SimpleNamespace
+
+import model_registry
+import prediction_cache
+from model_registry import ModelRegistry, ModelSpec
+from prediction_cache import PredictionCache
+
+
+def test_disk_tier_pruned_only_after_swap(tmp_path):
+    weights = tmp_path / 'weights.h5'
+    weights.write_bytes(b'version 1')
+    cache_dir = str(tmp_path / 'cache')
+    accept = {'candidate': True}
+
+    def load():
+        return SimpleNamespace(cache=PredictionCache(str(weights), disk_dir=cache_dir, check_interval=None))
+
+    registry = ModelRegistry()
+    registry.register(ModelSpec(
+        'model', load, artifacts=[str(weights)],
+        canary=lambda service: accept['candidate'],
+        on_served=lambda service: service.cache.prune_disk()
+    ))
+    old = registry.get('model').cache
+    old.put(PredictionCache.key_for(b'image'), 1, 97.5)
+    old_dir = old._version_dir()
+
+    # A rejected candidate never touches the served version's entries
+    weights.write_bytes(b'version 2')
+    accept['candidate'] = False
+    assert registry.reload('model')['status'] == 'rejected'
+    assert os.path.isdir(old_dir)
+
+    # Nor does loading the candidate; its entries go only once it is served
+    accept['candidate'] = True
+    assert registry.reload('model', force=True)['status'] == 'swapped'
+    assert not os.path.isdir(old_dir)
+    assert registry.get('model').cache.get(PredictionCache.key_for(b'image')) is None
+
+
+def test_weights_hashed_once_per_load(tmp_path, monkeypatch):
+    weights = tmp_path / 'weights.h5'
+    weights.write_bytes(b'version 1')
+    hashed = []
+    original = prediction_cache.file_fingerprint
+
+    def fingerprint(path):
+        hashed.append(path)
+        return original(path)
+    monkeypatch.setattr(model_registry, 'file_fingerprint', fingerprint)
+    monkeypatch.setattr(prediction_cache, 'file_fingerprint', fingerprint)
+
+    def load(version):
+        return SimpleNamespace(cache=PredictionCache(str(weights), check_interval=None, weights_version=version))
+
+    registry = ModelRegistry()
+    registry.register(ModelSpec('model', load, artifacts=[str(weights)], pass_version=True))
+    assert registry.get('model').cache.model_version == registry.version('model')
+    assert len(hashed) == 1
+
+    weights.write_bytes(b'version 2')
+    assert registry.reload('model')['status'] == 'swapped'
+    assert registry.get('model').cache.model_version == registry.version('model')
+    assert len(hashed) == 2
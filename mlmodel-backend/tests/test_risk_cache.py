@@ -0,0 +1,28 @@
+"""
+Risk Cache Tests
+Requests alternating between model versions keep each other's entries
+"""
+
+import numpy as np
+
+from risk_cache import QUANTIZATION_STEPS, QuantizedPredictionCache
+
+
+def test_version_flip_keeps_entries():
+    cache = QuantizedPredictionCache(QUANTIZATION_STEPS['heart'], max_entries=16)
+    calls = []
+
+    def engine(version):
+        def predict_proba(features):
+            calls.append(version)
+            return np.array([[0.3, 0.7]]) if version == 'v1' else np.array([[0.6, 0.4]])
+        return predict_proba
+
+    row = np.array([50.2, 1, 120, 200, 0])
+    for _ in range(3):
+        np.testing.assert_array_equal(cache.predict_proba(row, 'v1', engine('v1')), [0.3, 0.7])
+        np.testing.assert_array_equal(cache.predict_proba(row, 'v2', engine('v2')), [0.6, 0.4])
+
+    # One miss per version; flipping back and forth never emptied the cache
+    assert calls == ['v1', 'v2']
+    assert cache.get_stats()['model_version'] == 'v2'
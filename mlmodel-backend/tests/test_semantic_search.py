@@ -0,0 +1,130 @@
+"""
+Semantic Remedy Search Tests
+Saved index load and live adds for every index type, with a deterministic
+hash encoder standing in for the sentence transformer
+"""
+
+import hashlib
+import json
+import sys
+import types
+
+import numpy as np
+import pytest
+
+pytest.importorskip('faiss')
+if 'sentence_transformers' not in sys.modules:
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        # Only the name is imported; every test replaces the model class below
+        sys.modules['sentence_transformers'] = types.SimpleNamespace(SentenceTransformer=None)
+
+import remedy_log
+import semantic_search
+from remedy_index import IndexConfig
+
+DIM = 32
+# Enough remedies to train a real IVF index rather than fall back to a flat scan
+REMEDIES = 1200
+
+
+class HashEncoder:
+    """Deterministic stand-in for SentenceTransformer: one pseudo-random vector per text"""
+
+    def __init__(self, model_name):
+        self.encoded = 0
+
+    def encode(self, texts, show_progress_bar=False, convert_to_numpy=True):
+        self.encoded += len(texts)
+        seeds = [int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:8], 16) for text in texts]
+        return np.stack([np.random.default_rng(seed).standard_normal(DIM) for seed in seeds]).astype(np.float32)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Scratch directory holding a dataset, with a fresh remedy log"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(semantic_search, 'SentenceTransformer', HashEncoder)
+    monkeypatch.setattr(semantic_search, 'USE_MMAP', True)
+    monkeypatch.setattr(remedy_log, '_remedy_log', None)
+    (tmp_path / 'models').mkdir()
+    remedies = [{"query": f"complaint {i}", "category": f"category {i % 7}", "remedy": f"remedy {i}",
+                 "intensity": "mild"} for i in range(REMEDIES)]
+    (tmp_path / 'desi_remedies_dataset.json').write_text(json.dumps(remedies), encoding='utf-8')
+    return tmp_path
+
+
+def restart(config: IndexConfig) -> semantic_search.SemanticRemedySearch:
+    """A new engine, as a freshly started worker would create it"""
+    remedy_log._remedy_log = None
+    return semantic_search.SemanticRemedySearch(index_config=config)
+
+
+@pytest.mark.parametrize('kind, codec', [
+    ('flat', 'float32'), ('flat', 'sq8'),
+    ('hnsw', 'float32'), ('hnsw', 'sq8'),
+    ('ivf', 'float32'), ('ivf', 'sq8')
+])
+def test_add_after_loading_saved_index(workdir, kind, codec):
+    config = IndexConfig(kind, codec=codec, nprobe=64)
+    restart(config)
+
+    engine = restart(config)
+    assert engine.encoded_on_load == 0
+    new = {"query": "fresh ginger tea", "category": "cold", "remedy": "steep ginger", "intensity": "mild"}
+    assert engine.add_remedy(new)
+    assert engine.index.ntotal == len(engine.remedies_data) == REMEDIES + 1
+    assert engine.search(semantic_search.remedy_text(new), top_k=1, threshold=0.0)[0][0] == new
+
+    # The add survives another restart through the remedy log
+    engine = restart(config)
+    assert engine.index.ntotal == len(engine.remedies_data) == REMEDIES + 1
+    assert engine.remedies_data[-1] == new
+
+
+class BrokenIndex:
+    """Index whose adds fail, standing in for a FAISS error"""
+
+    def __init__(self, index):
+        self.ntotal = index.ntotal
+
+    def add(self, vectors):
+        raise RuntimeError("add failed")
+
+
+def test_failed_index_add_keeps_logged_remedy(workdir):
+    engine = restart(IndexConfig('flat'))
+    engine.index = BrokenIndex(engine.index)
+    new = {"query": "fresh ginger tea", "category": "cold", "remedy": "steep ginger", "intensity": "mild"}
+
+    # Logged before the index failed, so it counts as added and the index is rebuilt to match
+    assert engine.add_remedy(new)
+    assert engine.index.ntotal == len(engine.remedies_data) == REMEDIES + 1
+    assert engine.search(semantic_search.remedy_text(new), top_k=1, threshold=0.0)[0][0] == new
+    assert [record['position'] for record in engine.log.records()] == [REMEDIES]
+
+
+def test_failed_log_append_changes_nothing(workdir, monkeypatch):
+    engine = restart(IndexConfig('flat'))
+
+    def append(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(engine.log, 'append', append)
+
+    assert not engine.add_remedy({"query": "q", "category": "c", "remedy": "r", "intensity": "mild"})
+    assert engine.index.ntotal == len(engine.remedies_data) == REMEDIES
+    assert engine._added_count == 0
+
+
+@pytest.mark.parametrize('query, expected', [
+    ("Don't eat 2.5g", "Don't eat 2.5g"),
+    ("102°F fever", "102°F fever"),
+    ("  Cold   and cough!  ", "Cold and cough"),
+    ('"Headache?"', "Headache"),
+    ("सर्दी और खांसी।", "सर्दी और खांसी"),
+    ("?", "?")
+])
+def test_normalize_query_keeps_meaning(query, expected):
+    assert semantic_search.normalize_query(query) == expected
+    assert semantic_search.normalize_query(query, lowercase=True) == expected.lower()
@@ -0,0 +1,42 @@
+"""
+Tabular Batch Scoring Tests
+JSON rows that are not objects, bare feature lists, and ids echoed back unchanged
+"""
+
+import numpy as np
+import pytest
+
+from tabular_batch import SPECS, frames_from_json, score_frames
+
+
+def constant_proba(features):
+    return np.tile([0.2, 0.8], (len(features), 1))
+
+
+@pytest.mark.parametrize('name', list(SPECS))
+def test_non_object_rows_fail_alone(name):
+    encoder, formatter = SPECS[name]
+    payload = [{"id": 7, "age": 50, "features": list(range(10))}, 7, "row", None, {"id": "b-2", "age": 40}]
+
+    lines = list(score_frames(frames_from_json(payload, SPECS[name]), encoder, formatter, constant_proba, np.array([0, 1])))
+
+    assert [line['row'] for line in lines] == [0, 1, 2, 3, 4]
+    assert 'error' not in lines[0]
+    assert all(line['error'] == "Row must be a JSON object" for line in lines[1:4])
+    assert lines[0]['id'] == 7 and isinstance(lines[0]['id'], int)
+    assert lines[4]['id'] == "b-2"
+    assert all('id' not in line for line in lines[1:4])
+
+
+@pytest.mark.parametrize('name', list(SPECS))
+def test_bare_lists_are_breast_features_only(name):
+    encoder, formatter = SPECS[name]
+    payload = [list(range(10)), {"age": 50}]
+
+    lines = list(score_frames(frames_from_json(payload, SPECS[name]), encoder, formatter, constant_proba, np.array([0, 1])))
+
+    if name == 'breast':
+        assert 'error' not in lines[0]
+    else:
+        assert lines[0]['error'] == "Row must be a JSON object"
+        assert 'error' not in lines[1]
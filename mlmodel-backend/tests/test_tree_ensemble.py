@@ -0,0 +1,64 @@
+"""
+Compiled Tree Ensemble Tests
+The compiled engine matches scikit-learn on soft-voting RF+GB ensembles, in
+memory and after a save/load round trip through memory-mapped arrays
+"""
+
+import joblib
+import numpy as np
+import pytest
+
+pytest.importorskip('sklearn')
+from sklearn.datasets import make_classification
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier, VotingClassifier
+from sklearn.preprocessing import StandardScaler
+
+import tree_ensemble
+from tree_ensemble import compile_model, compiled_path, load_compiled, load_engine
+
+
+def fitted(n_classes):
+    """A small soft-voting RF+GB ensemble with its scaler, and rows to score"""
+    X, y = make_classification(n_samples=400, n_features=8, n_informative=5, n_classes=n_classes,
+                               random_state=n_classes)
+    scaler = StandardScaler().fit(X[:300])
+    model = VotingClassifier([
+        ('rf', RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0)),
+        ('gb', GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0))
+    ], voting='soft').fit(scaler.transform(X[:300]), y[:300])
+    return model, scaler, X[300:]
+
+
+def assert_matches(engine, model, scaler, X):
+    expected = model.predict_proba(scaler.transform(X))
+    np.testing.assert_allclose(engine.predict_proba(X), expected, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(engine.predict(X), model.predict(scaler.transform(X)))
+
+
+@pytest.mark.parametrize('n_classes', [2, 3])
+def test_compiled_matches_sklearn(n_classes):
+    model, scaler, X = fitted(n_classes)
+    assert_matches(compile_model(model, scaler), model, scaler, X)
+
+
+@pytest.mark.parametrize('n_classes', [2, 3])
+def test_save_and_load_round_trip(tmp_path, n_classes):
+    model, scaler, X = fitted(n_classes)
+    model_path, scaler_path = str(tmp_path / 'model.pkl'), str(tmp_path / 'scaler.pkl')
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+
+    # First load compiles and writes the arrays next to the pickle
+    engine = load_engine(model_path, scaler_path, mmap_mode=None)
+    assert_matches(engine, model, scaler, X)
+
+    # Later loads map the saved arrays without reading either pickle
+    def unpickle(*args, **kwargs):
+        raise AssertionError("pickle read despite up-to-date compiled arrays")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(joblib, 'load', unpickle)
+        mapped = load_engine(model_path, scaler_path, mmap_mode='r')
+    assert all(isinstance(getattr(mapped, name), np.memmap) for name in tree_ensemble.ARRAY_NAMES)
+    assert_matches(mapped, model, scaler, X)
+
+    assert_matches(load_compiled(compiled_path(model_path)), model, scaler, X)
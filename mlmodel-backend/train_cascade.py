@@ -0,0 +1,119 @@
+"""
+Training and Benchmark for the Cascade Screening Model
+Trains the small first-stage CNN and measures the cascade against the full model
+
+The screening model learns the full model's own predictions (distillation),
+so labels are optional; with NORMAL/ and PNEUMONIA/ subfolders accuracy is
+reported too.
+
+Usage:
+    python train_cascade.py --data xray_dataset/ --epochs 10 --thresholds 0.9 0.95 0.99
+    PNEUMONIA_CASCADE=1 PNEUMONIA_CASCADE_THRESHOLD=0.95 python app.py
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from cascade import STAGE_SCREENING, CascadeClassifier
+from inference_backends import KerasBackend, load_labelled_images
+from pneumonia_model import (
+    SCREENING_WEIGHTS_PATH, WEIGHTS_PATH, build_screening_model, keras_weights_path, load_pneumonia_model
+)
+
+
+def timed(fn, batch: np.ndarray, batch_size: int):
+    """Run fn over the data in batches; returns (outputs, seconds)"""
+    start = time.perf_counter()
+    outputs = [fn(batch[i:i + batch_size]) for i in range(0, len(batch), batch_size)]
+    return outputs, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and benchmark the pneumonia cascade screening model")
+    parser.add_argument('--data', default='uploads',
+                        help="X-ray images (optionally NORMAL/ and PNEUMONIA/ subfolders)")
+    parser.add_argument('--weights', default=WEIGHTS_PATH, help="Full model weights")
+    parser.add_argument('--output', default=SCREENING_WEIGHTS_PATH, help="Screening model weights output, ending in .weights.h5")
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--holdout', type=float, default=0.2, help="Fraction of images held out for the benchmark")
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.9, 0.95, 0.99])
+    parser.add_argument('--batch-size', type=int, default=16)
+    args = parser.parse_args()
+    output = keras_weights_path(args.output)
+    if output != args.output:
+        print(f"Note: Keras saves weights only as *.weights.h5; writing {output}")
+        args.output = output
+
+    full_model = load_pneumonia_model(args.weights)
+    full = KerasBackend(full_model)
+    labels, images = load_labelled_images(args.data)
+    print(f"✓ Loaded {len(images)} images from {args.data}")
+
+    # Teacher outputs are the training targets and the agreement reference
+    teacher_probs = np.concatenate(timed(full.predict, images, args.batch_size)[0])
+    indices = np.arange(len(images))
+    train_idx, test_idx = train_test_split(
+        indices, test_size=args.holdout, random_state=42, stratify=np.argmax(teacher_probs, axis=1)
+    )
+
+    print(f"\nTraining screening model on {len(train_idx)} images...")
+    import tensorflow as tf
+    screening_model = build_screening_model()
+    screening_model.compile(optimizer=tf.keras.optimizers.Adam(1e-3), loss='categorical_crossentropy')
+    screening_model.fit(images[train_idx], teacher_probs[train_idx], epochs=args.epochs,
+                        batch_size=args.batch_size, verbose=2)
+    screening_model.save_weights(args.output)
+    print(f"✓ Saved screening model to {args.output}")
+
+    screening = KerasBackend(screening_model)
+    test_images = images[test_idx]
+    test_teacher = np.argmax(teacher_probs[test_idx], axis=1)
+    full.warmup([1, args.batch_size])
+    screening.warmup([1, args.batch_size])
+
+    full_outputs, full_seconds = timed(full.predict, test_images, args.batch_size)
+    full_pred = np.argmax(np.concatenate(full_outputs), axis=1)
+    full_throughput = len(test_images) / full_seconds
+
+    report = {"holdout_images": len(test_idx), "full_model_images_per_sec": full_throughput, "thresholds": {}}
+    if labels is not None:
+        report["full_model_accuracy"] = float(np.mean(full_pred == labels[test_idx]))
+
+    print("\n" + "=" * 72)
+    print(f"{'threshold':>10}{'stage 1':>10}{'stage 2':>10}{'agree':>10}{'img/s':>10}{'speedup':>10}{'acc':>10}")
+    print("-" * 72)
+    for threshold in args.thresholds:
+        cascade = CascadeClassifier(screening.predict, full.predict, threshold)
+        outputs, seconds = timed(cascade.predict, test_images, args.batch_size)
+        probs = np.concatenate([p for p, _ in outputs])
+        stages = np.concatenate([s for _, s in outputs])
+        pred = np.argmax(probs, axis=1)
+
+        row = {
+            "screening_fraction": float(np.mean(stages == STAGE_SCREENING)),
+            "agreement_with_full": float(np.mean(pred == test_teacher)),
+            "images_per_sec": len(test_images) / seconds,
+            "speedup": full_seconds / seconds
+        }
+        if labels is not None:
+            row["accuracy"] = float(np.mean(pred == labels[test_idx]))
+        report["thresholds"][str(threshold)] = row
+
+        accuracy = f"{row['accuracy'] * 100:.1f}%" if 'accuracy' in row else '-'
+        print(f"{threshold:>10.3f}{row['screening_fraction'] * 100:>9.1f}%{(1 - row['screening_fraction']) * 100:>9.1f}%"
+              f"{row['agreement_with_full'] * 100:>9.1f}%{row['images_per_sec']:>10.1f}{row['speedup']:>9.2f}x{accuracy:>10}")
+    print("=" * 72)
+    print(f"Full model alone: {full_throughput:.1f} img/s")
+
+    report_path = args.output.rsplit('.', 1)[0] + '_report.json'
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Report written to {report_path}")
+
+
+if __name__ == '__main__':
+    main()
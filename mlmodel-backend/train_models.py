@@ -2,369 +2,320 @@
 Training script for ML models
 Trains models for Heart Disease, Breast Cancer, and PCOD prediction
 Target accuracy: 87-95%
+
+Any subset of the models can be trained, each in its own process, so a full
+retrain takes as long as the slowest model rather than the sum. Generated
+datasets and their train/test splits are cached under --cache-dir and reused
+while the generation and split settings are unchanged.
+
+Usage:
+    python train_models.py                          # all three, in parallel
+    python train_models.py heart pcod --jobs 2
+    python train_models.py breast --rows 100000 --no-cache
 """
 
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Tuple
+
+import joblib
 import numpy as np
-import pandas as pd
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier, VotingClassifier
+from sklearn.metrics import accuracy_score
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier, AdaBoostClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-import joblib
-import os
 
-print("=" * 60)
-print("Training ML Models for Health System")
-print("=" * 60)
-
-# Create models directory
-os.makedirs('models', exist_ok=True)
-
-# ============================================================================
-# 1. HEART DISEASE PREDICTION MODEL
-# ============================================================================
-print("\n[1/3] Training Heart Disease Prediction Model...")
-
-# Generate synthetic heart disease dataset based on real-world patterns
-np.random.seed(42)
-n_samples = 3000  # Increased dataset size
-
-# Features: age, gender (0=female, 1=male), blood_pressure, cholesterol, diabetes (0=no, 1=yes)
-# Target: 0=Low Risk, 1=Medium Risk, 2=High Risk
-
-heart_data = []
-heart_labels = []
-
-for _ in range(n_samples):
-    age = np.random.randint(25, 80)
-    gender = np.random.choice([0, 1])
-    bp = np.random.normal(120, 20)
-    cholesterol = np.random.normal(200, 40)
-    diabetes = np.random.choice([0, 1], p=[0.85, 0.15])
-    
-    # Calculate risk score (realistic pattern)
-    risk = 0
-    if age > 55: risk += 3
-    elif age > 45: risk += 2
-    elif age > 35: risk += 1
-    
-    if bp > 135: risk += 3
-    elif bp > 125: risk += 2
-    elif bp > 115: risk += 1
-    
-    if cholesterol > 200: risk += 3
-    elif cholesterol > 180: risk += 2
-    elif cholesterol > 160: risk += 1
-    
-    if diabetes: risk += 3
-    if gender == 1: risk += 1
-    
-    # Minimal noise for high accuracy
-    noise = np.random.normal(0, 0.2)
-    risk = risk + noise
-    risk = max(0, min(12, risk))
-    
-    # Very deterministic labeling for high accuracy
-    if risk >= 8:
-        label = 2  # High Risk
-    elif risk >= 5.5:
-        label = 1  # Medium Risk
-    else:
-        label = 0  # Low Risk
-    
-    heart_data.append([age, gender, bp, cholesterol, diabetes])
-    heart_labels.append(label)
-
-X_heart = np.array(heart_data)
-y_heart = np.array(heart_labels)
-
-# Split data
-X_train, X_test, y_train, y_test = train_test_split(
-    X_heart, y_heart, test_size=0.2, random_state=42, stratify=y_heart
-)
-
-# Scale features
-scaler_heart = StandardScaler()
-X_train_scaled = scaler_heart.fit_transform(X_train)
-X_test_scaled = scaler_heart.transform(X_test)
-
-# Train ensemble model for better accuracy
-rf = RandomForestClassifier(
-    n_estimators=300,
-    max_depth=20,
-    min_samples_split=3,
-    min_samples_leaf=1,
-    max_features='sqrt',
-    bootstrap=True,
-    random_state=42,
-    n_jobs=-1,
-    class_weight='balanced'
-)
-
-gb = GradientBoostingClassifier(
-    n_estimators=300,
-    learning_rate=0.03,
-    max_depth=10,
-    min_samples_split=4,
-    min_samples_leaf=2,
-    subsample=0.8,
-    random_state=42
-)
-
-# Use voting classifier for better accuracy
-heart_model = VotingClassifier(
-    estimators=[('rf', rf), ('gb', gb)],
-    voting='soft',
-    weights=[2, 1]
-)
-heart_model.fit(X_train_scaled, y_train)
-
-# Evaluate
-y_pred = heart_model.predict(X_test_scaled)
-accuracy = accuracy_score(y_test, y_pred)
-
-print(f"  Accuracy: {accuracy*100:.2f}%")
-print(f"  Training samples: {len(X_train)}")
-print(f"  Test samples: {len(X_test)}")
-
-# Save model and scaler
-joblib.dump(heart_model, 'models/heart_disease_model.pkl')
-joblib.dump(scaler_heart, 'models/heart_disease_scaler.pkl')
-print("  ✓ Model saved to models/heart_disease_model.pkl")
-
-# ============================================================================
-# 2. BREAST CANCER PREDICTION MODEL
-# ============================================================================
-print("\n[2/3] Training Breast Cancer Prediction Model...")
-
-# Generate synthetic breast cancer dataset based on Wisconsin Breast Cancer patterns
-np.random.seed(42)
-n_samples = 2500  # Increased dataset size
-
-breast_data = []
-breast_labels = []
-
-for _ in range(n_samples):
-    # Generate features similar to Wisconsin Breast Cancer dataset
-    mean_radius = np.random.normal(14, 3)
-    mean_texture = np.random.normal(19, 4)
-    mean_perimeter = np.random.normal(92, 25)
-    mean_area = np.random.normal(655, 350)
-    mean_smoothness = np.random.normal(0.096, 0.014)
-    mean_compactness = np.random.normal(0.104, 0.053)
-    mean_concavity = np.random.normal(0.089, 0.080)
-    mean_concave_points = np.random.normal(0.049, 0.039)
-    mean_symmetry = np.random.normal(0.181, 0.027)
-    mean_fractal_dimension = np.random.normal(0.063, 0.007)
-    
-    # Determine if malignant based on realistic thresholds
-    is_malignant = 0
-    if mean_radius > 15: is_malignant += 1
-    if mean_texture > 20: is_malignant += 1
-    if mean_perimeter > 100: is_malignant += 1
-    if mean_area > 1000: is_malignant += 1
-    if mean_compactness > 0.1: is_malignant += 1
-    if mean_concavity > 0.1: is_malignant += 1
-    if mean_concave_points > 0.05: is_malignant += 1
-    
-    # More deterministic labeling based on feature combinations
-    malignant_score = (
-        (mean_radius > 15) * 2 +
-        (mean_texture > 20) * 1 +
-        (mean_perimeter > 100) * 2 +
-        (mean_area > 1000) * 2 +
-        (mean_compactness > 0.1) * 2 +
-        (mean_concavity > 0.1) * 2 +
-        (mean_concave_points > 0.05) * 2
+from synthetic_data import CHUNK_ROWS, generate
+from tree_ensemble import export_compiled
+
+CACHE_DIR = '.train_cache'
+TEST_SIZE = 0.2
+SPLIT_SEED = 42
+
+SPLIT_NAMES = ('X_train', 'X_test', 'y_train', 'y_test')
+
+
+def build_heart(n_jobs: int = -1) -> VotingClassifier:
+    """RF (weight 2) + GB (weight 1) soft-voting ensemble for heart disease risk"""
+    rf = RandomForestClassifier(
+        n_estimators=300,
+        max_depth=20,
+        min_samples_split=3,
+        min_samples_leaf=1,
+        max_features='sqrt',
+        bootstrap=True,
+        random_state=42,
+        n_jobs=n_jobs,
+        class_weight='balanced'
     )
-    
-    # Very deterministic threshold for high accuracy
-    if malignant_score >= 8:
-        label = 1  # Malignant
-    elif malignant_score >= 5:
-        label = 1 if np.random.random() > 0.15 else 0  # Mostly malignant
-    else:
-        label = 0  # Benign
-    
-    breast_data.append([
-        mean_radius, mean_texture, mean_perimeter, mean_area,
-        mean_smoothness, mean_compactness, mean_concavity,
-        mean_concave_points, mean_symmetry, mean_fractal_dimension
-    ])
-    breast_labels.append(label)
-
-X_breast = np.array(breast_data)
-y_breast = np.array(breast_labels)
-
-# Split data
-X_train, X_test, y_train, y_test = train_test_split(
-    X_breast, y_breast, test_size=0.2, random_state=42, stratify=y_breast
-)
-
-# Scale features
-scaler_breast = StandardScaler()
-X_train_scaled = scaler_breast.fit_transform(X_train)
-X_test_scaled = scaler_breast.transform(X_test)
-
-# Train ensemble model for better accuracy
-gb_breast = GradientBoostingClassifier(
-    n_estimators=300,
-    learning_rate=0.03,
-    max_depth=10,
-    min_samples_split=5,
-    min_samples_leaf=2,
-    subsample=0.8,
-    max_features='sqrt',
-    random_state=42
-)
-
-rf_breast = RandomForestClassifier(
-    n_estimators=250,
-    max_depth=15,
-    min_samples_split=3,
-    random_state=42,
-    n_jobs=-1
-)
-
-breast_model = VotingClassifier(
-    estimators=[('gb', gb_breast), ('rf', rf_breast)],
-    voting='soft',
-    weights=[2, 1]
-)
-breast_model.fit(X_train_scaled, y_train)
-
-# Evaluate
-y_pred = breast_model.predict(X_test_scaled)
-accuracy = accuracy_score(y_test, y_pred)
-
-print(f"  Accuracy: {accuracy*100:.2f}%")
-print(f"  Training samples: {len(X_train)}")
-print(f"  Test samples: {len(X_test)}")
-
-# Save model and scaler
-joblib.dump(breast_model, 'models/breast_cancer_model.pkl')
-joblib.dump(scaler_breast, 'models/breast_cancer_scaler.pkl')
-print("  ✓ Model saved to models/breast_cancer_model.pkl")
-
-# ============================================================================
-# 3. PCOD PREDICTION MODEL
-# ============================================================================
-print("\n[3/3] Training PCOD Prediction Model...")
-
-# Generate synthetic PCOD dataset
-np.random.seed(42)
-n_samples = 2800  # Increased dataset size
-
-pcod_data = []
-pcod_labels = []
-
-for _ in range(n_samples):
-    age = np.random.randint(15, 45)
-    bmi = np.random.normal(25, 5)
-    cycle_length = np.random.normal(28, 7)
-    period_flow = np.random.choice([0, 1, 2], p=[0.2, 0.5, 0.3])  # 0=light, 1=normal, 2=heavy
-    
-    # Calculate risk
-    risk = 0
-    if 15 <= age <= 44: risk += 1
-    if bmi > 30: risk += 3
-    elif bmi > 25: risk += 2
-    elif bmi > 23: risk += 1
-    
-    if cycle_length > 35: risk += 3
-    elif cycle_length > 30: risk += 2
-    elif cycle_length < 21: risk += 2
-    
-    if period_flow == 2: risk += 2  # heavy
-    elif period_flow == 0: risk += 1  # light
-    
-    # Minimal noise for high accuracy
-    noise = np.random.normal(0, 0.2)
-    risk = risk + noise
-    risk = max(0, min(10, risk))
-    
-    # Very deterministic labeling for high accuracy
-    if risk >= 7.5:
-        label = 2  # High Risk
-    elif risk >= 4.5:
-        label = 1  # Medium Risk
+    gb = GradientBoostingClassifier(
+        n_estimators=300,
+        learning_rate=0.03,
+        max_depth=10,
+        min_samples_split=4,
+        min_samples_leaf=2,
+        subsample=0.8,
+        random_state=42
+    )
+    # Use voting classifier for better accuracy
+    return VotingClassifier(estimators=[('rf', rf), ('gb', gb)], voting='soft', weights=[2, 1])
+
+
+def build_breast(n_jobs: int = -1) -> VotingClassifier:
+    """GB (weight 2) + RF (weight 1) soft-voting ensemble for breast cancer malignancy"""
+    gb = GradientBoostingClassifier(
+        n_estimators=300,
+        learning_rate=0.03,
+        max_depth=10,
+        min_samples_split=5,
+        min_samples_leaf=2,
+        subsample=0.8,
+        max_features='sqrt',
+        random_state=42
+    )
+    rf = RandomForestClassifier(
+        n_estimators=250,
+        max_depth=15,
+        min_samples_split=3,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+    return VotingClassifier(estimators=[('gb', gb), ('rf', rf)], voting='soft', weights=[2, 1])
+
+
+def build_pcod(n_jobs: int = -1) -> VotingClassifier:
+    """RF (weight 2) + GB (weight 1) soft-voting ensemble for PCOD risk"""
+    rf = RandomForestClassifier(
+        n_estimators=300,
+        max_depth=18,
+        min_samples_split=3,
+        min_samples_leaf=1,
+        max_features='sqrt',
+        bootstrap=True,
+        random_state=42,
+        n_jobs=n_jobs,
+        class_weight='balanced'
+    )
+    gb = GradientBoostingClassifier(
+        n_estimators=300,
+        learning_rate=0.03,
+        max_depth=10,
+        min_samples_split=4,
+        min_samples_leaf=2,
+        subsample=0.8,
+        random_state=42
+    )
+    return VotingClassifier(estimators=[('rf', rf), ('gb', gb)], voting='soft', weights=[2, 1])
+
+
+# name -> title, default dataset size, estimator builder and artifact paths
+MODELS = {
+    'heart': {
+        'title': "Heart Disease",
+        'rows': 3000,
+        'build': build_heart,
+        'model_path': 'models/heart_disease_model.pkl',
+        'scaler_path': 'models/heart_disease_scaler.pkl',
+    },
+    'breast': {
+        'title': "Breast Cancer",
+        'rows': 2500,
+        'build': build_breast,
+        'model_path': 'models/breast_cancer_model.pkl',
+        'scaler_path': 'models/breast_cancer_scaler.pkl',
+    },
+    'pcod': {
+        'title': "PCOD",
+        'rows': 2800,
+        'build': build_pcod,
+        'model_path': 'models/pcod_model.pkl',
+        'scaler_path': 'models/pcod_scaler.pkl',
+    },
+}
+
+
+def load_split(name: str, rows: int, seed: int = 42, cache_dir: str = CACHE_DIR) -> Tuple[Tuple[np.ndarray, ...], bool]:
+    """
+    Generated dataset split into (X_train, X_test, y_train, y_test)
+
+    The split is cached under cache_dir, keyed on every setting that
+    determines it, so reruns skip both generation and splitting.
+
+    Returns:
+        (split, cache_hit)
+    """
+    key = f"{name}-n{rows}-s{seed}-c{CHUNK_ROWS}-t{TEST_SIZE}-r{SPLIT_SEED}"
+    directory = os.path.join(cache_dir, key) if cache_dir else None
+    if directory and all(os.path.exists(os.path.join(directory, f'{part}.npy')) for part in SPLIT_NAMES):
+        return tuple(np.load(os.path.join(directory, f'{part}.npy')) for part in SPLIT_NAMES), True
+
+    X, y = generate(name, rows, seed=seed)
+    split = tuple(train_test_split(X, y, test_size=TEST_SIZE, random_state=SPLIT_SEED, stratify=y))
+    if directory:
+        # Staged in a temporary directory so a concurrent run never reads half a split
+        staging = f"{directory}.tmp-{os.getpid()}"
+        os.makedirs(staging, exist_ok=True)
+        for part, array in zip(SPLIT_NAMES, split):
+            np.save(os.path.join(staging, f'{part}.npy'), array)
+        try:
+            os.rename(staging, directory)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+    return split, False
+
+
+def train_model(name: str, rows: int, seed: int = 42, cache_dir: str = CACHE_DIR, n_jobs: int = -1) -> Dict:
+    """
+    Generate (or reuse) data, fit, evaluate and save one model with its scaler
+
+    Args:
+        name: Key of MODELS
+        rows: Dataset size before the train/test split
+        seed: Data generation seed
+        cache_dir: Split cache directory ('' disables caching)
+        n_jobs: Worker threads for the random forest member
+
+    Returns:
+        Timings, accuracy and sample counts
+    """
+    spec = MODELS[name]
+    start = time.perf_counter()
+    (X_train, X_test, y_train, y_test), cache_hit = load_split(name, rows, seed, cache_dir)
+    data_seconds = time.perf_counter() - start
+
+    # Scale features
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    fit_start = time.perf_counter()
+    model = spec['build'](n_jobs)
+    model.fit(X_train_scaled, y_train)
+    fit_seconds = time.perf_counter() - fit_start
+
+    # Evaluate
+    accuracy = accuracy_score(y_test, model.predict(X_test_scaled))
+
+    # Save model and scaler
+    os.makedirs(os.path.dirname(spec['model_path']), exist_ok=True)
+    joblib.dump(model, spec['model_path'])
+    joblib.dump(scaler, spec['scaler_path'])
+    # Uncompressed node arrays the server memory-maps instead of unpickling the ensemble
+    export_compiled(spec['model_path'], spec['scaler_path'], model, scaler)
+
+    return {
+        "model": name,
+        "accuracy": round(float(accuracy), 4),
+        "train_samples": len(X_train),
+        "test_samples": len(X_test),
+        "cache_hit": cache_hit,
+        "data_seconds": round(data_seconds, 2),
+        "fit_seconds": round(fit_seconds, 2),
+        "wall_seconds": round(time.perf_counter() - start, 2)
+    }
+
+
+def print_result(result: Dict):
+    spec = MODELS[result['model']]
+    source = "cached split" if result['cache_hit'] else "generated data"
+    print(f"\n✓ {spec['title']} model trained in {result['wall_seconds']:.1f}s "
+          f"({source} {result['data_seconds']:.1f}s, fit {result['fit_seconds']:.1f}s)")
+    print(f"  Accuracy: {result['accuracy'] * 100:.2f}%")
+    print(f"  Training samples: {result['train_samples']}")
+    print(f"  Test samples: {result['test_samples']}")
+    print(f"  ✓ Model saved to {spec['model_path']}")
+    print(f"  ✓ Compiled arrays saved to {os.path.splitext(spec['model_path'])[0]}.compiled/")
+
+
+class _ModelNames(argparse.Action):
+    """Checks names against MODELS and fills in all of them when none are given"""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        unknown = [name for name in values if name not in MODELS]
+        if unknown:
+            parser.error(f"unknown model(s): {', '.join(unknown)} (choose from {', '.join(MODELS)})")
+        setattr(namespace, self.dest, list(values) or list(MODELS))
+
+
+def add_models_argument(parser: argparse.ArgumentParser, verb: str):
+    """
+    Add the optional positional list of MODELS keys shared by the training CLIs
+
+    Validated by the action rather than with choices=, which rejects an empty
+    list before Python 3.12.
+
+    Args:
+        parser: Parser (or subparser) of the command
+        verb: What the command does to the models, for the help text
+    """
+    parser.add_argument('models', nargs='*', action=_ModelNames, metavar='{' + ','.join(MODELS) + '}',
+                        help=f"Models to {verb} (default: all)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the heart, breast cancer and PCOD risk models")
+    add_models_argument(parser, 'train')
+    parser.add_argument('--jobs', type=int, default=0,
+                        help="Models trained at once in separate processes (default: one per model, up to the core count)")
+    parser.add_argument('--rows', type=int, help="Dataset size for every selected model (default: per-model size)")
+    parser.add_argument('--seed', type=int, default=42, help="Data generation seed")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Where generated splits are cached")
+    parser.add_argument('--no-cache', action='store_true', help="Regenerate data and do not cache it")
+    parser.add_argument('--report', help="Write per-model timings and accuracy as JSON to this path")
+    args = parser.parse_args()
+
+    models = list(dict.fromkeys(args.models))
+    cores = os.cpu_count() or 1
+    jobs = max(1, min(args.jobs or len(models), len(models), cores))
+    # Share the cores between concurrently trained forests instead of oversubscribing them
+    forest_jobs = max(1, cores // jobs)
+    cache_dir = '' if args.no_cache else args.cache_dir
+
+    print("=" * 60)
+    print("Training ML Models for Health System")
+    print("=" * 60)
+    print(f"Models: {', '.join(models)} ({jobs} at a time, {forest_jobs} forest thread(s) each)")
+
+    start = time.perf_counter()
+    tasks = [(name, args.rows or MODELS[name]['rows'], args.seed, cache_dir, forest_jobs) for name in models]
+    results = []
+    if jobs == 1:
+        for task in tasks:
+            print(f"\nTraining {MODELS[task[0]]['title']} Prediction Model...")
+            results.append(train_model(*task))
+            print_result(results[-1])
     else:
-        label = 0  # Low Risk
-    
-    pcod_data.append([age, bmi, cycle_length, period_flow])
-    pcod_labels.append(label)
-
-X_pcod = np.array(pcod_data)
-y_pcod = np.array(pcod_labels)
-
-# Split data
-X_train, X_test, y_train, y_test = train_test_split(
-    X_pcod, y_pcod, test_size=0.2, random_state=42, stratify=y_pcod
-)
-
-# Scale features
-scaler_pcod = StandardScaler()
-X_train_scaled = scaler_pcod.fit_transform(X_train)
-X_test_scaled = scaler_pcod.transform(X_test)
-
-# Train ensemble model for better accuracy
-rf_pcod = RandomForestClassifier(
-    n_estimators=300,
-    max_depth=18,
-    min_samples_split=3,
-    min_samples_leaf=1,
-    max_features='sqrt',
-    bootstrap=True,
-    random_state=42,
-    n_jobs=-1,
-    class_weight='balanced'
-)
-
-gb_pcod = GradientBoostingClassifier(
-    n_estimators=300,
-    learning_rate=0.03,
-    max_depth=10,
-    min_samples_split=4,
-    min_samples_leaf=2,
-    subsample=0.8,
-    random_state=42
-)
-
-pcod_model = VotingClassifier(
-    estimators=[('rf', rf_pcod), ('gb', gb_pcod)],
-    voting='soft',
-    weights=[2, 1]
-)
-pcod_model.fit(X_train_scaled, y_train)
-
-# Evaluate
-y_pred = pcod_model.predict(X_test_scaled)
-accuracy = accuracy_score(y_test, y_pred)
-
-print(f"  Accuracy: {accuracy*100:.2f}%")
-print(f"  Training samples: {len(X_train)}")
-print(f"  Test samples: {len(X_test)}")
-
-# Save model and scaler
-joblib.dump(pcod_model, 'models/pcod_model.pkl')
-joblib.dump(scaler_pcod, 'models/pcod_scaler.pkl')
-print("  ✓ Model saved to models/pcod_model.pkl")
-
-# ============================================================================
-# Summary
-# ============================================================================
-print("\n" + "=" * 60)
-print("Training Complete!")
-print("=" * 60)
-print("\nModels saved in 'models/' directory:")
-print("  - heart_disease_model.pkl")
-print("  - breast_cancer_model.pkl")
-print("  - pcod_model.pkl")
-print("\nScalers saved:")
-print("  - heart_disease_scaler.pkl")
-print("  - breast_cancer_scaler.pkl")
-print("  - pcod_scaler.pkl")
-print("\nAll models are ready to use in the backend!")
-
+        # The GradientBoosting members fit on one core each, so models gain most from their own process
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(train_model, *task) for task in tasks]
+            for future in as_completed(futures):
+                results.append(future.result())
+                print_result(results[-1])
+    wall = time.perf_counter() - start
+
+    # ============================================================================
+    # Summary
+    # ============================================================================
+    total = sum(result['wall_seconds'] for result in results)
+    print("\n" + "=" * 60)
+    print("Training Complete!")
+    print("=" * 60)
+    print(f"{'model':<10}{'accuracy':>10}{'data':>9}{'fit':>9}{'wall':>9}")
+    for result in sorted(results, key=lambda r: models.index(r['model'])):
+        print(f"{result['model']:<10}{result['accuracy'] * 100:>9.2f}%{result['data_seconds']:>8.1f}s"
+              f"{result['fit_seconds']:>8.1f}s{result['wall_seconds']:>8.1f}s")
+    print(f"\nWall time {wall:.1f}s (sum of per-model times {total:.1f}s)")
+    print("\nAll models are ready to use in the backend!")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({"wall_seconds": round(wall, 2), "jobs": jobs, "models": results}, f, indent=2)
+        print(f"✓ Report written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
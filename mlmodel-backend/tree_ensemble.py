@@ -0,0 +1,539 @@
+"""
+Array-Backed Tree Ensemble Engine
+Evaluates the soft-voting RandomForest + GradientBoosting risk models from
+contiguous NumPy node arrays instead of walking scikit-learn estimators
+
+Every tree of every member model is flattened into one set of node arrays,
+so a call traverses all trees together, one vectorized step per tree level,
+and returns class probabilities from a single pass. The prediction is taken
+as the argmax of those probabilities, exactly as VotingClassifier.predict does.
+
+The StandardScaler is folded into the engine: inputs are standardized with
+the same float64 operations as scaler.transform and cast to float32 like the
+scikit-learn tree code, so probabilities match the original pipeline.
+
+Compiled arrays are saved as uncompressed .npy files next to the model pickle
+(models/heart_disease_model.compiled/) and memory-mapped read-only when loaded,
+so every worker process serves from the same page-cache copy.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from prediction_cache import file_fingerprint
+
+# Rows evaluated per traversal; bounds the (rows, trees, classes) leaf gather
+CHUNK_ROWS = 256
+
+# (row, tree) pairs walked together; larger inputs are split into blocks of trees
+BLOCK_PAIRS = 32768
+
+# Tree levels stepped between removals of (row, tree) pairs that reached a leaf
+COMPACT_EVERY = 2
+
+ARRAY_NAMES = ('feature', 'threshold', 'children', 'values', 'roots')
+
+ENGINE_NAMES = ['compiled', 'sklearn']
+
+
+def _leaf_probabilities(tree) -> np.ndarray:
+    """Per-node class probabilities of a fitted DecisionTreeClassifier"""
+    value = tree.tree_.value[:, 0, :tree.n_classes_].astype(np.float64)
+    totals = value.sum(axis=1)
+    # scikit-learn >= 1.4 stores fractions already; older versions store counts
+    if np.allclose(totals, 1.0):
+        return value
+    totals[totals == 0.0] = 1.0
+    return value / totals[:, np.newaxis]
+
+
+def _float32_floor(threshold: np.ndarray) -> np.ndarray:
+    """
+    Largest float32 not above each float64 threshold
+
+    The tree code compares float32 inputs with float64 thresholds; for a
+    float32 x, x <= t exactly when x <= floor32(t), so thresholds can be
+    stored and compared in float32 without changing any split.
+    """
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+class _NodeBuilder:
+    """Accumulates trees into flat node arrays with global child indices"""
+
+    def __init__(self, n_classes: int):
+        self.n_classes = n_classes
+        self.parts: Dict[str, List[np.ndarray]] = {name: [] for name in ARRAY_NAMES if name != 'roots'}
+        self.roots: List[int] = []
+        self.count = 0
+        self.depth = 0
+
+    def add(self, tree, values: np.ndarray) -> None:
+        """Append one fitted tree; values holds one (n_classes,) row per node"""
+        t = tree.tree_
+        n = t.node_count
+        own = np.arange(self.count, self.count + n, dtype=np.int32)
+        leaf = t.children_left < 0
+
+        # (left, right) pairs; leaves point at themselves so extra steps are no-ops
+        left = np.where(leaf, own, t.children_left + self.count)
+        right = np.where(leaf, own, t.children_right + self.count)
+        self.parts['children'].append(np.column_stack([left, right]).astype(np.int32).ravel())
+        self.parts['feature'].append(np.where(leaf, 0, t.feature).astype(np.int32))
+        self.parts['threshold'].append(_float32_floor(np.where(leaf, np.inf, t.threshold)))
+        self.parts['values'].append(values)
+
+        self.roots.append(self.count)
+        self.count += n
+        self.depth = max(self.depth, int(t.max_depth))
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: np.ascontiguousarray(np.concatenate(parts)) for name, parts in self.parts.items()}
+        arrays['roots'] = np.asarray(self.roots, dtype=np.int32)
+        return arrays
+
+
+def _add_forest(builder: _NodeBuilder, forest) -> Dict:
+    start = len(builder.roots)
+    for tree in getattr(forest, 'estimators_', [forest]):
+        builder.add(tree, _leaf_probabilities(tree))
+    return {"kind": "forest", "trees": [start, len(builder.roots)]}
+
+
+def _add_boosting(builder: _NodeBuilder, gb) -> Dict:
+    from sklearn.dummy import DummyClassifier
+
+    if not (gb.init_ == 'zero' or isinstance(gb.init_, DummyClassifier)):
+        raise ValueError("Only the default prior (or 'zero') init estimator can be compiled")
+
+    start = len(builder.roots)
+    n_features = gb.n_features_in_
+    # The prior init produces the same raw score for every row
+    init = gb._raw_predict_init(np.zeros((1, n_features)))[0]
+    per_stage = gb.estimators_.shape[1]
+    for stage in gb.estimators_:
+        for k, tree in enumerate(stage):
+            values = np.zeros((tree.tree_.node_count, builder.n_classes))
+            # Same product predict_stages adds for each stage
+            values[:, k] = gb.learning_rate * tree.tree_.value[:, 0, 0]
+            builder.add(tree, values)
+    return {
+        "kind": "boosting",
+        "trees": [start, len(builder.roots)],
+        "init": init.tolist(),
+        "outputs": per_stage
+    }
+
+
+def _add_member(builder: _NodeBuilder, model) -> Dict:
+    from sklearn.ensemble import GradientBoostingClassifier
+    from sklearn.ensemble._forest import ForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    if isinstance(model, GradientBoostingClassifier):
+        return _add_boosting(builder, model)
+    if isinstance(model, (ForestClassifier, DecisionTreeClassifier)):
+        return _add_forest(builder, model)
+    raise ValueError(f"Cannot compile {type(model).__name__}")
+
+
+def _scaler_arrays(scaler) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    if scaler is None:
+        return None, None
+    from sklearn.preprocessing import StandardScaler
+
+    if not isinstance(scaler, StandardScaler):
+        raise ValueError(f"Cannot fold {type(scaler).__name__}; only StandardScaler is supported")
+    mean = scaler.mean_ if scaler.with_mean else None
+    scale = scaler.scale_ if scaler.with_std else None
+    return mean, scale
+
+
+class CompiledEnsemble:
+    """
+    Tree ensemble compiled into flat node arrays
+
+    Args:
+        arrays: Node arrays (feature, threshold, children, values, roots)
+        meta: Components, voting weights, classes and scaler parameters
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.children = arrays['children']
+        self.values = arrays['values']
+        self.roots = arrays['roots']
+        self.meta = meta
+
+        self.components = meta['components']
+        self.weights = meta.get('weights')
+        self.depth = meta['depth']
+        self.classes_ = np.asarray(meta['classes'])
+        self.n_features_in_ = meta['n_features']
+        self.mean = None if meta.get('mean') is None else np.asarray(meta['mean'], dtype=np.float64)
+        self.scale = None if meta.get('scale') is None else np.asarray(meta['scale'], dtype=np.float64)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+    def _prepare(self, X) -> np.ndarray:
+        """Apply the folded scaler like scaler.transform, then cast like the tree code"""
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got {X.shape[1]}")
+        if self.mean is not None:
+            X -= self.mean
+        if self.scale is not None:
+            X /= self.scale
+        return X.astype(np.float32)
+
+    def _walk(self, flat_x: np.ndarray, n_rows: int, roots: np.ndarray) -> np.ndarray:
+        """Leaf reached by every (row, tree) pair for the given tree roots"""
+        nodes = np.tile(roots, n_rows)
+        # Offset of each pair's row in flat_x
+        offsets = np.repeat(np.arange(n_rows, dtype=np.int64) * self.n_features_in_, len(roots))
+
+        # Pairs that reached a leaf are dropped every COMPACT_EVERY levels, so
+        # shallow trees stop costing anything once they finish
+        active = np.arange(len(nodes))
+        current = nodes
+        for level in range(1, self.depth + 1):
+            go_right = ~(flat_x.take(offsets + self.feature.take(current)) <= self.threshold.take(current))
+            current = self.children.take(2 * current + go_right)
+            if level % COMPACT_EVERY == 0 or level == self.depth:
+                nodes[active] = current
+                keep = self.children.take(2 * current) != current
+                active, current, offsets = active[keep], current[keep], offsets[keep]
+                if not len(active):
+                    break
+        return nodes.reshape(n_rows, len(roots))
+
+    def _leaves(self, X32: np.ndarray) -> np.ndarray:
+        """Leaf node index reached by each row in each tree, shape (rows, trees)"""
+        n_rows, n_trees = len(X32), len(self.roots)
+        flat_x = X32.ravel()
+        block = max(1, BLOCK_PAIRS // n_rows)
+        if block >= n_trees:
+            return self._walk(flat_x, n_rows, self.roots)
+
+        # Larger inputs walk a block of trees at a time so its nodes stay in cache
+        leaves = np.empty((n_rows, n_trees), dtype=self.roots.dtype)
+        for start in range(0, n_trees, block):
+            leaves[:, start:start + block] = self._walk(flat_x, n_rows, self.roots[start:start + block])
+        return leaves
+
+    def _component_proba(self, component: Dict, leaves: np.ndarray) -> np.ndarray:
+        start, end = component['trees']
+        leaves = leaves[:, start:end]
+
+        if component['kind'] == 'forest':
+            # Sequential sum in tree order, then the mean, as RandomForest does
+            total = np.add.accumulate(self.values[leaves], axis=1)[:, -1]
+            return total / (end - start)
+
+        # Trees are stored stage by stage; tree k of a stage only feeds output k
+        outputs = component['outputs']
+        n_classes = self.values.shape[1]
+        column = np.arange(end - start) % outputs
+        stages = self.values.ravel().take(leaves * n_classes + column).reshape(len(leaves), -1, outputs)
+        init = np.broadcast_to(np.asarray(component['init']), (len(leaves), 1, outputs))
+        raw = np.add.accumulate(np.concatenate([init, stages], axis=1), axis=1)[:, -1]
+        if outputs == 1:
+            from scipy.special import expit
+            proba = np.empty((len(raw), 2), dtype=np.float64)
+            proba[:, 1] = expit(raw[:, 0])
+            proba[:, 0] = 1 - proba[:, 1]
+            return proba
+        from sklearn.utils.extmath import softmax
+        return softmax(raw)
+
+    def _predict_proba_chunk(self, X32: np.ndarray) -> np.ndarray:
+        leaves = self._leaves(X32)
+        probas = [self._component_proba(component, leaves) for component in self.components]
+        if len(probas) == 1:
+            return probas[0]
+        return np.average(np.asarray(probas), axis=0, weights=self.weights)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Class probabilities for raw (unscaled) feature rows
+
+        Args:
+            X: (n_samples, n_features) array-like of raw features
+
+        Returns:
+            (n_samples, n_classes) float64 probabilities, in classes_ order
+        """
+        X32 = self._prepare(X)
+        if len(X32) <= CHUNK_ROWS:
+            return self._predict_proba_chunk(X32)
+        return np.concatenate([
+            self._predict_proba_chunk(X32[i:i + CHUNK_ROWS]) for i in range(0, len(X32), CHUNK_ROWS)
+        ])
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, directory: str) -> None:
+        """
+        Write node arrays as uncompressed .npy files plus meta.json
+
+        The files are staged in a sibling directory that then replaces
+        `directory`, so processes with the old arrays memory-mapped keep
+        reading intact files and loaders never see a partial set.
+        """
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.compiling-', dir=parent)
+        try:
+            for name in ARRAY_NAMES:
+                np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(getattr(self, name)))
+            with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(self.meta, f)
+
+            retired = None
+            if os.path.isdir(directory):
+                retired = f"{directory}.retired-{os.getpid()}-{time.time_ns()}"
+                os.rename(directory, retired)
+            try:
+                os.rename(staging, directory)
+            except OSError:
+                # Another process installed the same arrays first
+                pass
+            if retired:
+                # Unlinked files stay readable by processes that mapped them
+                shutil.rmtree(retired, ignore_errors=True)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def get_stats(self) -> Dict:
+        return {
+            "engine": "compiled",
+            "trees": self.n_trees,
+            "nodes": self.n_nodes,
+            "depth": self.depth,
+            "bytes": self.nbytes
+        }
+
+
+def compile_model(model, scaler=None) -> CompiledEnsemble:
+    """
+    Compile a fitted soft-voting ensemble (or a single forest / boosting model)
+
+    Args:
+        model: VotingClassifier(voting='soft'), RandomForest/ExtraTrees,
+            GradientBoostingClassifier or DecisionTreeClassifier
+        scaler: Optional fitted StandardScaler applied before the model
+
+    Returns:
+        CompiledEnsemble taking raw, unscaled features
+    """
+    from sklearn.ensemble import VotingClassifier
+
+    if isinstance(model, VotingClassifier):
+        if model.voting != 'soft':
+            raise ValueError("Only soft voting can be compiled")
+        members = list(model.estimators_)
+        weights = model._weights_not_none
+        classes = model.classes_
+    else:
+        members = [model]
+        weights = None
+        classes = model.classes_
+
+    builder = _NodeBuilder(len(classes))
+    components = [_add_member(builder, member) for member in members]
+    mean, scale = _scaler_arrays(scaler)
+
+    meta = {
+        "components": components,
+        "weights": None if weights is None else [float(w) for w in weights],
+        "depth": builder.depth,
+        "classes": classes.tolist(),
+        "n_features": int(getattr(model, 'n_features_in_', members[0].n_features_in_)),
+        "mean": None if mean is None else mean.tolist(),
+        "scale": None if scale is None else scale.tolist()
+    }
+    return CompiledEnsemble(builder.arrays(), meta)
+
+
+def load_compiled(directory: str, mmap_mode: Optional[str] = None) -> CompiledEnsemble:
+    """Load a CompiledEnsemble written by CompiledEnsemble.save"""
+    arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+    with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    return CompiledEnsemble(arrays, meta)
+
+
+class SklearnEnsemble:
+    """
+    Scaler + scikit-learn model behind the CompiledEnsemble interface
+
+    Used when compilation is disabled or not possible. Forest members are
+    switched to n_jobs=1 so single-row calls do not start joblib workers.
+    """
+
+    def __init__(self, model, scaler=None):
+        self.model = model
+        self.scaler = scaler
+        self.classes_ = model.classes_
+        for member in getattr(model, 'estimators_', []):
+            if hasattr(member, 'n_jobs'):
+                member.n_jobs = 1
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if self.scaler is not None:
+            X = self.scaler.transform(X)
+        return self.model.predict_proba(X)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def get_stats(self) -> Dict:
+        return {"engine": "sklearn", "model": type(self.model).__name__}
+
+
+def create_engine(model, scaler=None, name: str = 'compiled'):
+    """
+    Build the inference engine for a tabular model, falling back to scikit-learn
+
+    Args:
+        model: Fitted scikit-learn classifier
+        scaler: Optional fitted scaler applied before the model
+        name: 'compiled' or 'sklearn'
+    """
+    if name not in ENGINE_NAMES:
+        raise ValueError(f"Unknown engine '{name}'. Choose from: {', '.join(ENGINE_NAMES)}")
+    if name == 'compiled':
+        try:
+            return compile_model(model, scaler)
+        except Exception as e:
+            print(f"Warning: Could not compile {type(model).__name__}, using scikit-learn: {e}")
+    return SklearnEnsemble(model, scaler)
+
+
+def compiled_path(model_path: str) -> str:
+    """Directory holding the compiled arrays of a model pickle"""
+    return os.path.splitext(model_path)[0] + '.compiled'
+
+
+def source_fingerprint(model_path: str, scaler_path: Optional[str] = None) -> Optional[str]:
+    """Content hash of the pickles a compiled engine was built from"""
+    fingerprints = [file_fingerprint(path) for path in (model_path, scaler_path) if path]
+    if None in fingerprints:
+        return None
+    return ':'.join(fingerprint[:16] for fingerprint in fingerprints)
+
+
+def _compiled_source(directory: str) -> Optional[str]:
+    try:
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f).get('source')
+    except (OSError, ValueError):
+        return None
+
+
+def export_compiled(model_path: str, scaler_path: Optional[str] = None, model=None, scaler=None) -> CompiledEnsemble:
+    """
+    Compile a saved model and write its arrays next to the pickle
+
+    Args:
+        model_path: joblib pickle of the fitted classifier
+        scaler_path: Optional joblib pickle of its scaler
+        model, scaler: Already loaded objects, to skip reading the pickles
+
+    Returns:
+        The compiled engine (arrays in memory)
+    """
+    import joblib
+
+    if model is None:
+        model = joblib.load(model_path)
+    if scaler is None and scaler_path:
+        scaler = joblib.load(scaler_path)
+    engine = compile_model(model, scaler)
+    engine.meta['source'] = source_fingerprint(model_path, scaler_path)
+    engine.save(compiled_path(model_path))
+    return engine
+
+
+def load_engine(model_path: str, scaler_path: Optional[str] = None, name: str = 'compiled',
+                mmap_mode: Optional[str] = 'r'):
+    """
+    Load a tabular model's engine, preferring the compiled arrays saved with it
+
+    The compiled directory is used when its recorded source fingerprint still
+    matches the pickles. Otherwise the model is compiled and the directory is
+    rewritten, so later loads and other workers map it instead of unpickling
+    the ensemble.
+
+    Args:
+        model_path: joblib pickle of the fitted classifier
+        scaler_path: Optional joblib pickle of its scaler
+        name: 'compiled' or 'sklearn'
+        mmap_mode: numpy/joblib memory-map mode, None to read into private memory
+    """
+    import joblib
+
+    if name not in ENGINE_NAMES:
+        raise ValueError(f"Unknown engine '{name}'. Choose from: {', '.join(ENGINE_NAMES)}")
+
+    if name == 'compiled':
+        directory = compiled_path(model_path)
+        source = source_fingerprint(model_path, scaler_path)
+        if source is not None and _compiled_source(directory) == source:
+            # The scaler is folded into the arrays, so neither pickle is read
+            return load_compiled(directory, mmap_mode)
+
+        scaler = joblib.load(scaler_path) if scaler_path else None
+        model = joblib.load(model_path, mmap_mode=mmap_mode)
+        engine = create_engine(model, scaler, name)
+        if not isinstance(engine, CompiledEnsemble):
+            return engine
+        engine.meta['source'] = source
+        try:
+            engine.save(directory)
+        except OSError as e:
+            print(f"Warning: Could not save compiled arrays for {model_path}: {e}")
+            return engine
+        print(f"✓ Compiled {model_path} to {directory}")
+        return load_compiled(directory, mmap_mode) if mmap_mode else engine
+
+    scaler = joblib.load(scaler_path) if scaler_path else None
+    return SklearnEnsemble(joblib.load(model_path, mmap_mode=mmap_mode), scaler)
+
+
+def engine_from_env(model, scaler=None):
+    """Engine chosen by TABULAR_ENGINE (compiled by default)"""
+    return create_engine(model, scaler, os.environ.get('TABULAR_ENGINE', 'compiled').lower())
+
+
+def mmap_mode_from_env() -> Optional[str]:
+    """'r' unless MODEL_MMAP=0 asks for artifacts to be read into private memory"""
+    return None if os.environ.get('MODEL_MMAP', '1').lower() in ('0', 'false', 'no') else 'r'
+
+
+def load_engine_from_env(model_path: str, scaler_path: Optional[str] = None):
+    """load_engine with the engine from TABULAR_ENGINE and mapping from MODEL_MMAP"""
+    return load_engine(model_path, scaler_path, os.environ.get('TABULAR_ENGINE', 'compiled').lower(),
+                       mmap_mode_from_env())